@@ -0,0 +1,231 @@
+import pygame
+from concurrent.futures import ThreadPoolExecutor
+"""
+audio.py
+
+This module manages sound effects for the King's Trial game.
+Sounds are decoded in a background thread the first time they are needed and played
+through a fixed pool of mixer channels.
+
+Features:
+- Lazy, background loading of sound effects on first use.
+- Dedicated mixer channels per sound, limiting how many voices of a sound play at once.
+- Per-sound cooldowns, so repeated requests (e.g. bumping into a wall every frame) cost a single comparison.
+- Graceful fallback to silence when no audio device is available, and a silent bank for headless simulations.
+"""
+SOUND_PATHS = {
+    "bump": "assets/sounds/bump_sound.wav",
+    "jump": "assets/sounds/jump_sound.wav",
+    "land": "assets/sounds/land_sound.wav",
+    "splat": "assets/sounds/splat_sound.wav",
+    "select": "assets/sounds/select_sound.wav",
+}
+
+# name: (cooldown in milliseconds, maximum simultaneous voices)
+SOUND_LIMITS = {
+    "bump": (150, 1),
+    "jump": (50, 1),
+    "land": (100, 1),
+    "splat": (200, 1),
+    "select": (0, 2),
+}
+
+PENDING_PLAY_TIMEOUT = 250
+
+class SoundBank:
+    def __init__(self, sound_paths=SOUND_PATHS, sound_limits=SOUND_LIMITS, volume=0.07):
+        """
+        Initialize the sound bank and reserve mixer channels for every sound.
+
+        Args:
+            sound_paths (dict): Mapping of sound names to WAV file paths.
+            sound_limits (dict): Mapping of sound names to (cooldown_ms, max_voices).
+            volume (float): Volume applied to every sound once it is loaded.
+
+        Returns:
+            None
+        """
+        self.sound_paths = sound_paths
+        self.volume = volume
+        self.sounds = {}
+        self.loading = {}
+        self.pending = {}
+        self.last_played = {}
+        self.cooldowns = {}
+        self.channels = {}
+        self.executor = None
+        self.enabled = True
+
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+        except pygame.error as e:
+            print(f"Audio disabled: {e}")
+            self.enabled = False
+            return
+
+        total_voices = sum(sound_limits.get(name, (0, 1))[1] for name in sound_paths)
+        if pygame.mixer.get_num_channels() < total_voices:
+            pygame.mixer.set_num_channels(total_voices)
+        pygame.mixer.set_reserved(total_voices)
+
+        next_channel = 0
+        for name in sound_paths:
+            cooldown, max_voices = sound_limits.get(name, (0, 1))
+            self.cooldowns[name] = cooldown
+            self.channels[name] = [pygame.mixer.Channel(next_channel + i) for i in range(max_voices)]
+            next_channel += max_voices
+
+    def _load(self, name):
+        """
+        Decode a sound file. Runs on the background loader thread.
+
+        Args:
+            name (str): Name of the sound to load.
+
+        Returns:
+            Sound: The decoded sound, or None if it could not be loaded.
+        """
+        try:
+            sound = pygame.mixer.Sound(self.sound_paths[name])
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"Failed to load sound {name}: {e}")
+            return None
+        sound.set_volume(self.volume)
+        return sound
+
+    def request(self, name):
+        """
+        Start loading a sound in the background if it is not loaded or loading yet.
+
+        Args:
+            name (str): Name of the sound to load.
+
+        Returns:
+            None
+        """
+        if not self.enabled or name not in self.sound_paths or name in self.sounds or name in self.loading:
+            return
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sound-loader")
+        self.loading[name] = self.executor.submit(self._load, name)
+
+    def preload(self):
+        """
+        Queue every known sound for background loading.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        for name in self.sound_paths:
+            self.request(name)
+
+    def _collect(self, name):
+        """
+        Move a finished background load into the loaded sounds.
+
+        Args:
+            name (str): Name of the sound.
+
+        Returns:
+            Sound: The loaded sound, or None if it is not ready.
+        """
+        future = self.loading.get(name)
+        if future is None or not future.done():
+            return None
+        del self.loading[name]
+        sound = future.result()
+        self.sounds[name] = sound
+        return sound
+
+    def play(self, name):
+        """
+        Play a sound on one of its reserved channels, respecting its cooldown and voice limit.
+
+        A sound that is not loaded yet starts loading and is played by update() once ready.
+        Names without a sound file are ignored.
+
+        Args:
+            name (str): Name of the sound to play.
+
+        Returns:
+            None
+        """
+        if not self.enabled or name not in self.sound_paths:
+            return
+        now = pygame.time.get_ticks()
+        cooldown = self.cooldowns.get(name, 0)
+        if now - self.last_played.get(name, -cooldown) < cooldown:
+            return
+
+        if name in self.sounds:
+            sound = self.sounds[name]
+        else:
+            sound = self._collect(name)
+            if sound is None and name not in self.sounds:
+                self.request(name)
+                self.pending[name] = now
+                return
+        if sound is None:
+            return
+
+        for channel in self.channels[name]:
+            if not channel.get_busy():
+                channel.play(sound)
+                self.last_played[name] = now
+                return
+
+    def update(self):
+        """
+        Play sounds that were requested before they finished loading. Call once per frame.
+
+        Requests older than PENDING_PLAY_TIMEOUT are dropped, so a late sound never plays out of context.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if not self.pending:
+            return
+        now = pygame.time.get_ticks()
+        for name, requested_at in list(self.pending.items()):
+            if now - requested_at > PENDING_PLAY_TIMEOUT:
+                del self.pending[name]
+            elif self._collect(name) is not None or name in self.sounds:
+                del self.pending[name]
+                self.play(name)
+
+class SilentSoundBank:
+    enabled = False
+
+    def play(self, name):
+        """
+        Ignore a sound request. Used by headless simulations.
+
+        Args:
+            name (str): Name of the sound.
+
+        Returns:
+            None
+        """
+
+    def preload(self):
+        """
+        Nothing to preload in a silent sound bank.
+
+        Returns:
+            None
+        """
+
+    def update(self):
+        """
+        Nothing to update in a silent sound bank.
+
+        Returns:
+            None
+        """
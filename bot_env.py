@@ -0,0 +1,464 @@
+import argparse
+import multiprocessing
+import numpy as np
+import os
+import time
+from multiprocessing import shared_memory
+from constants import FPS, SCREEN_WIDTH, SCREEN_HEIGHT
+from levels import LEVEL_PLATFORMS
+from simulation import Simulation, load_simulation_levels
+"""
+bot_env.py
+
+This module wraps the headless King's Trial simulation in a Gym-style environment, so bots can be
+trained to play and playtest the levels. It needs no display, mixer or images, and does not depend
+on the gym packages: the reset/step signatures follow the Gymnasium API.
+
+Features:
+- KingEnv: reset() and step(action) over the actions none, left, right, start charge and release.
+- Observations of the player state and level, with an optional downsampled collision mask of the level.
+- Rewards for height climbed, a bonus for reaching the flag and a penalty for dying.
+- VectorKingEnv: many environments stepped together in worker processes, exchanging actions,
+  observations and rewards through shared memory, so a step costs one message per worker.
+- Command line benchmark: `python bot_env.py --envs 64 --workers 4 --steps 2000`.
+"""
+ACTION_NONE = 0
+ACTION_LEFT = 1
+ACTION_RIGHT = 2
+ACTION_CHARGE = 3
+ACTION_RELEASE = 4
+ACTION_NAMES = ["none", "left", "right", "charge", "release"]
+
+# Player state observation, one float32 per field. Positions are in screen heights and widths,
+# velocities in units of the fall speed cap, the charge in seconds held and the health as a fraction.
+OBSERVATION_FIELDS = (
+    "level", "x", "y", "x_velocity", "y_velocity", "grounded", "holding_jump", "charge", "jump_direction", "health",
+)
+MAX_SPEED = 15
+MASK_CELL = 16
+
+CLIMB_REWARD = 1.0
+FINISH_REWARD = 10.0
+DEATH_REWARD = -1.0
+MAX_EPISODE_STEPS = FPS * 60 * 10
+START_TIME = 1.0
+
+_LEVEL_MASKS = {}
+
+def level_mask(level, cell=MASK_CELL):
+    """
+    Return the collision mask of a level, downsampled to one value per grid cell.
+
+    Masks are computed once per level and cell size, and shared by every environment of the process.
+
+    Args:
+        level (int): Zero-based level index.
+        cell (int): Width and height of a mask cell in pixels.
+
+    Returns:
+        ndarray: uint8 array of shape (SCREEN_HEIGHT // cell, SCREEN_WIDTH // cell), 1 where a cell
+            overlaps a platform.
+    """
+    mask = _LEVEL_MASKS.get((level, cell))
+    if mask is None:
+        solid = np.zeros((SCREEN_HEIGHT, SCREEN_WIDTH), dtype=bool)
+        for platform in LEVEL_PLATFORMS[level]:
+            solid[max(0, platform.top):platform.bottom, max(0, platform.left):platform.right] = True
+        rows, columns = SCREEN_HEIGHT // cell, SCREEN_WIDTH // cell
+        cells = solid[:rows * cell, :columns * cell].reshape(rows, cell, columns, cell)
+        mask = cells.any(axis=(1, 3)).astype(np.uint8)
+        _LEVEL_MASKS[(level, cell)] = mask
+    return mask
+
+class KingEnv:
+    def __init__(self, mask_cell=None, max_steps=MAX_EPISODE_STEPS, frame_skip=1, state=None, mask=None):
+        """
+        Initialize an environment over a headless simulation, loading the level geometry if needed.
+
+        Observations are written into the same arrays every step; copy them to keep them.
+
+        Args:
+            mask_cell (int): Cell size of the collision mask in pixels, or None for no mask.
+            max_steps (int): Steps after which an episode is truncated.
+            frame_skip (int): Gameplay ticks per step. Charges and releases happen on the first tick.
+            state (ndarray): float32 array of len(OBSERVATION_FIELDS) to write the player state into.
+            mask (ndarray): uint8 array of the mask's shape to write the collision mask into.
+
+        Returns:
+            None
+        """
+        load_simulation_levels()
+        self.sim = Simulation()
+        self.mask_cell = mask_cell
+        self.max_steps = max_steps
+        self.frame_skip = frame_skip
+        self.state = state if state is not None else np.zeros(len(OBSERVATION_FIELDS), dtype=np.float32)
+        self.observation = {"state": self.state}
+        if mask_cell:
+            shape = (SCREEN_HEIGHT // mask_cell, SCREEN_WIDTH // mask_cell)
+            self.mask = mask if mask is not None else np.zeros(shape, dtype=np.uint8)
+            self.observation["mask"] = self.mask
+        self.mask_level = None
+        self.jump_held = False
+        self.steps = 0
+        self.height = 0
+
+    def reset(self, seed=None, options=None):
+        """
+        Start a new episode at the bottom of the tower, or in a given state.
+
+        Args:
+            seed (int): Accepted for API compatibility; the game is deterministic.
+            options (dict): Optional "level" (int) and "player" (dict as returned by Player.get_state())
+                to start the episode from, e.g. to playtest a single level.
+
+        Returns:
+            tuple: (observation, info).
+        """
+        options = options or {}
+        self.sim.restore(START_TIME, options.get("level", 0), 0, options.get("player", {}))
+        self.jump_held = False
+        self.steps = 0
+        self.height = self.climbed()
+        self.observe()
+        return self.observation, {}
+
+    def climbed(self):
+        """
+        Return how high the player's feet are in the tower, in screen heights.
+
+        Returns:
+            float: Level index plus the height within the level.
+        """
+        player = self.sim.player
+        return self.sim.current_level + 1 - (player.y + player.height) / SCREEN_HEIGHT
+
+    def observe(self):
+        """
+        Write the current observation into the observation arrays.
+
+        Returns:
+            None
+        """
+        sim = self.sim
+        player = sim.player
+        charge = min(1.0, sim.tick_time - player.jump_start_time) if player.holding_jump else 0.0
+        self.state[:] = (
+            sim.current_level, player.x / SCREEN_WIDTH, player.y / SCREEN_HEIGHT, player.x_velocity / MAX_SPEED,
+            player.y_velocity / MAX_SPEED, player.grounded, player.holding_jump, charge, player.jump_direction,
+            player.current_health / player.max_health,
+        )
+        if self.mask_cell and self.mask_level != sim.current_level:
+            self.mask[:] = level_mask(sim.current_level, self.mask_cell)
+            self.mask_level = sim.current_level
+
+    def step(self, action):
+        """
+        Apply an action and advance the simulation by frame_skip ticks.
+
+        Charging holds the jump key until a release; while charging, left and right aim the jump.
+
+        Args:
+            action (int): One of the ACTION_* values.
+
+        Returns:
+            tuple: (observation, reward, terminated, truncated, info). The info dict holds the run's
+                statistics when the episode ends, and is empty otherwise.
+        """
+        sim = self.sim
+        finished = False
+        for tick in range(self.frame_skip):
+            tick_time = sim.tick_time + 1 / FPS
+            if tick == 0 and action == ACTION_CHARGE and not self.jump_held:
+                self.jump_held = True
+                sim.press_jump(tick_time)
+            elif tick == 0 and action == ACTION_RELEASE and self.jump_held:
+                self.jump_held = False
+                sim.release_jump(tick_time)
+            finished = sim.step(tick_time, action == ACTION_LEFT, action == ACTION_RIGHT, self.jump_held)
+            if finished or sim.died:
+                break
+        self.steps += 1
+
+        height = self.climbed()
+        reward = (height - self.height) * CLIMB_REWARD
+        self.height = height
+        terminated = finished or sim.died
+        if finished:
+            reward += FINISH_REWARD
+        elif sim.died:
+            reward += DEATH_REWARD
+        truncated = not terminated and self.steps >= self.max_steps
+        self.observe()
+        info = {}
+        if terminated or truncated:
+            info = {
+                "steps": self.steps, "level": sim.current_level, "finished": finished, "died": sim.died,
+                "final_time": sim.final_time, "jumps": sim.player.jump_count, "falls": sim.player.fall_counter,
+            }
+        return self.observation, reward, terminated, truncated, info
+
+def _worker(connection, names, count, start, stop, env_options):
+    """
+    Run a slice of a vector environment's environments in a worker process.
+
+    Serves "reset", "step" and "close" commands from the parent. Actions are read from and
+    observations, rewards and flags written to the shared arrays of the worker's slice; only
+    the info dicts of finished episodes travel through the pipe.
+
+    Args:
+        connection (Connection): The worker's end of the command pipe.
+        names (dict): Shared memory block names of the vector environment's arrays.
+        count (int): Number of environments of the whole vector environment.
+        start (int): Index of the worker's first environment.
+        stop (int): Index after the worker's last environment.
+        env_options (dict): Keyword arguments for each KingEnv.
+
+    Returns:
+        None
+    """
+    blocks, arrays = _attach(names, count, env_options.get("mask_cell"))
+    try:
+        envs = [
+            KingEnv(state=arrays["state"][index], mask=arrays["mask"][index] if "mask" in arrays else None, **env_options)
+            for index in range(start, stop)
+        ]
+        actions, rewards = arrays["action"], arrays["reward"]
+        terminated, truncated = arrays["terminated"], arrays["truncated"]
+        while True:
+            command, options = connection.recv()
+            if command == "reset":
+                for env in envs:
+                    env.reset(options=options)
+                connection.send(None)
+            elif command == "step":
+                infos = {}
+                for index, env in enumerate(envs, start):
+                    _, rewards[index], terminated[index], truncated[index], info = env.step(actions[index])
+                    if info:
+                        info["final_state"] = env.state.copy()
+                        infos[index] = info
+                        env.reset(options=options)
+                connection.send(infos)
+            else:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        del arrays
+        for block in blocks:
+            block.close()
+
+def _layout(count, mask_cell):
+    """
+    Return the shape and dtype of every shared array of a vector environment.
+
+    Args:
+        count (int): Number of environments.
+        mask_cell (int): Cell size of the collision mask, or None for no mask.
+
+    Returns:
+        dict: Array name mapped to (shape, dtype).
+    """
+    layout = {
+        "state": ((count, len(OBSERVATION_FIELDS)), np.float32),
+        "action": ((count,), np.int8),
+        "reward": ((count,), np.float32),
+        "terminated": ((count,), np.bool_),
+        "truncated": ((count,), np.bool_),
+    }
+    if mask_cell:
+        layout["mask"] = ((count, SCREEN_HEIGHT // mask_cell, SCREEN_WIDTH // mask_cell), np.uint8)
+    return layout
+
+def _attach(names, count, mask_cell):
+    """
+    Map the shared memory blocks of a vector environment as numpy arrays.
+
+    Args:
+        names (dict): Array name mapped to its shared memory block name.
+        count (int): Number of environments.
+        mask_cell (int): Cell size of the collision mask, or None for no mask.
+
+    Returns:
+        tuple: (list of SharedMemory blocks, dict of arrays).
+    """
+    blocks, arrays = [], {}
+    for name, (shape, dtype) in _layout(count, mask_cell).items():
+        block = shared_memory.SharedMemory(name=names[name])
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    return blocks, arrays
+
+class VectorKingEnv:
+    def __init__(self, count, workers=None, copy=True, **env_options):
+        """
+        Start worker processes that each run a share of count environments.
+
+        Args:
+            count (int): Number of environments.
+            workers (int): Number of worker processes. Defaults to the number of CPU cores.
+            copy (bool): Return copies of the observations and rewards. Otherwise the returned arrays
+                are views of the shared memory, overwritten by the next step.
+            **env_options: Keyword arguments for each KingEnv: mask_cell, max_steps, frame_skip.
+
+        Returns:
+            None
+        """
+        self.count = count
+        self.workers = max(1, min(count, workers or os.cpu_count() or 1))
+        self.copy = copy
+        self.mask_cell = env_options.get("mask_cell")
+        self.blocks = []
+        self.arrays = {}
+        for name, (shape, dtype) in _layout(count, self.mask_cell).items():
+            size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            block = shared_memory.SharedMemory(create=True, size=size)
+            self.blocks.append(block)
+            self.arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        names = {name: block.name for name, block in zip(self.arrays, self.blocks)}
+
+        self.connections = []
+        self.processes = []
+        bounds = np.linspace(0, count, self.workers + 1).astype(int)
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_worker, args=(child, names, count, start, stop, env_options), daemon=True
+            )
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+        self.reset_options = None
+        self.steps = 0
+        self.wall_seconds = 0
+
+    def observation(self):
+        """
+        Return the observations of all environments.
+
+        Returns:
+            dict: "state" of shape (count, len(OBSERVATION_FIELDS)) and, with a mask, "mask" of shape
+                (count, rows, columns).
+        """
+        observation = {"state": self.arrays["state"]}
+        if self.mask_cell:
+            observation["mask"] = self.arrays["mask"]
+        if self.copy:
+            observation = {name: array.copy() for name, array in observation.items()}
+        return observation
+
+    def reset(self, seed=None, options=None):
+        """
+        Start a new episode in every environment.
+
+        Args:
+            seed (int): Accepted for API compatibility; the game is deterministic.
+            options (dict): Episode start for every environment, see KingEnv.reset(). Also used for
+                the automatic resets of finished episodes.
+
+        Returns:
+            tuple: (observation, info).
+        """
+        self.reset_options = options
+        for connection in self.connections:
+            connection.send(("reset", options))
+        for connection in self.connections:
+            connection.recv()
+        return self.observation(), {}
+
+    def step(self, actions):
+        """
+        Step every environment with its action. Finished episodes are reset automatically.
+
+        Args:
+            actions (Sequence[int]): One ACTION_* value per environment.
+
+        Returns:
+            tuple: (observation, rewards, terminated, truncated, infos). infos maps the index of every
+                environment whose episode ended to its final info, including its "final_state".
+        """
+        start = time.perf_counter()
+        self.arrays["action"][:] = actions
+        for connection in self.connections:
+            connection.send(("step", self.reset_options))
+        infos = {}
+        for connection in self.connections:
+            infos.update(connection.recv())
+        self.steps += self.count
+        self.wall_seconds += time.perf_counter() - start
+        rewards, terminated, truncated = self.arrays["reward"], self.arrays["terminated"], self.arrays["truncated"]
+        if self.copy:
+            rewards, terminated, truncated = rewards.copy(), terminated.copy(), truncated.copy()
+        return self.observation(), rewards, terminated, truncated, infos
+
+    def metrics(self):
+        """
+        Return the throughput of all steps so far.
+
+        Returns:
+            dict: Environments, workers, environment steps and steps per wall-clock second.
+        """
+        return {
+            "envs": self.count,
+            "workers": self.workers,
+            "steps": self.steps,
+            "steps_per_second": self.steps / (self.wall_seconds or 1e-9),
+        }
+
+    def close(self):
+        """
+        Stop the worker processes and free the shared memory.
+
+        Returns:
+            None
+        """
+        for connection in self.connections:
+            try:
+                connection.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.connections = []
+        self.processes = []
+        self.arrays = {}
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+def main():
+    """
+    Measure the throughput of a vector environment driven by random actions.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the King's Trial bot environment")
+    parser.add_argument("--envs", type=int, default=64, help="number of environments")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes, defaults to the CPU cores")
+    parser.add_argument("--steps", type=int, default=2000, help="vector steps to run")
+    parser.add_argument("--mask-cell", type=int, default=None, help="collision mask cell size in pixels")
+    parser.add_argument("--frame-skip", type=int, default=1, help="gameplay ticks per step")
+    args = parser.parse_args()
+
+    env = VectorKingEnv(args.envs, args.workers, copy=False, mask_cell=args.mask_cell, frame_skip=args.frame_skip)
+    try:
+        env.reset()
+        rng = np.random.default_rng(0)
+        episodes = 0
+        for _ in range(args.steps):
+            _, _, _, _, infos = env.step(rng.integers(0, len(ACTION_NAMES), args.envs))
+            episodes += len(infos)
+        metrics = env.metrics()
+        print(f"{metrics['steps']} steps in {env.wall_seconds:.2f}s with {metrics['workers']} workers: "
+              f"{metrics['steps_per_second']:.0f} steps/s, {episodes} episodes ended")
+    finally:
+        env.close()
+
+if __name__ == "__main__":
+    main()
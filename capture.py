@@ -0,0 +1,230 @@
+import numpy as np
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+from constants import FPS, SCREEN_WIDTH, SCREEN_HEIGHT
+"""
+capture.py
+
+This module records gameplay video of the King's Trial game, for trailers and bug reports.
+The main loop only copies each finished frame into a preallocated buffer; encoding and writing
+happen on background threads, so capturing costs the game about one memory copy per frame.
+
+Features:
+- A pool of frame buffers allocated once, each filled with a single copy of the framebuffer's pixels.
+- PNG sequences encoded by several worker threads; zlib releases the GIL, so they run in parallel.
+- A raw video stream written unconverted by one worker, with the ffmpeg command to convert it.
+- Frames are dropped and counted when every buffer is still waiting for an encoder, never stalling the game.
+- Frames of another size, e.g. after the quality governor lowered the resolution, scaled to the capture size.
+"""
+CAPTURE_DIR = "captures"
+CAPTURE_PNG = "png"
+CAPTURE_RAW = "raw"
+CAPTURE_FORMATS = (CAPTURE_PNG, CAPTURE_RAW)
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+RAW_NAME = "video.raw"
+
+def png_chunk(kind, data):
+    """
+    Build a PNG chunk.
+
+    Args:
+        kind (bytes): Four-letter chunk type, e.g. b"IDAT".
+        data (bytes): Chunk data.
+
+    Returns:
+        bytes: Length, type, data and checksum of the chunk.
+    """
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def encode_png(rows, width, height, level=1):
+    """
+    Encode an RGB image whose rows already start with their PNG filter byte.
+
+    Args:
+        rows (ndarray): uint8 array of shape (height, 1 + width * 3).
+        width (int): Image width in pixels.
+        height (int): Image height in pixels.
+        level (int): zlib compression level, 1 being the fastest.
+
+    Returns:
+        bytes: The PNG file.
+    """
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return PNG_SIGNATURE + png_chunk(b"IHDR", header) + png_chunk(b"IDAT", zlib.compress(rows, level)) \
+        + png_chunk(b"IEND", b"")
+
+class FrameCapture:
+    def __init__(self, directory, capture_format=CAPTURE_PNG, size=(SCREEN_WIDTH, SCREEN_HEIGHT), pool_size=6,
+                 workers=None, level=1):
+        """
+        Initialize a capture with its buffer pool and encoder threads.
+
+        Args:
+            directory (str): Directory the frames or the video stream are written to.
+            capture_format (str): One of CAPTURE_FORMATS.
+            size (tuple): (width, height) of the captured frames.
+            pool_size (int): Number of frames that can wait for an encoder before frames are dropped.
+            workers (int): Number of PNG encoder threads, defaults to one per spare CPU core, at most four.
+                Raw streams always use one, to keep the frames in order.
+            level (int): zlib compression level of the PNG files.
+
+        Returns:
+            None
+        """
+        self.directory = directory
+        self.format = capture_format
+        self.size = size
+        self.level = level
+        self.staging = pygame.Surface(size, 0, 32)
+        self.masks = self.staging.get_masks()
+        self.pitch = self.staging.get_pitch()
+        width, height = size
+        # Byte of each 32-bit pixel that holds red, green and blue.
+        self.channels = [
+            shift // 8 if sys.byteorder == "little" else 3 - shift // 8 for shift in self.staging.get_shifts()[:3]
+        ]
+        self.buffers = [bytearray(self.pitch * height) for _ in range(pool_size)]
+        self.rows = [np.zeros((height, 1 + width * 3), np.uint8) for _ in range(pool_size)] \
+            if capture_format == CAPTURE_PNG else []
+        self.free = deque(range(pool_size))
+        if capture_format == CAPTURE_RAW:
+            workers = 1
+        elif workers is None:
+            workers = max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="capture-encoder")
+        self.lock = threading.Lock()
+        self.raw_file = None
+        self.frames = 0
+        self.written = 0
+        self.dropped = 0
+        self.enabled = True
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            print(f"Failed to create capture directory: {e}")
+            self.enabled = False
+
+    @classmethod
+    def new_session(cls, capture_format, size):
+        """
+        Create a capture in a new, timestamped directory of the capture directory.
+
+        Args:
+            capture_format (str): One of CAPTURE_FORMATS.
+            size (tuple): (width, height) of the captured frames.
+
+        Returns:
+            FrameCapture: The capture.
+        """
+        name = time.strftime("capture-%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03}"
+        return cls(os.path.join(CAPTURE_DIR, name), capture_format, size)
+
+    @property
+    def pixel_format(self):
+        """
+        ffmpeg name of the byte layout of the raw stream, e.g. "bgr0".
+
+        Returns:
+            str: The pixel format.
+        """
+        layout = ["0"] * 4
+        for name, index in zip("rgb", self.channels):
+            layout[index] = name
+        return "".join(layout)
+
+    def capture(self, frame):
+        """
+        Copy a finished frame into a free buffer and hand it to an encoder. Called once per frame.
+
+        Args:
+            frame (Surface): The framebuffer.
+
+        Returns:
+            None
+        """
+        if not self.enabled:
+            return
+        try:
+            index = self.free.popleft()
+        except IndexError:
+            self.dropped += 1
+            return
+        if frame.get_size() != self.size:
+            self.staging.blit(pygame.transform.scale(frame, self.size), (0, 0))
+            frame = self.staging
+        elif frame.get_masks() != self.masks or frame.get_pitch() != self.pitch or frame.get_parent() is not None:
+            self.staging.blit(frame, (0, 0))
+            frame = self.staging
+        self.buffers[index][:] = frame.get_buffer()
+        self.frames += 1
+        self.executor.submit(self._encode, index, self.frames)
+
+    def _encode(self, index, number):
+        """
+        Encode and write one buffered frame, then return its buffer to the pool. Runs on an encoder thread.
+
+        Args:
+            index (int): Index of the buffer holding the frame.
+            number (int): One-based number of the frame in the capture.
+
+        Returns:
+            None
+        """
+        width, height = self.size
+        try:
+            pixels = np.frombuffer(self.buffers[index], np.uint8).reshape(height, self.pitch)[:, :width * 4]
+            if self.format == CAPTURE_RAW:
+                if self.raw_file is None:
+                    self.raw_file = open(os.path.join(self.directory, RAW_NAME), 'wb')
+                self.raw_file.write(np.ascontiguousarray(pixels))
+            else:
+                pixels = pixels.reshape(height, width, 4)
+                rows = self.rows[index]
+                rgb = rows[:, 1:].reshape(height, width, 3)
+                for channel, byte in enumerate(self.channels):
+                    rgb[..., channel] = pixels[..., byte]
+                with open(os.path.join(self.directory, f"frame-{number:06}.png"), 'wb') as frame_file:
+                    frame_file.write(encode_png(rows, width, height, self.level))
+            with self.lock:
+                self.written += 1
+        except OSError as e:
+            print(f"Failed to write capture frame: {e}")
+            self.enabled = False
+        finally:
+            self.free.append(index)
+
+    @property
+    def memory(self):
+        """
+        Memory held by the buffer pool.
+
+        Returns:
+            int: Size in bytes.
+        """
+        return sum(map(len, self.buffers)) + sum(rows.nbytes for rows in self.rows)
+
+    def close(self):
+        """
+        Wait for the encoders to write every buffered frame and report the capture.
+
+        Returns:
+            None
+        """
+        self.enabled = False
+        self.executor.shutdown()
+        if self.raw_file is not None:
+            self.raw_file.close()
+            self.raw_file = None
+        print(f"Captured {self.written} frames to {self.directory} ({self.dropped} dropped)")
+        if self.format == CAPTURE_RAW and self.written:
+            width, height = self.size
+            path = os.path.join(self.directory, RAW_NAME)
+            print(f"Convert with: ffmpeg -f rawvideo -pixel_format {self.pixel_format} -video_size {width}x{height} "
+                  f"-framerate {FPS} -i {path} capture.mp4")
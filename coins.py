@@ -0,0 +1,227 @@
+import pygame
+from itertools import repeat
+"""
+coins.py
+
+This module defines the collectible coins of the King's Trial game.
+Coins are grouped by level, so collection checks and drawing only touch the coins
+of the level the player is currently on.
+
+Features:
+- Slotted coin objects with hitboxes computed once at creation.
+- Per-level index of uncollected coins and their hitboxes.
+- A shared animation clock instead of a per-coin frame counter.
+- Batched drawing of all coins of a level in a single blits call.
+"""
+COIN_HITBOX_SIZE = 32
+COIN_FX_OFFSET = (64 - 50) // 2
+COIN_FX_SPEED = 0.3
+
+class Coin:
+    __slots__ = ("pos", "level", "rect", "collected", "fx_frame_index", "show_fx")
+
+    def __init__(self, pos, level):
+        """
+        Initialize a coin at a fixed position on a level.
+
+        Args:
+            pos (tuple): Top-left (x, y) position of the coin image.
+            level (int): Zero-based index of the level the coin is placed on.
+
+        Returns:
+            None
+        """
+        self.pos = pos
+        self.level = level
+        self.rect = pygame.Rect(pos[0], pos[1], COIN_HITBOX_SIZE, COIN_HITBOX_SIZE)
+        self.collected = False
+        self.fx_frame_index = 0
+        self.show_fx = False
+
+class CoinIndex:
+    def __init__(self, placements):
+        """
+        Build the per-level coin index.
+
+        Args:
+            placements (list[tuple]): (level, (x, y)) pairs, in save file order.
+
+        Returns:
+            None
+        """
+        self.coins = [Coin(pos, level) for level, pos in placements]
+        self.by_level = {}
+        for coin in self.coins:
+            self.by_level.setdefault(coin.level, []).append(coin)
+        self.uncollected = {}
+        self.uncollected_rects = {}
+        self.uncollected_positions = {}
+        self.active_fx = []
+        self.frame_index = 0
+        self.rebuild()
+
+    def __len__(self):
+        return len(self.coins)
+
+    def rebuild(self):
+        """
+        Recompute the per-level lists of uncollected coins, hitboxes and draw positions.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        for level in self.by_level:
+            self.rebuild_level(level)
+
+    def rebuild_level(self, level):
+        """
+        Recompute the uncollected coins, hitboxes and draw positions of a single level.
+
+        Args:
+            level (int): Zero-based level index.
+
+        Returns:
+            None
+        """
+        remaining = [coin for coin in self.by_level[level] if not coin.collected]
+        self.uncollected[level] = remaining
+        self.uncollected_rects[level] = [coin.rect for coin in remaining]
+        self.uncollected_positions[level] = [coin.pos for coin in remaining]
+
+    def reset(self):
+        """
+        Mark every coin as not collected and clear running collection effects.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        for coin in self.coins:
+            coin.collected = False
+            coin.show_fx = False
+            coin.fx_frame_index = 0
+        self.active_fx = []
+        self.rebuild()
+
+    def clear_fx(self):
+        """
+        Stop all running collection effects.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        for coin in self.active_fx:
+            coin.show_fx = False
+            coin.fx_frame_index = 0
+        self.active_fx = []
+
+    def collected_flags(self):
+        """
+        Return the collected state of every coin, in save file order.
+
+        Returns:
+            list[bool]: Collected flag per coin.
+        """
+        return [coin.collected for coin in self.coins]
+
+    def set_collected_flags(self, flags):
+        """
+        Restore the collected state of every coin from a save file, clearing running collection effects.
+
+        Args:
+            flags (list[bool]): Collected flag per coin; missing entries count as not collected.
+
+        Returns:
+            None
+        """
+        for i, coin in enumerate(self.coins):
+            coin.collected = flags[i] if i < len(flags) else False
+            coin.show_fx = False
+            coin.fx_frame_index = 0
+        self.active_fx = []
+        self.rebuild()
+
+    def collect(self, level, player_rect):
+        """
+        Collect every uncollected coin of a level that overlaps the player.
+
+        Args:
+            level (int): Zero-based index of the current level.
+            player_rect (Rect): The player's hitbox.
+
+        Returns:
+            int: Number of coins collected by this call.
+        """
+        rects = self.uncollected_rects.get(level)
+        if not rects:
+            return 0
+        hits = player_rect.collidelistall(rects)
+        if not hits:
+            return 0
+        for i in hits:
+            coin = self.uncollected[level][i]
+            coin.collected = True
+            coin.show_fx = True
+            coin.fx_frame_index = 0
+            self.active_fx.append(coin)
+        self.rebuild_level(level)
+        return len(hits)
+
+    def advance(self, speed):
+        """
+        Advance the shared coin animation clock by one frame.
+
+        Args:
+            speed (float): Animation frames advanced per game frame.
+
+        Returns:
+            None
+        """
+        self.frame_index += speed
+
+    def draw(self, screen, level, frames):
+        """
+        Draw all uncollected coins of a level with the current shared animation frame.
+
+        Args:
+            screen (Surface): The surface to draw on.
+            level (int): Zero-based index of the current level.
+            frames (list[Surface]): Coin animation frames.
+
+        Returns:
+            None
+        """
+        positions = self.uncollected_positions.get(level)
+        if positions:
+            image = frames[int(self.frame_index) % len(frames)]
+            screen.blits(zip(repeat(image), positions), doreturn=False)
+
+    def draw_fx(self, screen, frames):
+        """
+        Draw and advance the collection effects of recently collected coins.
+
+        Args:
+            screen (Surface): The surface to draw on.
+            frames (list[Surface]): Collection effect frames.
+
+        Returns:
+            None
+        """
+        if not self.active_fx:
+            return
+        for coin in self.active_fx:
+            if coin.fx_frame_index < len(frames):
+                fx_frame = frames[int(coin.fx_frame_index)]
+                screen.blit(fx_frame, (coin.pos[0] - COIN_FX_OFFSET, coin.pos[1] - COIN_FX_OFFSET))
+                coin.fx_frame_index += COIN_FX_SPEED
+            else:
+                coin.show_fx = False
+        self.active_fx = [coin for coin in self.active_fx if coin.show_fx]
@@ -14,6 +14,9 @@ Features:
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 800
 FPS = 60
+IDLE_WAKE_INTERVAL = 250  # ms a static screen sleeps on the event queue before background work runs
+PACING_MARGIN = 0.002  # s before the frame deadline that event waiting hands over to the frame clock
+GHOST_ALPHA = 110  # opacity of the other players in a race
 
 # Colors
 WHITE = (255, 255, 255)
@@ -0,0 +1,135 @@
+import pygame
+import time
+"""
+controls.py
+
+This module collects the keyboard input of the King's Trial game.
+Events are timestamped when they arrive rather than when the main loop gets around to them,
+and every tick reads its input from one snapshot, so how long a frame takes to update and
+render no longer changes what the game sees.
+
+Features:
+- Event timestamps from SDL where available, otherwise taken as the events arrive.
+- Frame pacing that waits on the event queue, so presses during the wait are timestamped on arrival.
+- One input snapshot per tick: the held keys and the key events since the previous tick.
+- Event timestamps kept within the tick they are processed in, so replays can store and check them.
+- Event timestamps converted to game time when a game clock is given, so pause and time scaling apply to input too.
+"""
+class InputSnapshot:
+    def __init__(self, tick_time, held, events):
+        """
+        Initialize the input of one tick.
+
+        Args:
+            tick_time (float): Timestamp of the tick.
+            held (Sequence[bool]): Keyboard state indexed by pygame key codes.
+            events (list[tuple]): (timestamp, event) pairs received since the previous tick, in order.
+
+        Returns:
+            None
+        """
+        self.tick_time = tick_time
+        self.held = held
+        self.events = events
+
+    def __getitem__(self, key):
+        return self.held[key]
+
+class InputTracker:
+    def __init__(self, clock=None):
+        """
+        Initialize the tracker with no pending events.
+
+        Args:
+            clock (GameClock): Clock whose game time the events are timestamped in, or None for wall-clock time.
+
+        Returns:
+            None
+        """
+        self.clock = clock
+        self.source = clock.source if clock else time.time
+        self.pending = []
+        self.last_tick = None
+
+    def stamp(self, event):
+        """
+        Store an event with the real time it happened, as read from the clock's source.
+
+        Args:
+            event (Event): The event.
+
+        Returns:
+            None
+        """
+        now = self.source()
+        sdl_ticks = getattr(event, "timestamp", None)
+        if sdl_ticks is not None:
+            now -= max(0, pygame.time.get_ticks() - sdl_ticks) / 1000
+        self.pending.append((now, event))
+
+    def poll(self):
+        """
+        Timestamp all events waiting in the queue.
+
+        Returns:
+            None
+        """
+        for event in pygame.event.get():
+            self.stamp(event)
+
+    def wait(self, timeout):
+        """
+        Sleep until an event arrives or the timeout passes.
+
+        Args:
+            timeout (int): Longest wait in milliseconds.
+
+        Returns:
+            bool: True if an event arrived.
+        """
+        event = pygame.event.wait(timeout)
+        if event.type == pygame.NOEVENT:
+            return False
+        self.stamp(event)
+        self.poll()
+        return True
+
+    def wait_until(self, deadline):
+        """
+        Wait for the next frame on the event queue, timestamping events the moment they arrive.
+
+        Args:
+            deadline (float): time.perf_counter() value to return at.
+
+        Returns:
+            None
+        """
+        while True:
+            remaining = int((deadline - time.perf_counter()) * 1000)
+            if remaining <= 0:
+                return
+            event = pygame.event.wait(remaining)
+            if event.type == pygame.NOEVENT:
+                return
+            self.stamp(event)
+
+    def snapshot(self, tick_time):
+        """
+        Build the input of a tick from the held keys and the events received since the previous tick.
+
+        Event timestamps are converted to game time and clamped to the time between the previous tick and this one.
+
+        Args:
+            tick_time (float): Timestamp of the tick.
+
+        Returns:
+            InputSnapshot: The tick's input.
+        """
+        self.poll()
+        earliest = self.last_tick if self.last_tick is not None and self.last_tick <= tick_time else tick_time
+        if self.clock:
+            self.pending = [(self.clock.game_time(timestamp), event) for timestamp, event in self.pending]
+        events = [(min(tick_time, max(earliest, timestamp)), event) for timestamp, event in self.pending]
+        self.pending = []
+        self.last_tick = tick_time
+        return InputSnapshot(tick_time, pygame.key.get_pressed(), events)
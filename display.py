@@ -0,0 +1,380 @@
+import pygame
+import time
+import weakref
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+"""
+display.py
+
+This module manages the game window and the internal framebuffer of the King's Trial game.
+The game always draws in SCREEN_WIDTH x SCREEN_HEIGHT gameplay coordinates, onto a canvas that
+renders them at a configurable internal resolution. The finished frame is scaled to the window
+once per frame, so the window can be resized or made fullscreen without touching the gameplay.
+
+Features:
+- Internal framebuffer at any fraction of the gameplay resolution, e.g. half size or the 100x100
+  native resolution of the pixel art, which cuts the per-frame fill cost on slow machines.
+- A canvas that maps gameplay coordinates to the framebuffer and caches downscaled images.
+- A vertical drawing offset, so level coordinates can be drawn at any camera position.
+- Resizable window and fullscreen toggle, with the frame letterboxed to keep its aspect ratio.
+- Drawing straight to the window when the framebuffer and the window have the same size.
+- Changing the internal resolution while the game runs.
+- Optional vsync, presented through SDL's scaled renderer.
+"""
+class Canvas:
+    def __init__(self, target, scale):
+        """
+        Initialize a canvas that draws in gameplay coordinates onto a target surface.
+
+        Args:
+            target (Surface): The framebuffer to draw on.
+            scale (float): Framebuffer pixels per gameplay pixel.
+
+        Returns:
+            None
+        """
+        self.scale = scale
+        self.offset_y = 0
+        self.scaled_images = weakref.WeakKeyDictionary()
+        self.set_target(target)
+
+    def set_offset(self, offset_y):
+        """
+        Shift everything drawn afterwards vertically, e.g. to draw a level where the camera shows it.
+
+        Full-canvas fills are not shifted.
+
+        Args:
+            offset_y (int): Vertical offset in gameplay pixels.
+
+        Returns:
+            None
+        """
+        if offset_y != self.offset_y:
+            self.offset_y = offset_y
+            self.set_target(self.target)
+
+    def set_scale(self, scale):
+        """
+        Change the number of framebuffer pixels per gameplay pixel, dropping the resized images.
+
+        Call set_target afterwards with a framebuffer of the new size.
+
+        Args:
+            scale (float): Framebuffer pixels per gameplay pixel.
+
+        Returns:
+            None
+        """
+        self.scale = scale
+        self.scaled_images = weakref.WeakKeyDictionary()
+
+    def set_target(self, target):
+        """
+        Switch to a new framebuffer, e.g. after the window was recreated.
+
+        At scale 1 without an offset the drawing methods are the target's own, so the canvas adds no overhead.
+
+        Args:
+            target (Surface): The framebuffer to draw on.
+
+        Returns:
+            None
+        """
+        self.target = target
+        if self.scale == 1 and not self.offset_y:
+            self.blit = target.blit
+            self.blits = target.blits
+            self.fill = target.fill
+            self.fblits = getattr(target, "fblits", None)
+        else:
+            for name in ("blit", "blits", "fill", "fblits"):
+                self.__dict__.pop(name, None)
+
+    def get_size(self):
+        return SCREEN_WIDTH, SCREEN_HEIGHT
+
+    def get_width(self):
+        return SCREEN_WIDTH
+
+    def get_height(self):
+        return SCREEN_HEIGHT
+
+    def scale_rect(self, rect, shift=True):
+        """
+        Convert a rectangle or position from gameplay coordinates to framebuffer pixels.
+
+        Args:
+            rect (Rect | tuple): (x, y) position or (x, y, width, height) rectangle.
+            shift (bool): Whether to apply the vertical offset, False for areas within an image.
+
+        Returns:
+            tuple: The converted position or rectangle.
+        """
+        scale = self.scale
+        offset_y = self.offset_y if shift else 0
+        if len(rect) == 2:
+            return round(rect[0] * scale), round((rect[1] + offset_y) * scale)
+        x, y, width, height = rect
+        return (
+            round(x * scale), round((y + offset_y) * scale), max(1, round(width * scale)), max(1, round(height * scale))
+        )
+
+    def pixel_position(self, position):
+        """
+        Return the framebuffer pixel an image drawn at a gameplay position lands on.
+
+        Args:
+            position (tuple): (x, y) position in gameplay coordinates.
+
+        Returns:
+            tuple: (x, y) position in framebuffer pixels.
+        """
+        if self.scale == 1 and not self.offset_y:
+            return int(position[0]), int(position[1])
+        return self.scale_rect(position[:2])
+
+    def scaled_image(self, image):
+        """
+        Return an image resized to the framebuffer resolution, reusing the result while the image is alive.
+
+        Args:
+            image (Surface): Image in gameplay pixels.
+
+        Returns:
+            Surface: The resized image.
+        """
+        if self.scale == 1:
+            return image
+        scaled = self.scaled_images.get(image)
+        if scaled is None:
+            width, height = image.get_size()
+            size = (max(1, round(width * self.scale)), max(1, round(height * self.scale)))
+            scaled = pygame.transform.scale(image, size)
+            self.scaled_images[image] = scaled
+        return scaled
+
+    def blit(self, image, dest, area=None, special_flags=0):
+        """
+        Draw an image at a position in gameplay coordinates.
+
+        Args:
+            image (Surface): Image in gameplay pixels.
+            dest (Rect | tuple): Top-left position in gameplay coordinates.
+            area (Rect | tuple): Optional part of the image to draw, in gameplay pixels.
+            special_flags (int): Blend flags passed on to Surface.blit.
+
+        Returns:
+            Rect: The changed area of the framebuffer.
+        """
+        if area is not None:
+            area = self.scale_rect(area, shift=False)
+        return self.target.blit(self.scaled_image(image), self.scale_rect(dest[:2]), area, special_flags)
+
+    def blits(self, blit_sequence, doreturn=True):
+        """
+        Draw many images at positions in gameplay coordinates.
+
+        Args:
+            blit_sequence (Iterable[tuple]): (image, position) pairs.
+            doreturn (bool): Whether to return the changed areas.
+
+        Returns:
+            list[Rect]: The changed areas, or None if doreturn is False.
+        """
+        scale = self.scale
+        offset_y = self.offset_y
+        scaled_image = self.scaled_image
+        return self.target.blits(
+            ((scaled_image(image), (round(x * scale), round((y + offset_y) * scale))) for image, (x, y) in blit_sequence),
+            doreturn
+        )
+
+    def fblits(self, blit_sequence):
+        """
+        Draw many images at positions in gameplay coordinates, without returning the changed areas.
+
+        Args:
+            blit_sequence (Iterable[tuple]): (image, position) pairs.
+
+        Returns:
+            None
+        """
+        self.blits(blit_sequence, doreturn=False)
+
+    def fill(self, color, rect=None):
+        """
+        Fill the canvas, or a rectangle in gameplay coordinates, with a color.
+
+        Args:
+            color (tuple): RGB color.
+            rect (Rect | tuple): Optional rectangle to fill.
+
+        Returns:
+            Rect: The changed area of the framebuffer.
+        """
+        return self.target.fill(color, self.scale_rect(rect) if rect is not None else None)
+
+    def draw_rect(self, color, rect, width=0):
+        """
+        Draw a filled or outlined rectangle in gameplay coordinates.
+
+        Args:
+            color (tuple): RGB color.
+            rect (Rect | tuple): Rectangle in gameplay coordinates.
+            width (int): Outline width in gameplay pixels, or 0 to fill the rectangle.
+
+        Returns:
+            Rect: The changed area of the framebuffer.
+        """
+        if self.scale != 1 or self.offset_y:
+            rect = self.scale_rect(rect)
+            if width:
+                width = max(1, round(width * self.scale))
+        return pygame.draw.rect(self.target, color, rect, width)
+
+class Display:
+    def __init__(self, render_scale=1.0, window_size=None, fullscreen=False, vsync=False):
+        """
+        Open the game window and create the internal framebuffer.
+
+        Args:
+            render_scale (float): Internal resolution as a fraction of the gameplay resolution,
+                e.g. 0.5 for half size or 0.125 for the native 100x100 pixel-art resolution.
+            window_size (tuple): (width, height) of the window, defaults to the gameplay resolution.
+            fullscreen (bool): Whether to start in fullscreen mode.
+            vsync (bool): Whether to wait for the monitor's vertical blank when presenting a frame.
+
+        Returns:
+            None
+        """
+        self.render_scale = render_scale
+        self.render_size = (max(1, round(SCREEN_WIDTH * render_scale)), max(1, round(SCREEN_HEIGHT * render_scale)))
+        self.windowed_size = window_size or (SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.fullscreen = fullscreen
+        self.vsync = vsync
+        self.frame_done_time = 0
+        self.window = None
+        self.frame = None
+        self.present_rect = None
+        self.present_target = None
+        self.canvas = None
+        self.open_window()
+
+    def open_window(self):
+        """
+        Create the window in the current mode and the framebuffer that matches it.
+
+        Vsync needs SDL's renderer, which the SCALED flag provides. SDL then stretches the window
+        surface to the window itself, so in that mode the window surface keeps the windowed size.
+
+        Returns:
+            None
+        """
+        if self.vsync:
+            flags = (pygame.FULLSCREEN if self.fullscreen else pygame.RESIZABLE) | pygame.SCALED
+            try:
+                self.window = pygame.display.set_mode(self.windowed_size, flags, vsync=1)
+                self.layout()
+                return
+            except pygame.error as e:
+                print(f"Failed to enable vsync: {e}")
+                self.vsync = False
+        if self.fullscreen:
+            self.window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            self.window = pygame.display.set_mode(self.windowed_size, pygame.RESIZABLE)
+        self.layout()
+
+    def layout(self):
+        """
+        Fit the frame into the window, keeping its aspect ratio, and pick the framebuffer.
+
+        If the frame covers the window exactly at its own size, the window is the framebuffer
+        and presenting a frame needs no copy.
+
+        Returns:
+            None
+        """
+        window_width, window_height = self.window.get_size()
+        fit = min(window_width / SCREEN_WIDTH, window_height / SCREEN_HEIGHT)
+        width, height = max(1, round(SCREEN_WIDTH * fit)), max(1, round(SCREEN_HEIGHT * fit))
+        self.present_rect = pygame.Rect((window_width - width) // 2, (window_height - height) // 2, width, height)
+        self.present_target = self.window.subsurface(self.present_rect)
+        self.window.fill((0, 0, 0))
+
+        if self.present_rect.size == self.render_size:
+            self.frame = self.present_target if self.present_rect.topleft != (0, 0) else self.window
+        elif self.frame is None or self.frame.get_size() != self.render_size or self.frame.get_parent() is not None \
+                or self.frame is self.window:
+            self.frame = pygame.Surface(self.render_size).convert()
+
+        if self.canvas is None:
+            self.canvas = Canvas(self.frame, self.render_scale)
+        else:
+            self.canvas.set_target(self.frame)
+
+    @property
+    def scales_frame(self):
+        """
+        Whether presenting a frame scales the framebuffer to the window.
+
+        Returns:
+            bool: False if the game draws straight to the window.
+        """
+        return self.frame is not self.window and self.frame is not self.present_target
+
+    def handle_resize(self):
+        """
+        Adapt to a window that was resized by the user.
+
+        Returns:
+            None
+        """
+        window = pygame.display.get_surface()
+        if window is None:
+            return
+        if not self.fullscreen:
+            self.windowed_size = window.get_size()
+        self.window = window
+        self.layout()
+
+    def toggle_fullscreen(self):
+        """
+        Switch between fullscreen and windowed mode.
+
+        Returns:
+            None
+        """
+        self.fullscreen = not self.fullscreen
+        self.open_window()
+
+    def set_render_scale(self, render_scale):
+        """
+        Change the internal resolution.
+
+        Args:
+            render_scale (float): Internal resolution as a fraction of the gameplay resolution.
+
+        Returns:
+            None
+        """
+        if render_scale == self.render_scale:
+            return
+        self.render_scale = render_scale
+        self.render_size = (max(1, round(SCREEN_WIDTH * render_scale)), max(1, round(SCREEN_HEIGHT * render_scale)))
+        self.canvas.set_scale(render_scale)
+        self.layout()
+
+    def present(self):
+        """
+        Scale the finished frame to the window and show it.
+
+        frame_done_time records when the frame was ready, before any wait for the vertical blank.
+
+        Returns:
+            None
+        """
+        if self.scales_frame:
+            pygame.transform.scale(self.frame, self.present_rect.size, self.present_target)
+        self.frame_done_time = time.perf_counter()
+        pygame.display.flip()
@@ -0,0 +1,154 @@
+from collections import deque
+"""
+frame_pacing.py
+
+This module implements the adaptive quality governor of the King's Trial game.
+Physics advances one step per frame, so a frame that takes longer than its budget slows the
+whole game down. The governor measures how long each gameplay frame takes to update and
+render, and trades cosmetic work for time when frames overrun the budget.
+
+Features:
+- Rolling frame time statistics against the 1 / FPS budget.
+- Quality steps that turn off snow, coin sparkle and race ghosts first, then lower the internal resolution.
+- Hysteresis, so a single slow frame does not change the quality and it does not flip back and forth.
+- Every quality change is logged with the frame times that caused it.
+"""
+# (name, snow, coin sparkle, ghosts, render scale relative to the chosen one), from best to cheapest
+QUALITY_STEPS = [
+    ("full", True, True, True, 1.0),
+    ("no snow", False, True, True, 1.0),
+    ("no coin sparkle", False, False, True, 1.0),
+    ("no ghosts", False, False, False, 1.0),
+    ("half resolution", False, False, False, 0.5),
+    ("quarter resolution", False, False, False, 0.25),
+]
+
+class QualityGovernor:
+    def __init__(self, fps, steps=QUALITY_STEPS, window=30, overrun_limit=5, headroom=0.6, recovery_frames=180):
+        """
+        Initialize the governor at full quality.
+
+        Args:
+            fps (int): Target frame rate; the frame budget is 1 / fps seconds.
+            steps (list[tuple]): (name, snow, coin sparkle, ghosts, render scale) per quality step, best first.
+            window (int): Number of recent frames the overrun check looks at.
+            overrun_limit (int): Overrunning frames within the window that lower the quality.
+            headroom (float): Fraction of the budget the frames must stay under to raise the quality.
+            recovery_frames (int): Frames with headroom needed before the quality is raised again.
+
+        Returns:
+            None
+        """
+        self.budget = 1 / fps
+        self.steps = steps
+        self.level = 0
+        self.overrun_limit = overrun_limit
+        self.headroom = headroom
+        self.recovery_frames = recovery_frames
+        self.recovery_needed = recovery_frames
+        self.frame_times = deque(maxlen=window)
+        self.overruns = 0
+        self.calm_frames = 0
+        self.frames_since_raise = None
+        self.changes = []
+
+    @property
+    def snow(self):
+        """
+        Whether the current quality step draws the snow weather.
+
+        Returns:
+            bool: True if snow is drawn.
+        """
+        return self.steps[self.level][1]
+
+    @property
+    def coin_sparkle(self):
+        """
+        Whether the current quality step animates the coin sparkle.
+
+        Returns:
+            bool: True if coins sparkle.
+        """
+        return self.steps[self.level][2]
+
+    @property
+    def ghosts(self):
+        """
+        Whether the current quality step draws the race ghosts.
+
+        Returns:
+            bool: True if ghosts are drawn.
+        """
+        return self.steps[self.level][3]
+
+    @property
+    def render_scale(self):
+        """
+        Internal resolution of the current quality step, relative to the chosen one.
+
+        Returns:
+            float: Scale factor, 1.0 at full resolution.
+        """
+        return self.steps[self.level][4]
+
+    def end_frame(self, frame_time):
+        """
+        Record how long a gameplay frame took and decide whether the quality has to change.
+
+        Args:
+            frame_time (float): Seconds spent updating and rendering the frame, without waiting for the next one.
+
+        Returns:
+            bool: True if the quality changed and has to be applied.
+        """
+        if len(self.frame_times) == self.frame_times.maxlen and self.frame_times[0] > self.budget:
+            self.overruns -= 1
+        self.frame_times.append(frame_time)
+        if frame_time > self.budget:
+            self.overruns += 1
+        if self.frames_since_raise is not None:
+            self.frames_since_raise += 1
+
+        if self.overruns >= self.overrun_limit and self.level < len(self.steps) - 1:
+            # A raise that overran right away is retried only after a longer calm period.
+            if self.frames_since_raise is not None and self.frames_since_raise <= self.recovery_frames:
+                self.recovery_needed = min(self.recovery_needed * 2, self.recovery_frames * 16)
+            self.frames_since_raise = None
+            self.change(self.level + 1)
+            return True
+
+        if frame_time < self.budget * self.headroom:
+            self.calm_frames += 1
+        else:
+            self.calm_frames = 0
+        if self.calm_frames >= self.recovery_needed and self.level > 0:
+            self.change(self.level - 1)
+            self.frames_since_raise = 0
+            return True
+        return False
+
+    def change(self, level):
+        """
+        Switch to another quality step, log the change and start measuring afresh.
+
+        Args:
+            level (int): Index of the new quality step.
+
+        Returns:
+            None
+        """
+        average = sum(self.frame_times) / len(self.frame_times) * 1000 if self.frame_times else 0
+        direction = "lowered" if level > self.level else "raised"
+        message = (
+            f"Quality {direction} to {self.steps[level][0]}: {self.overruns}/{len(self.frame_times)} frames over "
+            f"budget, {average:.1f} ms average, {self.budget * 1000:.1f} ms budget"
+        )
+        print(message)
+        self.changes.append(message)
+        self.level = level
+        self.frame_times.clear()
+        self.overruns = 0
+        self.calm_frames = 0
+        if level == 0:
+            self.recovery_needed = self.recovery_frames
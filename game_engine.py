@@ -2,9 +2,34 @@ import pygame
 import time
 import os
 import sys
+from collections import deque
 from player import Player
 from constants import *
 from levels import *
+from loading import AssetLoader
+from audio import SoundBank
+from coins import CoinIndex
+from projectiles import ProjectileSystem, build_level_emitters
+from weather import SnowWeather
+from simulation import step_gameplay
+from run_history import RunHistory, RunTracker, history_path
+from telemetry import TelemetryRecorder
+from race import POSITION_SCALE
+from multi_king import LocalMultiplayer
+from practice import PracticeSession, HEALTH_OPTIONS, COIN_OPTIONS
+from display import Display
+from ui import UIScreen, Label, Image
+from layers import STORAGE_FULL
+from memory import memory_report, print_memory_report
+from frame_pacing import QualityGovernor
+from world import TowerWorld
+from controls import InputTracker, InputSnapshot
+from game_clock import GameClock
+from capture import FrameCapture, CAPTURE_PNG
+from replay import (
+    ReplayRecorder, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, INPUT_JUMP_PRESSED, INPUT_JUMP_RELEASED,
+    INPUT_RELEASE_FIRST, INPUT_DEVELOPER, INPUT_PAUSED,
+)
 import json
 """
 game_engine.py
@@ -16,48 +41,96 @@ Features:
 - Dynamic game state management (menu, gameplay, pause, ending).
 - Timer-based gameplay with tracking of jumps, falls, and coins collected.
 - Level rendering, including animations for snow, coins, and the flag.
-- Menu navigation with options to continue, start a new game, or select skins.
+- Menu navigation with options to continue, start a new game, practice, or select skins.
+- Practice sessions on any level that leave the real game state untouched.
+- Rendering at a configurable internal resolution, scaled to a resizable or fullscreen window.
+- Adaptive quality that drops cosmetic effects and resolution when frames overrun their budget.
+- Low-power idling: static screens sleep on the event queue and a resting player is not re-simulated or redrawn.
+- An optional continuous tower with a scrolling camera and levels streamed in and out around it.
+- Input read from one timestamped snapshot per tick, with jumps charged from the key press and release times.
 - Saving and loading game progress and player statistics.
+- Replay recording of every run, for verification of best times.
+- Run history with per-level splits and personal bests.
+- Telemetry of jumps, landings, falls, deaths and level changes, for offline heatmaps.
+- A networked race mode that shows the other players as ghosts.
+- A local mode for two to four kings on one keyboard, on a shared or split screen.
+- Level layers stored palettized or compressed when memory is tight, with a memory report in developer mode.
+- Menus, overlays and the HUD built once as widget trees, redrawing only the widgets that changed.
+- One game clock for every timer, with pause, slow motion and a turbo mode that runs several ticks per frame.
+- Gameplay video capture (F9) to PNG sequences or raw video, encoded on background threads.
 """
+MENU_FRAME_RECT = pygame.Rect(20, 450, 260, 300)
+SKINS_FRAME_RECT = pygame.Rect(400, 450, 300, 200)
+PAUSE_FRAME_RECT = pygame.Rect(SCREEN_WIDTH - 280, 20, 260, 240)
+INFO_FRAME_RECT = pygame.Rect(20, 20, 306, 167)
+OPTION_COLOR = (200, 200, 200)
+
 class Game:
-    def __init__(self):
+    def __init__(self, render_scale=1.0, window_size=None, fullscreen=False, vsync=False, adaptive_quality=True,
+                 continuous=False, race=None, kings=1, level_storage=STORAGE_FULL, time_scale=1.0, capture=None,
+                 level_pack=LEVEL_PACK_PATH):
         """
         Initialize the Game class with all necessary variables, assets, and configurations.
 
         Args:
-            None
+            render_scale (float): Internal resolution as a fraction of SCREEN_WIDTH x SCREEN_HEIGHT.
+            window_size (tuple): (width, height) of the window, defaults to the gameplay resolution.
+            fullscreen (bool): Whether to start in fullscreen mode.
+            vsync (bool): Whether to synchronize frames with the monitor refresh.
+            adaptive_quality (bool): Whether to lower the visual quality when frames overrun their budget.
+            continuous (bool): Whether to show the tower as one continuous world with a scrolling camera.
+            race (RaceClient): Client of a race to join, started by the game, or None to play alone.
+            kings (int): Number of local players; two to four start the local multi-king mode.
+            level_storage (str): How level backgrounds and overlays are kept in memory, one of layers.STORAGE_MODES.
+            time_scale (float): Game seconds per real second, below 1 for slow motion and above for turbo.
+            capture (str): Format to capture video in from the start, one of capture.CAPTURE_FORMATS, or None.
+            level_pack (str): Path of the level pack manifest to play, e.g. a tower made by tower_generator.py.
 
         Returns:
             None
         """
         pygame.display.set_caption("King's Trial")
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        self.clock = pygame.time.Clock()
+        self.display = Display(render_scale, window_size, fullscreen, vsync)
+        self.screen = self.display.canvas
+        self.render_scale = render_scale
+        self.governor = QualityGovernor(FPS) if adaptive_quality else None
+        self.snow_enabled = True
+        self.coin_sparkle_enabled = True
+        self.ghosts_enabled = True
+        self.drawn_screen = None
+        self.recent_states = deque(maxlen=3)
+        self.idle_cycle = None
+        self.drawn_picture = None
+        self.frame_skipped = False
+        self.frame_clock = pygame.time.Clock()
+        self.game_clock = GameClock()
+        self.game_clock.set_scale(time_scale)
+        self.input = InputTracker(self.game_clock)
+        self.input_state = InputSnapshot(0, pygame.key.get_pressed(), [])
         self.running = True
+        self.tick_time = self.game_clock.now
         self.state = "menu"
         self.current_level = 0
         self.developer_mode = False
-        self.snow_rects_level_13 = extract_platforms("assets/other/mapa13snieg.png")
-        self.snow_rects_level_14 = extract_platforms("assets/other/mapa14snieg.png")
-        self.trampoline_rects_level_12 = extract_platforms("assets/other/mapa12trampolina.png")
-        self.bullets = []
-        self.bullet_timer = 0
-        self.bullet_spawn_interval = 2000
-        self.snow_frame_index = 0
-        self.snow_animation_timer = 0
+        set_level_storage(level_storage)
+        self.level_pack = level_pack
+        load_level_pack(level_pack)
+        self.world = TowerWorld(len(LEVEL_DATA)) if continuous else None
+        self.emitters = build_level_emitters(LEVEL_DATA)
+        self.projectiles = ProjectileSystem(self.emitters)
+        self.snow = SnowWeather()
         self.start_time = 0
         self.is_paused = False
         self.pause_selected_option = 0
-        self.paused_time_start = 0
         self.pause_options = ["RESUME", "SAVE & EXIT", "GIVE UP"]
-        self.main_menu_options = ["CONTINUE", "SKINS", "QUIT"]
+        self.main_menu_options = ["CONTINUE", "PRACTICE", "SKINS", "QUIT"]
         self.main_menu_selected_option = 0
         self.has_save_game = os.path.exists("savegame.json")
         self.is_skin_unlocked = False
         self.in_skin_selection = False
         self.main_menu_selected_option = 0
         self.selected_skin = 0
-        self.flag_position = (700, 130)
+        self.flag_position = next((data.flag_position for data in LEVEL_DATA if data.flag_position), None)
         self.flag_raised = False
         self.flag_moving = False
         self.flag_raised_time = None
@@ -65,65 +138,382 @@ class Game:
         self.final_time = None
         self.show_ending_stats = False
         self.best_time = None
-        self.flag_image = pygame.transform.scale(pygame.image.load("assets/other/flag.png").convert_alpha(), (85, 50))
-        pygame.mixer.init()
-        self.sounds = {
-            "bump": pygame.mixer.Sound("assets/sounds/bump_sound.wav"),
-            "jump": pygame.mixer.Sound("assets/sounds/jump_sound.wav"),
-            "land": pygame.mixer.Sound("assets/sounds/land_sound.wav"),
-            "splat": pygame.mixer.Sound("assets/sounds/splat_sound.wav"),
-            "select": pygame.mixer.Sound("assets/sounds/select_sound.wav"),
-        }
-        self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 60, self.sounds)
-        pygame.mixer.music.load("assets/sounds/menu_intro.wav")
-        pygame.mixer.music.play(-1)
-        for sound in self.sounds.values():
-            sound.set_volume(0.07)
-
-        pygame.mixer.music.set_volume(0.07)
+        self.best_replay = None
+        self.progress = {}
+        self.flag_image = None
+        self.sounds = SoundBank()
         self.available_skins = [
             "assets/player_walk/Right1.png",
             "assets/player_walk/King_right1.png",
         ]
+        self.cursor_image = None
+        self.coin_frames = []
+        self.coins = CoinIndex([(level, pos) for level, data in enumerate(LEVEL_DATA) for pos in data.coins])
+        self.coin_animation_speed = 0.1
+        self.total_coins_collected = 0
+        self.coin_collect_frames = []
 
-        self.animated_snow = [
-            pygame.transform.scale(pygame.image.load(
-                os.path.join("assets/snowAni", f"snowAnimation{i}.png")
-            ).convert_alpha(), (SCREEN_WIDTH, SCREEN_HEIGHT))
-            for i in range(1, 9)
-        ]
+        self.font_path = "assets/fonts/ttf_alkhemikal.ttf"
+        self.font_size = 60
+        self.fonts = {}
+        self.menu_ui = None
+        self.pause_ui = None
+        self.death_ui = None
+        self.ending_ui = None
+        self.hud_ui = None
+        self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 60, self.sounds)
+        self.player.time_source = self.get_tick_time
+        self.fresh_player_state = self.player.get_state()
+        self.practice = None
+        self.practice_options = ["LEVEL", "HEALTH", "COINS", "START"]
+        self.practice_selected_option = 0
+        self.practice_level = 0
+        self.practice_health = 0
+        self.practice_coins = 0
+        self.practice_previews = {}
+        self.replay = None
+        self.replay_inputs = 0
+        self.save_replay_path = None
+        self.history = RunHistory(history_path(level_pack))
+        self.run_tracker = RunTracker()
+        self.telemetry = TelemetryRecorder.new_session()
+        self.capture_format = capture or CAPTURE_PNG
+        self.capture = None
+        if capture:
+            self.toggle_capture()
+        self.race = race.start() if race else None
+        self.kings = kings
+        self.multi = None
+        self.ghost_frames = None
+        self.loader = AssetLoader()
+        self.load_assets()
+        self.load_progress()
+
+    def load_assets(self):
+        """
+        Register all asset loading stages and load the ones required before the first interactive frame.
+
+        The menu and the first level are loaded behind a loading screen. The remaining levels are
+        loaded incrementally while the main menu is shown, or on demand when the player reaches them.
+        In the continuous tower, levels are streamed in and out by the world instead.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.loader.add_stage("interface", self.load_interface_assets, required=True)
+        self.loader.add_stage("coins", self.load_coin_assets, required=True)
+        self.loader.add_stage("music", self.load_music)
+        if self.world:
+            self.loader.add_stage("level 1", lambda: self.ensure_level_loaded(0), required=True)
+        else:
+            for level in range(len(LEVEL_DATA)):
+                self.loader.add_stage(
+                    f"level {level + 1}", lambda level=level: self.load_level_assets(level), required=level == 0
+                )
+        self.loader.run_required(self.draw_loading_screen)
+        self.sounds.preload()
+
+    def load_interface_assets(self):
+        """
+        Load the assets needed by the menus and build the menu, overlay and HUD screens.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
         self.cursor_image = pygame.transform.scale(
             pygame.image.load("assets/gui/cursor.png").convert_alpha(), (30, 30)
         )
+        self.build_interface()
+
+    def build_interface(self):
+        """
+        Build the widget trees of the main menu, the skin selection, the pause, death and ending screens and the HUD.
+
+        Images are loaded and static text is rendered here, once; the draw methods only update the
+        text, selection and visibility of the widgets, and each screen redraws just what changed.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        font = self.get_font(30)
+        small_font = self.get_font(20)
+        menu_frame = pygame.image.load("assets/gui/frame_main_menu.png").convert_alpha()
+
+        self.menu_ui = UIScreen(fill=BLACK)
+        logo = pygame.image.load("assets/gui/logo.png").convert_alpha()
+        self.menu_ui.add(Image(logo, (SCREEN_WIDTH // 2, 100), "midtop"))
+        self.menu_ui.add(Image(menu_frame, MENU_FRAME_RECT.topleft))
+        self.skins_frame_ui = self.menu_ui.add(Image(
+            pygame.transform.scale(menu_frame, SKINS_FRAME_RECT.size), SKINS_FRAME_RECT.topleft
+        ))
+        self.sum_of_best_ui = self.menu_ui.add(
+            Label(small_font, "", OPTION_COLOR, (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 55), "midtop")
+        )
+        self.best_time_ui = self.menu_ui.add(
+            Label(small_font, "", WHITE, (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 30), "midtop")
+        )
+        self.menu_options_ui = [
+            self.menu_ui.add(Label(font, option, OPTION_COLOR, live=True)) for option in self.main_menu_options
+        ]
+        self.menu_cursor_ui = self.menu_ui.add(Image(self.cursor_image, live=True))
+        self.skin_images = []
+        for i, path in enumerate(self.available_skins):
+            skin_image = pygame.transform.scale(pygame.image.load(path).convert_alpha(), (100, 100))
+            locked_image = skin_image.copy()
+            gray_skin = pygame.Surface(skin_image.get_size(), flags=pygame.SRCALPHA)
+            gray_skin.fill((0, 0, 0, 150))
+            locked_image.blit(gray_skin, (0, 0))
+            self.skin_images.append((skin_image, locked_image))
+        self.skins_ui = [self.menu_ui.add(Image(images[0], live=True)) for images in self.skin_images]
+        lock_icon = pygame.transform.scale(pygame.image.load("assets/gui/locked.png").convert_alpha(), (120, 120))
+        self.skin_lock_ui = self.menu_ui.add(Image(lock_icon, anchor="center", live=True))
+        self.skin_cursor_ui = self.menu_ui.add(Image(pygame.transform.rotate(self.cursor_image, 90), live=True))
+
+        self.pause_ui = UIScreen()
+        pause_frame = pygame.image.load("assets/gui/frame_main.png").convert_alpha()
+        info_frame = pygame.image.load("assets/gui/frame_info.png").convert_alpha()
+        self.pause_ui.add(Image(pause_frame, PAUSE_FRAME_RECT.topleft))
+        self.pause_ui.add(Image(info_frame, INFO_FRAME_RECT.topleft))
+        self.pause_info_ui = [
+            self.pause_ui.add(Label(font, "", WHITE, (INFO_FRAME_RECT.x + 60, INFO_FRAME_RECT.y + 30 + i * 40)))
+            for i in range(3)
+        ]
+        self.pause_options_ui = [self.pause_ui.add(Label(font, "", OPTION_COLOR, live=True)) for _ in range(3)]
+        self.pause_cursor_ui = self.pause_ui.add(Image(self.cursor_image, live=True))
+
+        self.death_ui = UIScreen()
+        self.death_ui.add(Label(
+            self.get_font(150), "YOU DIED", WHITE, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 100), "midtop"
+        ))
+        self.death_ui.add(Label(
+            font, "Press SPACE to start over", WHITE, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 100), "midtop"
+        ))
+
+        self.ending_ui = UIScreen(fill=BLACK)
+        self.ending_ui.add(Label(self.get_font(50), "Congratulations!", WHITE, (SCREEN_WIDTH // 2, 150), "midtop"))
+        self.ending_stats_ui = [
+            self.ending_ui.add(Label(font, "", WHITE, (SCREEN_WIDTH // 2, 250 + i * 50), "midtop")) for i in range(3)
+        ]
+        self.ending_ui.add(Label(
+            font, "Press SPACE to return to Main Menu", WHITE, (SCREEN_WIDTH // 2, 500), "midtop"
+        ))
 
+        self.hud_ui = UIScreen()
+        self.practice_banner_ui = self.hud_ui.add(Label(
+            small_font, "PRACTICE   R: reset   C: checkpoint", WHITE, (SCREEN_WIDTH // 2, 20), "midtop"
+        ))
+        self.timer_ui = self.hud_ui.add(Label(font, "", WHITE, (20, 20), live=True))
+
+    def load_music(self):
+        """
+        Start streaming the menu music. Loaded after the first interactive frame.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if not self.sounds.enabled:
+            return
+        try:
+            pygame.mixer.music.load("assets/sounds/menu_intro.wav")
+        except pygame.error as e:
+            print(f"Failed to load music: {e}")
+            return
+        pygame.mixer.music.play(-1)
+        pygame.mixer.music.set_volume(0.07)
+
+    def load_coin_assets(self):
+        """
+        Load the coin animation and coin collection effect frames.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
         self.coin_frames = [
             pygame.transform.scale(pygame.image.load(os.path.join("assets/coin", f"coin{i}.png")).convert_alpha(), (50, 50))
             for i in range(1, 7)
         ]
-        self.coins = [
-            {"pos": (506, 175), "level": 0, "collected": False, "frame_index": 0, "fx_frame_index": 0, "show_fx": False},
-            {"pos": (753, 60), "level": 3, "collected": False, "frame_index": 0, "fx_frame_index": 0, "show_fx": False},
-            {"pos": (560, 338), "level": 5, "collected": False, "frame_index": 0, "fx_frame_index": 0, "show_fx": False},
-            {"pos": (215, 649), "level": 8, "collected": False, "frame_index": 0, "fx_frame_index": 0, "show_fx": False},
-            {"pos": (309, 558), "level": 12, "collected": False, "frame_index": 0, "fx_frame_index": 0, "show_fx": False},
-            {"pos": (755, 474), "level": 14, "collected": False, "frame_index": 0, "fx_frame_index": 0, "show_fx": False},
-            {"pos": (0, 355), "level": 18, "collected": False, "frame_index": 0, "fx_frame_index": 0, "show_fx": False},
-            {"pos": (592, 521), "level": 20, "collected": False, "frame_index": 0, "fx_frame_index": 0, "show_fx": False}
-        ]
-        self.coin_animation_speed = 0.1
-        self.total_coins_collected = 0
         self.coin_collect_frames = [
             pygame.transform.scale(pygame.image.load(os.path.join("assets/coin_collect", f"SP103_0{i}.png")).convert_alpha(), (64, 64))
             for i in range(1, 5)
         ]
 
-        self.font_path = "assets/fonts/ttf_alkhemikal.ttf"
-        self.font_size = 60
-        self.load_progress()
+    def load_level_assets(self, level):
+        """
+        Load a level together with the shared assets its metadata asks for, one step at a time.
+
+        Args:
+            level (int): Zero-based level index.
+
+        Yields:
+            None: After every step of loading the level, see load_level_steps.
+        """
+        yield from load_level_steps(level)
+        self.load_flag_image(level)
+
+    def load_flag_image(self, level):
+        """
+        Load the flag image the first time a level with a flag pole is loaded.
+
+        Args:
+            level (int): Zero-based level index.
+
+        Returns:
+            None
+        """
+        if LEVEL_DATA[level].flag_pole and self.flag_image is None:
+            self.flag_image = pygame.transform.scale(pygame.image.load("assets/other/flag.png").convert_alpha(), (85, 50))
+
+    def ensure_level_loaded(self, level):
+        """
+        Make sure a level is resident, loading it synchronously if the background loader has not reached it yet.
+
+        Args:
+            level (int): Zero-based level index.
+
+        Returns:
+            None
+        """
+        if self.world:
+            self.world.ensure(level)
+            self.load_flag_image(level)
+        else:
+            self.loader.load(f"level {level + 1}")
+
+    def draw_loading_screen(self, stage_name, progress):
+        """
+        Draw the loading screen with a progress bar and present it immediately.
+
+        Args:
+            stage_name (str): Name of the stage that is about to be loaded.
+            progress (float): Fraction of all stages already loaded.
+
+        Returns:
+            None
+        """
+        pygame.event.pump()
+        self.screen.fill(BLACK)
+        font = self.get_font(30)
+        text = font.render(f"Loading {stage_name}..." if stage_name else "Ready", True, WHITE)
+        self.screen.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, SCREEN_HEIGHT // 2 - 60))
+
+        bar_width = 400
+        bar_height = 20
+        bar_x = SCREEN_WIDTH // 2 - bar_width // 2
+        bar_y = SCREEN_HEIGHT // 2
+        self.screen.draw_rect((50, 50, 50), (bar_x, bar_y, bar_width, bar_height))
+        self.screen.draw_rect(WHITE, (bar_x, bar_y, int(bar_width * progress), bar_height))
+        self.screen.draw_rect(WHITE, (bar_x, bar_y, bar_width, bar_height), 2)
+        self.display.present()
+
+    def get_tick_time(self):
+        """
+        Return the timestamp of the current tick. Gameplay reads time only through this,
+        so a replay can reproduce every tick exactly.
+
+        Args:
+            None
+
+        Returns:
+            float: Game time in seconds, taken from the game clock once per tick.
+        """
+        return self.tick_time
+
+    def get_elapsed_time(self):
+        """
+        Return the run time so far. The game clock stands still during pauses, so they are not counted.
+
+        Args:
+            None
+
+        Returns:
+            float: Elapsed seconds, or 0 if the timer has not started.
+        """
+        if self.start_time <= 0:
+            return 0
+        return self.tick_time - self.start_time
+
+    def record_run(self, outcome, final_time=None):
+        """
+        End the tracked run and queue it for the run history.
+
+        Args:
+            outcome (str): "finished", "died" or "gave_up".
+            final_time (float): Completion time of a finished run.
+
+        Returns:
+            None
+        """
+        elapsed = final_time if final_time is not None else self.get_elapsed_time()
+        replay_path = self.replay.path if self.replay else self.save_replay_path
+        self.history.record_run(self.run_tracker.finish(
+            outcome, self.player, elapsed, final_time, self.total_coins_collected, replay_path
+        ))
+
+    def record_replay_tick(self, keys):
+        """
+        Record the input of the current gameplay tick to the run's replay.
+
+        Args:
+            keys (Sequence[bool]): Keyboard state of the current frame.
+
+        Returns:
+            None
+        """
+        if self.replay is None:
+            return
+        inputs = self.replay_inputs
+        if keys[pygame.K_a]:
+            inputs |= INPUT_LEFT
+        if keys[pygame.K_d]:
+            inputs |= INPUT_RIGHT
+        if keys[pygame.K_SPACE]:
+            inputs |= INPUT_JUMP
+        # Runs played at another speed are marked like developer mode, so they cannot verify.
+        if self.developer_mode or self.game_clock.scale != 1:
+            inputs |= INPUT_DEVELOPER
+        if self.is_paused:
+            inputs |= INPUT_PAUSED
+        self.replay.record_tick(self.tick_time, inputs)
+        self.replay_inputs = 0
+
+    def finish_replay(self, outcome, **data):
+        """
+        Record the end of the run and close its replay.
+
+        Args:
+            outcome (str): How the run ended: "finished", "died" or "gave_up".
+            **data: Additional results to record, such as the final time.
+
+        Returns:
+            None
+        """
+        if self.replay is None:
+            return
+        try:
+            self.replay.record_meta("finish", time=self.tick_time, outcome=outcome, **data)
+            self.replay.close()
+        except OSError as e:
+            print(f"Failed to save replay: {e}")
+        self.replay = None
 
     def get_font(self, size):
         """
-        Load and return a specific font size for use in UI elements.
+        Load and return a specific font size for use in UI elements. Every size is loaded once.
 
         Args:
             size (int): The font size to be loaded.
@@ -131,7 +521,10 @@ class Game:
         Returns:
             Font: Pygame font object for the given size.
         """
-        return pygame.font.Font(self.font_path, size)
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(self.font_path, size)
+        return font
 
     def animate_coin_collect_fx(self):
         """
@@ -143,16 +536,7 @@ class Game:
         Returns:
             None
         """
-        for coin in self.coins:
-            if coin["show_fx"]:
-                if coin["fx_frame_index"] < len(self.coin_collect_frames):
-                    fx_frame = self.coin_collect_frames[int(coin["fx_frame_index"])]
-                    fx_x = coin["pos"][0] - (64 - 50) // 2
-                    fx_y = coin["pos"][1] - (64 - 50) // 2
-                    self.screen.blit(fx_frame, (fx_x, fx_y))
-                    coin["fx_frame_index"] += 0.3
-                else:
-                    coin["show_fx"] = False
+        self.coins.draw_fx(self.screen, self.coin_collect_frames)
 
     def check_coin_collection(self):
         """
@@ -167,19 +551,16 @@ class Game:
         if self.is_skin_unlocked:
             return
 
-        for coin in self.coins:
-            if not coin["collected"] and coin["level"] == self.current_level:
-                coin_rect = pygame.Rect(coin["pos"][0], coin["pos"][1], 32, 32)
-                player_rect = pygame.Rect(self.player.x, self.player.y, self.player.width, self.player.height)
-                if player_rect.colliderect(coin_rect):
-                    coin["collected"] = True
-                    coin["show_fx"] = True
-                    self.total_coins_collected += 1
+        player_rect = pygame.Rect(self.player.x, self.player.y, self.player.width, self.player.height)
+        collected = self.coins.collect(self.current_level, player_rect)
+        if collected and not self.practice:
+            self.total_coins_collected += collected
+            self.run_tracker.collect_coins(collected)
 
-                    if self.total_coins_collected == len(self.coins):
-                        print("All coins collected")
-                        self.is_skin_unlocked = True
-                        self.save_progress()
+            if self.total_coins_collected == len(self.coins):
+                print("All coins collected")
+                self.is_skin_unlocked = True
+                self.save_progress()
 
     def animate_snow(self):
         """
@@ -191,27 +572,29 @@ class Game:
         Returns:
             None
         """
-        current_time = pygame.time.get_ticks()
-        if current_time - self.snow_animation_timer > 300:
-            self.snow_animation_timer = current_time
-            self.snow_frame_index = (self.snow_frame_index + 1) % len(self.animated_snow)
-
-        snow_image = self.animated_snow[self.snow_frame_index]
-        self.screen.blit(snow_image, (0, 0))
+        self.snow.update()
+        self.snow.draw(self.screen)
 
     def trigger_death(self):
         """
         Handle player death by resetting relevant game states and deleting the save file.
 
+        In a practice session the player is put back on the spawn point at the end of the tick instead.
+
         Args:
             None
 
         Returns:
             None
         """
+        if self.practice:
+            self.practice.pending_reset = True
+            return
         self.state = "death"
         self.player.current_health = 0
+        self.record_run("died")
         self.start_time = 0
+        self.finish_replay("died")
 
         save_path = "savegame.json"
         if os.path.exists(save_path):
@@ -235,7 +618,7 @@ class Game:
         charge_ratio = 0
 
         if self.player.holding_jump:
-            held_time = min(max_charge_time, time.time() - self.player.jump_start_time)
+            held_time = min(max_charge_time, self.tick_time - self.player.jump_start_time)
             charge_ratio = held_time / max_charge_time
 
         bar_x = SCREEN_WIDTH - bar_width - padding
@@ -244,9 +627,9 @@ class Game:
 
         bar_color = (0, 255, 0) if charge_ratio < 0.5 else (255, 255, 0)
 
-        pygame.draw.rect(self.screen, (50, 50, 50), (bar_x, bar_y, bar_width, bar_height))
-        pygame.draw.rect(self.screen, bar_color, (bar_x, bar_y, fill_width, bar_height))
-        pygame.draw.rect(self.screen, WHITE, (bar_x, bar_y, bar_width, bar_height), 2)
+        self.screen.draw_rect((50, 50, 50), (bar_x, bar_y, bar_width, bar_height))
+        self.screen.draw_rect(bar_color, (bar_x, bar_y, fill_width, bar_height))
+        self.screen.draw_rect(WHITE, (bar_x, bar_y, bar_width, bar_height), 2)
 
     def start_game(self):
         """
@@ -273,8 +656,7 @@ class Game:
         self.player.x, self.player.y = SCREEN_WIDTH // 2, SCREEN_HEIGHT - 60
         self.player.current_health = 100
         self.current_level = 0
-        self.start_time = time.time()
-        self.paused_time_start = 0
+        self.start_time = self.tick_time
         self.total_coins_collected = 0
         self.player.jump_count = 0
         self.player.fall_counter = 0
@@ -283,12 +665,24 @@ class Game:
         self.timer_stopped = False
         #self.flag_raised_time = None
         self.final_time = None
-        for coin in self.coins:
-            coin["collected"] = False
-            coin["show_fx"] = False
-            coin["fx_frame_index"] = 0
+        self.flag_position = next((data.flag_position for data in LEVEL_DATA if data.flag_position), None)
+        self.coins.reset()
         self.state = "gameplay"
 
+        self.finish_replay("abandoned")
+        try:
+            self.replay = ReplayRecorder.new_run()
+            self.replay.record_meta(
+                "start", time=self.tick_time, level=self.current_level, start_time=self.start_time,
+                player=self.player.get_state(), pack=self.level_pack
+            )
+        except OSError as e:
+            print(f"Failed to start replay: {e}")
+            self.replay = None
+        self.replay_inputs = 0
+        self.run_tracker.start(self.current_level, self.player)
+        self.telemetry.start(self.current_level, self.player)
+
     def show_menu(self):
         """
         Render the main menu screen with all menu options and visual elements.
@@ -315,37 +709,104 @@ class Game:
         Returns:
             None
         """
-        self.screen.blit(LEVEL_BACKGROUNDS[self.current_level], (0, 0))
-        if self.current_level == 8:
-            for bullet in self.bullets:
-                pygame.draw.rect(self.screen, (255, 0, 0), bullet)
-
-        if self.current_level == 12:
-            self.player.draw(self.screen)
-            self.animate_snow()
-            self.screen.blit(pygame.transform.scale(pygame.image.load("assets/background/mapa13samsnieg.png"), (SCREEN_WIDTH, SCREEN_HEIGHT)), (0, 0))
-        elif self.current_level == 13:
-            self.player.draw(self.screen)
+        if self.world:
+            self.draw_world()
+            return
+        self.screen.blit(level_background(self.current_level), (0, 0))
+        self.projectiles.draw(self.screen)
+        if self.race and self.ghosts_enabled:
+            self.draw_ghosts(self.current_level)
+
+        level = LEVEL_DATA[self.current_level]
+        self.player.draw(self.screen)
+        if level.weather == "snow" and self.snow_enabled:
             self.animate_snow()
-            self.screen.blit(pygame.transform.scale(pygame.image.load("assets/background/mapa14samsnieg.png"), (SCREEN_WIDTH, SCREEN_HEIGHT)), (0, 0))
-        else:
-            self.player.draw(self.screen)
+        if level.foreground:
+            self.screen.blit(level_foreground(self.current_level), level.foreground_pos)
 
         self.player.draw_health_bar(self.screen)
 
         if not self.is_skin_unlocked:
-            for coin in self.coins:
-                if not coin["collected"] and coin["level"] == self.current_level:
-                    frame_index = int(coin["frame_index"]) % len(self.coin_frames)
-                    coin_image = self.coin_frames[frame_index]
-                    self.screen.blit(coin_image, coin["pos"])
+            self.coins.draw(self.screen, self.current_level, self.coin_frames)
+            if self.coin_sparkle_enabled:
+                self.coins.advance(self.coin_animation_speed)
+                self.animate_coin_collect_fx()
+
+    def draw_world(self):
+        """
+        Render the continuous tower around the camera: every visible level, with the player on the current one.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        screen = self.screen
+        slices = self.world.visible_slices()
+        for level, offset in slices:
+            self.ensure_level_loaded(level)
+            screen.set_offset(offset)
+            screen.blit(level_background(level), (0, 0))
+        if self.race and self.ghosts_enabled:
+            for level, offset in slices:
+                screen.set_offset(offset)
+                self.draw_ghosts(level)
+
+        current_offset = self.world.slice_offset(self.current_level)
+        screen.set_offset(current_offset)
+        self.projectiles.draw(screen)
+        self.player.draw(screen)
+        screen.set_offset(0)
+        if LEVEL_DATA[self.current_level].weather == "snow" and self.snow_enabled:
+            self.animate_snow()
+        for level, offset in slices:
+            data = LEVEL_DATA[level]
+            if data.foreground:
+                screen.set_offset(offset)
+                screen.blit(level_foreground(level), data.foreground_pos)
+
+        screen.set_offset(current_offset)
+        self.player.draw_health_bar(screen)
+        if not self.is_skin_unlocked:
+            for level, offset in slices:
+                screen.set_offset(offset)
+                self.coins.draw(screen, level, self.coin_frames)
+            screen.set_offset(current_offset)
+            if self.coin_sparkle_enabled:
+                self.coins.advance(self.coin_animation_speed)
+                self.animate_coin_collect_fx()
+        screen.set_offset(0)
+
+    def draw_ghosts(self, level):
+        """
+        Draw the other players of the race that are on a level, as translucent kings.
 
-                    coin["frame_index"] += self.coin_animation_speed
-            self.animate_coin_collect_fx()
+        Args:
+            level (int): Zero-based level index.
 
-    def draw_timer(self):
+        Returns:
+            None
         """
-        Display an in-game timer, formatted to show hours, minutes, and seconds dynamically.
+        player = self.player
+        if self.ghost_frames is None or self.ghost_frames[0][0] is not player.walk_frames[0]:
+            frames = []
+            for image in (player.walk_frames[0], player.walk_frames[-1], player.jump_charge_frame, player.fall_frame):
+                ghost = image.copy()
+                ghost.set_alpha(GHOST_ALPHA)
+                frames.append((image, pygame.transform.flip(ghost, True, False), ghost))
+            self.ghost_frames = frames
+        for x, y, ghost_level, pose in self.race.ghosts.values():
+            if ghost_level == level:
+                # The pose's third bit is the facing: flipped ghost frames come first.
+                image = self.ghost_frames[pose & 3][1 + (pose >> 2 & 1)]
+                self.screen.blit(image, (x / POSITION_SCALE, y / POSITION_SCALE))
+
+    def draw_hud(self):
+        """
+        Display the in-game timer, formatted to show hours, minutes, and seconds, and the practice banner.
+
+        The timer is rendered again only when the displayed second changes.
 
         Args:
             None
@@ -353,24 +814,17 @@ class Game:
         Returns:
             None
         """
+        self.practice_banner_ui.show(self.practice is not None)
+        self.timer_ui.show(not self.timer_stopped)
         if self.timer_stopped:
-            elapsed_time = time.time() - self.start_time
+            self.hud_ui.draw(self.screen)
             return
-        if self.start_time > 0:
-            if not self.is_paused:
-                elapsed_time = time.time() - self.start_time
-            else:
-                elapsed_time = self.paused_time_start - self.start_time
-        else:
-            elapsed_time = 0
-
+        elapsed_time = self.get_elapsed_time()
         hours = int(elapsed_time // 3600)
         minutes = int((elapsed_time % 3600) // 60)
         seconds = int(elapsed_time % 60)
-        timer_text = f"{hours:02}:{minutes:02}:{seconds:02}"
-        font = self.get_font(30)
-        timer_surface = font.render(timer_text, True, WHITE)
-        self.screen.blit(timer_surface, (20, 20))
+        self.timer_ui.set_text(f"{hours:02}:{minutes:02}:{seconds:02}")
+        self.hud_ui.draw(self.screen)
 
     def draw_death_screen(self):
         """
@@ -382,14 +836,8 @@ class Game:
         Returns:
             None
         """
-        font = self.get_font(150)
-        font2 = self.get_font(30)
-        death_message = font.render("YOU DIED", True, WHITE)
-        restart_message = font2.render("Press SPACE to start over", True, WHITE)
-        self.screen.blit(death_message, (SCREEN_WIDTH // 2 - death_message.get_width() // 2, SCREEN_HEIGHT // 2 - 100))
-        self.screen.blit(restart_message, (SCREEN_WIDTH // 2 - restart_message.get_width() // 2, SCREEN_HEIGHT // 2 + 100))
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_SPACE]:
+        self.death_ui.draw(self.screen)
+        if self.input_state[pygame.K_SPACE]:
             self.start_new_game()
 
     def draw_main_menu(self):
@@ -402,36 +850,22 @@ class Game:
         Returns:
             None
         """
-        self.screen.fill(BLACK)
-        if self.in_skin_selection:
-            self.draw_skins_in_main_menu()
-        font = self.get_font(30)
-
-        logo = pygame.image.load("assets/gui/logo.png").convert_alpha()
-        self.screen.blit(logo, (SCREEN_WIDTH // 2 - logo.get_width() // 2, 100))
-
-        frame_rect = pygame.Rect(20, 450, 260, 300)
-        main_menu_frame = pygame.image.load("assets/gui/frame_main_menu.png").convert_alpha()
-        self.screen.blit(main_menu_frame, frame_rect.topleft)
-
-        for i, option in enumerate(self.main_menu_options):
+        self.draw_skins_in_main_menu()
+        for i, (label, option) in enumerate(zip(self.menu_options_ui, self.main_menu_options)):
             if option == "CONTINUE" and not self.has_save_game:
                 option = "NEW GAME"
 
-            color = WHITE if i == self.main_menu_selected_option else (200, 200, 200)
-            text_surface = font.render(option, True, color)
-            text_rect = text_surface.get_rect()
-            text_rect.topleft = (
-                frame_rect.left + 70 + (10 if self.main_menu_selected_option == i else 0),
-                frame_rect.top + 70 + i * (text_rect.height + 30)
-            )
-            self.screen.blit(text_surface, text_rect)
-
-            if i == self.main_menu_selected_option:
-                cursor_x = text_rect.left - 40
-                cursor_y = text_rect.centery - self.cursor_image.get_height() // 2
-                self.screen.blit(self.cursor_image, (cursor_x, cursor_y))
-        font2 = self.get_font(20)
+            selected = i == self.main_menu_selected_option
+            label.set_text(option, WHITE if selected else OPTION_COLOR)
+            label.place((
+                MENU_FRAME_RECT.left + 70 + (10 if selected else 0),
+                MENU_FRAME_RECT.top + 70 + i * (label.rect.height + 30)
+            ))
+
+            if selected:
+                self.menu_cursor_ui.place(
+                    (label.rect.left - 40, label.rect.centery - self.cursor_image.get_height() // 2)
+                )
         if self.best_time is not None:
             hours = int(self.best_time // 3600)
             minutes = int((self.best_time % 3600) // 60)
@@ -442,12 +876,19 @@ class Game:
                 best_time_text = f"Best Time: {minutes}m {seconds}s"
         else:
             best_time_text = "Best Time: N/A"
-        best_time_surface = font2.render(best_time_text, True, WHITE)
-        self.screen.blit(best_time_surface, (SCREEN_WIDTH // 2 - best_time_surface.get_width() // 2, SCREEN_HEIGHT - 30))
+        self.best_time_ui.set_text(best_time_text)
 
-    def draw_skins_in_main_menu(self):
+        sum_of_best = self.history.sum_of_best
+        self.sum_of_best_ui.show(sum_of_best is not None)
+        if sum_of_best is not None:
+            minutes = int(sum_of_best // 60)
+            seconds = sum_of_best % 60
+            self.sum_of_best_ui.set_text(f"Sum of Best: {minutes}m {seconds:.1f}s")
+        self.menu_ui.draw(self.screen)
+
+    def draw_practice_menu(self):
         """
-        Render the skin selection screen in the main menu, showing available and locked skins.
+        Render the practice menu with the level, health and coin choices and a preview of the level.
 
         Args:
             None
@@ -455,35 +896,170 @@ class Game:
         Returns:
             None
         """
-        frame_rect = pygame.Rect(400, 450, 300, 200)
-        main_menu_frame = pygame.transform.scale(
-            pygame.image.load("assets/gui/frame_main_menu.png").convert_alpha(),
-            (frame_rect.width, frame_rect.height)
+        self.screen.fill(BLACK)
+        font = self.get_font(50)
+        title = font.render("PRACTICE", True, WHITE)
+        self.screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 60))
+
+        level = self.practice_level
+        if level not in self.practice_previews:
+            self.ensure_level_loaded(level)
+            self.practice_previews[level] = pygame.transform.scale(level_background(level), (300, 300))
+        preview_rect = pygame.Rect(SCREEN_WIDTH - 360, 200, 300, 300)
+        self.screen.blit(self.practice_previews[level], preview_rect.topleft)
+        self.screen.draw_rect(WHITE, preview_rect, 2)
+
+        font = self.get_font(30)
+        values = {
+            "LEVEL": f"< {level + 1} >",
+            "HEALTH": f"< {HEALTH_OPTIONS[self.practice_health]} >",
+            "COINS": f"< {COIN_OPTIONS[self.practice_coins]} >",
+            "START": "",
+        }
+        for i, option in enumerate(self.practice_options):
+            color = WHITE if i == self.practice_selected_option else (200, 200, 200)
+            text_surface = font.render(f"{option}  {values[option]}", True, color)
+            text_rect = text_surface.get_rect()
+            text_rect.topleft = (
+                110 + (10 if i == self.practice_selected_option else 0),
+                230 + i * (text_rect.height + 30)
+            )
+            self.screen.blit(text_surface, text_rect)
+
+            if i == self.practice_selected_option:
+                cursor_x = text_rect.left - 40
+                cursor_y = text_rect.centery - self.cursor_image.get_height() // 2
+                self.screen.blit(self.cursor_image, (cursor_x, cursor_y))
+
+        font2 = self.get_font(20)
+        hint = font2.render("A/D: change   ENTER: start   ESC: back   In practice: R reset, C checkpoint", True, (200, 200, 200))
+        self.screen.blit(hint, (SCREEN_WIDTH // 2 - hint.get_width() // 2, SCREEN_HEIGHT - 60))
+
+    def handle_practice_menu_input(self, event):
+        """
+        Handle player input in the practice menu.
+
+        Args:
+            event (Event): The Pygame event object.
+
+        Returns:
+            None
+        """
+        if event.type != pygame.KEYDOWN:
+            return
+        option = self.practice_options[self.practice_selected_option]
+        if event.key == pygame.K_w:
+            self.practice_selected_option = (self.practice_selected_option - 1) % len(self.practice_options)
+        elif event.key == pygame.K_s:
+            self.practice_selected_option = (self.practice_selected_option + 1) % len(self.practice_options)
+        elif event.key in (pygame.K_a, pygame.K_d):
+            step = -1 if event.key == pygame.K_a else 1
+            if option == "LEVEL":
+                self.practice_level = (self.practice_level + step) % len(LEVEL_DATA)
+                # Load the level now, so warping to it never waits for the disk.
+                self.ensure_level_loaded(self.practice_level)
+            elif option == "HEALTH":
+                self.practice_health = (self.practice_health + step) % len(HEALTH_OPTIONS)
+            elif option == "COINS":
+                self.practice_coins = (self.practice_coins + step) % len(COIN_OPTIONS)
+        elif event.key == pygame.K_RETURN:
+            self.sounds.play("select")
+            self.start_practice()
+        elif event.key == pygame.K_ESCAPE:
+            self.sounds.play("select")
+            self.state = "menu"
+
+    def start_practice(self):
+        """
+        Warp to the level chosen in the practice menu, keeping the real game state aside.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.ensure_level_loaded(self.practice_level)
+        self.practice = PracticeSession(
+            self, self.practice_level, HEALTH_OPTIONS[self.practice_health], COIN_OPTIONS[self.practice_coins]
         )
-        self.screen.blit(main_menu_frame, frame_rect.topleft)
-
-        for i, option in enumerate(self.available_skins):
-            skin_image = pygame.transform.scale(pygame.image.load(option).convert_alpha(), (100, 100))
-            skin_rect = skin_image.get_rect()
-            skin_rect.topleft = (frame_rect.left + 30 + i * (skin_rect.height + 30), frame_rect.top + 40 + (0 if self.selected_skin == i else 10))
-
-            if i == 1 and not self.is_skin_unlocked:
-                gray_skin = pygame.Surface(skin_image.get_size(), flags=pygame.SRCALPHA)
-                gray_skin.fill((0, 0, 0, 150))
-                skin_image.blit(gray_skin, (0, 0))
-                lock_icon = pygame.image.load("assets/gui/locked.png").convert_alpha()
-                lock_icon = pygame.transform.scale(lock_icon, (120, 120))
-                lock_rect = lock_icon.get_rect(center=skin_rect.center)
-                self.screen.blit(skin_image, skin_rect.topleft)
-                self.screen.blit(lock_icon, lock_rect.topleft)
-            else:
-                self.screen.blit(skin_image, skin_rect)
+        self.practice.reset(self)
+        self.developer_mode = False
+        self.pause_options = ["RESUME", "RESET", "EXIT PRACTICE"]
+        self.pause_selected_option = 0
+        self.state = "gameplay"
+
+    def stop_practice(self):
+        """
+        End the practice session, restore the real game state and return to the main menu.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.practice.restore(self)
+        self.practice = None
+        self.pause_options = ["RESUME", "SAVE & EXIT", "GIVE UP"]
+        self.state = "menu"
+
+    def start_multi(self):
+        """
+        Start a local game of several kings at the bottom of the tower, outside the saved game.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.multi = LocalMultiplayer(self.kings, self.sounds, self.emitters, self.tick_time)
+        self.state = "multi"
+
+    def stop_multi(self):
+        """
+        End the local multi-king game and return to the main menu.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.multi = None
+        self.state = "menu"
 
+    def draw_skins_in_main_menu(self):
+        """
+        Update the skin selection of the main menu, showing available and locked skins while it is open.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        shown = self.in_skin_selection
+        self.skins_frame_ui.show(shown)
+        self.skin_lock_ui.show(False)
+        self.skin_cursor_ui.show(shown)
+        for i, (widget, (skin_image, locked_image)) in enumerate(zip(self.skins_ui, self.skin_images)):
+            widget.show(shown)
+            locked = i == 1 and not self.is_skin_unlocked
+            widget.set_image(locked_image if locked else skin_image)
+            widget.place((
+                SKINS_FRAME_RECT.left + 30 + i * (widget.rect.height + 30),
+                SKINS_FRAME_RECT.top + 40 + (0 if self.selected_skin == i else 10)
+            ))
+
+            if locked:
+                self.skin_lock_ui.show(shown)
+                self.skin_lock_ui.place(widget.rect.center)
             if i == self.selected_skin:
-                cursor_x = skin_rect.centerx - (self.cursor_image.get_width() // 2)
-                cursor_y = skin_rect.bottom + 10
-                rotated_cursor = pygame.transform.rotate(self.cursor_image, 90)
-                self.screen.blit(rotated_cursor, (cursor_x, cursor_y))
+                self.skin_cursor_ui.place(
+                    (widget.rect.centerx - (self.cursor_image.get_width() // 2), widget.rect.bottom + 10)
+                )
 
     def draw_pause_screen(self):
         """
@@ -495,37 +1071,24 @@ class Game:
         Returns:
             None
         """
-        pause_rect = pygame.Rect(SCREEN_WIDTH - 280, 20, 260, 240)
-        main_frame = pygame.image.load("assets/gui/frame_main.png").convert_alpha()
-        self.screen.blit(main_frame, pause_rect.topleft)
-
-        font = self.get_font(30)
-        for i, option in enumerate(self.pause_options):
-            color = WHITE if i == self.pause_selected_option else (200, 200, 200)
-            text_surface = font.render(option, True, color)
-            text_rect = text_surface.get_rect()
-            text_rect.topleft = (pause_rect.left + 60 + (10 if i == self.pause_selected_option else 0), 70 + i * (text_rect.height + 20))
-            self.screen.blit(text_surface, text_rect)
-
-            if i == self.pause_selected_option:
-                cursor_x = text_rect.left - 20 - self.cursor_image.get_width()
-                cursor_y = text_rect.centery - 5 - self.cursor_image.get_height() // 2
-                self.screen.blit(self.cursor_image, (cursor_x, cursor_y))
+        for i, (label, option) in enumerate(zip(self.pause_options_ui, self.pause_options)):
+            selected = i == self.pause_selected_option
+            label.set_text(option, WHITE if selected else OPTION_COLOR)
+            label.place((PAUSE_FRAME_RECT.left + 60 + (10 if selected else 0), 70 + i * (label.rect.height + 20)))
 
-        info_rect = pygame.Rect(20, 20, 306, 167)
-        info_frame = pygame.image.load("assets/gui/frame_info.png").convert_alpha()
-        self.screen.blit(info_frame, info_rect.topleft)
+            if selected:
+                self.pause_cursor_ui.place((
+                    label.rect.left - 20 - self.cursor_image.get_width(),
+                    label.rect.centery - 5 - self.cursor_image.get_height() // 2
+                ))
 
         if self.start_time > 0:
-            if self.is_paused and self.paused_time_start > 0:
-                elapsed_time = self.paused_time_start - self.start_time
-            else:
-                elapsed_time = time.time() - self.start_time
+            elapsed_time = self.get_elapsed_time()
             hours = int(elapsed_time // 3600)
             minutes = int((elapsed_time % 3600) // 60)
             seconds = int(elapsed_time % 60)
         else:
-            hours, minutes, seconds = 0, 0
+            hours, minutes, seconds = 0, 0, 0
 
         jumps = self.player.jump_count
         falls = self.player.fall_counter
@@ -535,13 +1098,13 @@ class Game:
             f"JUMPS : {jumps}",
             f"FALLS : {falls}"
         ]
-        for i, text in enumerate(info_texts):
-            text_surface = font.render(text, True, WHITE)
-            self.screen.blit(text_surface, (info_rect.x + 60, info_rect.y + 30 + i * 40))
+        for label, text in zip(self.pause_info_ui, info_texts):
+            label.set_text(text)
+        self.pause_ui.draw(self.screen)
 
     def toggle_pause(self):
         """
-        Toggle the pause state of the game and adjust game timing accordingly.
+        Toggle the pause state of the game, stopping or restarting the game clock.
 
         Args:
             None
@@ -551,15 +1114,31 @@ class Game:
         """
         self.is_paused = not self.is_paused
         if self.is_paused:
-            pygame.mixer.music.pause()
+            if self.sounds.enabled:
+                pygame.mixer.music.pause()
             self.pause_selected_option = 0
-            self.paused_time_start = time.time()
+            self.game_clock.pause()
         else:
-            pygame.mixer.music.unpause()
-            if self.paused_time_start > 0:
-                paused_duration = time.time() - self.paused_time_start
-                self.start_time += paused_duration
-                self.paused_time_start = 0
+            if self.sounds.enabled:
+                pygame.mixer.music.unpause()
+            self.game_clock.resume()
+
+    def toggle_capture(self):
+        """
+        Start capturing video into a new capture directory, or finish the running capture.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if self.capture:
+            self.capture.close()
+            self.capture = None
+            return
+        self.capture = FrameCapture.new_session(self.capture_format, self.display.render_size)
+        print(f"Capturing {self.capture_format} video to {self.capture.directory} (F9 to stop)")
 
     def handle_main_menu_input(self, event):
         """
@@ -578,7 +1157,7 @@ class Game:
                 elif event.key == pygame.K_d:
                     self.selected_skin = (self.selected_skin + 1) % len(self.available_skins)
                 elif event.key == pygame.K_RETURN:
-                    self.sounds["select"].play()
+                    self.sounds.play("select")
                     self.player.image = pygame.image.load(self.available_skins[self.selected_skin]).convert_alpha()
                     if self.selected_skin == 1 and not self.is_skin_unlocked:
                         print("This skin is locked!")
@@ -587,7 +1166,7 @@ class Game:
                         self.in_skin_selection = False
 
                 elif event.key == pygame.K_ESCAPE:
-                    self.sounds["select"].play()
+                    self.sounds.play("select")
                     self.in_skin_selection = False
             else:
                 if event.key == pygame.K_w:
@@ -595,18 +1174,22 @@ class Game:
                 elif event.key == pygame.K_s:
                     self.main_menu_selected_option = (self.main_menu_selected_option + 1) % len(self.main_menu_options)
                 elif event.key == pygame.K_RETURN:
-                    self.sounds["select"].play()
+                    self.sounds.play("select")
                     selected_option = self.main_menu_options[self.main_menu_selected_option]
                     if selected_option == "SKINS":
                         self.in_skin_selection = True
+                    elif selected_option == "PRACTICE":
+                        self.practice_selected_option = 0
+                        self.ensure_level_loaded(self.practice_level)
+                        self.state = "practice_menu"
                     elif selected_option == "CONTINUE" and self.has_save_game:
                         self.load_save()
+                        self.resume_replay()
                         self.state = "gameplay"
                     elif selected_option == "CONTINUE" and not self.has_save_game or selected_option == "NEW GAME":
                         self.start_new_game()
                     elif selected_option == "QUIT":
-                        pygame.quit()
-                        sys.exit()
+                        self.shutdown()
 
     def handle_pause_input(self, event):
         """
@@ -645,21 +1228,64 @@ class Game:
             self.save_and_exit()
         elif selected_option == "GIVE UP":
             self.give_up()
+        elif selected_option == "RESET":
+            self.toggle_pause()
+            self.practice.reset(self)
+        elif selected_option == "EXIT PRACTICE":
+            self.toggle_pause()
+            self.stop_practice()
 
     def save_and_exit(self):
         """
         Save the current game state (position, level, and other data) to a file and exit the game.
 
+        The game is only saved during gameplay, so quitting from the menu keeps the existing save.
+
         Args:
             None
 
         Returns:
             None
         """
-        if self.start_time > 0:
-            elapsed_time = time.time() - self.start_time
-        else:
-            elapsed_time = 0
+        if self.state == "gameplay" and not self.practice:
+            self.save_game()
+        self.shutdown()
+
+    def shutdown(self):
+        """
+        Close the run history, telemetry, video capture, race connection and level streaming, stop the music
+        and exit the game.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.history.close()
+        self.telemetry.close()
+        if self.capture:
+            self.capture.close()
+        if self.race:
+            self.race.close()
+        if self.world:
+            self.world.close()
+        if self.sounds.enabled:
+            pygame.mixer.music.stop()
+        pygame.quit()
+        sys.exit()
+
+    def save_game(self):
+        """
+        Save the current game state (position, level, and other data) to a file, and record the save in the replay.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        elapsed_time = self.get_elapsed_time()
         save_data = {
             "player_x": self.player.x,
             "player_y": self.player.y,
@@ -669,7 +1295,10 @@ class Game:
             "jumps": self.player.jump_count,
             "falls": self.player.fall_counter,
             "total_coins_collected": self.total_coins_collected,
-            "coins": [coin["collected"] for coin in self.coins]
+            "coins": self.coins.collected_flags(),
+            "replay": self.replay.path if self.replay else self.save_replay_path,
+            "run": self.run_tracker.to_dict(),
+            "level_pack": self.level_pack,
         }
         save_path = "savegame.json"
         try:
@@ -679,9 +1308,34 @@ class Game:
         except Exception as e:
             print(f"Failed to save game: {e}")
 
-        pygame.mixer.music.stop()
-        pygame.quit()
-        sys.exit()
+        if self.replay:
+            try:
+                self.replay.record_meta(
+                    "save", time=self.tick_time, x=self.player.x, y=self.player.y, level=self.current_level,
+                    health=self.player.current_health, jumps=self.player.jump_count,
+                    falls=self.player.fall_counter, elapsed=elapsed_time
+                )
+                self.replay.close()
+            except OSError as e:
+                print(f"Failed to save replay: {e}")
+            self.replay = None
+
+    def pack_progress(self):
+        """
+        Return the part of the progress data that holds the best time of the level pack being played.
+
+        The game's own tower keeps its best time at the top of the progress file, and every other
+        pack under "pack_bests", keyed by the path of its manifest.
+
+        Args:
+            None
+
+        Returns:
+            dict: The progress entries of the pack, updated in place when progress is saved.
+        """
+        if os.path.normpath(self.level_pack) == os.path.normpath(LEVEL_PACK_PATH):
+            return self.progress
+        return self.progress.setdefault("pack_bests", {}).setdefault(self.level_pack, {})
 
     def save_progress(self):
         """
@@ -693,15 +1347,13 @@ class Game:
         Returns:
             None
         """
-        progress_data = {
-            "is_skin_unlocked": self.is_skin_unlocked,
-            "best_time": self.best_time
-        }
+        self.progress["is_skin_unlocked"] = self.is_skin_unlocked
+        self.pack_progress().update(best_time=self.best_time, best_replay=self.best_replay)
 
         progress_path = "progress.json"
         try:
             with open(progress_path, 'w') as progress_file:
-                json.dump(progress_data, progress_file, indent=4)
+                json.dump(self.progress, progress_file, indent=4)
             print(f"Progress saved successfully at {progress_path}")
         except Exception as e:
             print(f"Failed to save progress: {e}")
@@ -720,15 +1372,18 @@ class Game:
         if os.path.exists(progress_path):
             try:
                 with open(progress_path, 'r') as progress_file:
-                    progress_data = json.load(progress_file)
-                    self.is_skin_unlocked = progress_data.get("is_skin_unlocked", False)
-                    self.best_time = progress_data.get("best_time", None)
+                    self.progress = json.load(progress_file)
+                    self.is_skin_unlocked = self.progress.get("is_skin_unlocked", False)
+                    self.best_time = self.pack_progress().get("best_time", None)
+                    self.best_replay = self.pack_progress().get("best_replay", None)
                     print("Progress loaded successfully!")
             except Exception as e:
                 print(f"Failed to load progress: {e}")
         else:
+            self.progress = {}
             self.is_skin_unlocked = False
             self.best_time = None
+            self.best_replay = None
 
     def give_up(self):
         """
@@ -746,9 +1401,9 @@ class Game:
             print("Save file deleted. Starting a new game next time.")
         else:
             print("No save file to delete.")
-        pygame.mixer.music.stop()
-        pygame.quit()
-        sys.exit()
+        self.record_run("gave_up")
+        self.finish_replay("gave_up")
+        self.shutdown()
 
     def load_save(self):
         """
@@ -761,25 +1416,55 @@ class Game:
             None
         """
         save_path = "savegame.json"
+        self.save_replay_path = None
         if os.path.exists(save_path):
             with open(save_path, 'r') as save_file:
                 save_data = json.load(save_file)
+                if save_data.get("level_pack", LEVEL_PACK_PATH) != self.level_pack:
+                    print("The saved game is for another level pack and was not loaded.")
+                    self.has_save_game = False
+                    return
                 self.player.x = save_data["player_x"]
                 self.player.y = save_data["player_y"]
                 self.current_level = save_data["current_level"]
                 self.player.current_health = save_data["current_health"]
-                self.start_time = time.time() - save_data["elapsed_time"]
+                self.start_time = self.tick_time - save_data["elapsed_time"]
                 self.player.jump_count = save_data.get("jumps", 0)
                 self.player.fall_counter = save_data.get("falls", 0)
                 self.total_coins_collected = save_data.get("total_coins_collected", 0)
-                saved_coins = save_data.get("coins", [False] * len(self.coins))
-                for i, coin in enumerate(self.coins):
-                    coin["collected"] = saved_coins[i] if i < len(saved_coins) else False
+                self.coins.set_collected_flags(save_data.get("coins", []))
+                self.save_replay_path = save_data.get("replay")
+                self.run_tracker.load_dict(save_data.get("run"))
+                self.telemetry.start(self.current_level, self.player)
                 print("Game loaded successfully!")
 
+    def resume_replay(self):
+        """
+        Reopen the replay of a loaded save and record that the run continues.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if not self.save_replay_path or not os.path.exists(self.save_replay_path):
+            return
+        try:
+            self.replay = ReplayRecorder(self.save_replay_path)
+            self.replay.record_meta(
+                "resume", time=self.tick_time, level=self.current_level, player=self.player.get_state()
+            )
+        except OSError as e:
+            print(f"Failed to resume replay: {e}")
+            self.replay = None
+        self.replay_inputs = 0
+
     def animate_flag(self):
         """
-        Animate the flag being raised and update the best time if necessary.
+        Draw the rising flag and the victory message once it is raised.
+
+        The flag itself is moved by the gameplay tick.
 
         Args:
             None
@@ -788,36 +1473,24 @@ class Game:
             None
         """
         if self.flag_moving:
-            current_x, current_y = self.flag_position
-            if current_y > 30:
-                self.flag_position = (current_x, current_y - 2)
-            else:
-                self.flag_moving = False
-                self.flag_raised = True
-                self.flag_raised_time = time.time()
-                self.timer_stopped = True
-                self.final_time = self.flag_raised_time - self.start_time
-                if self.best_time is None:
-                    self.best_time = self.final_time
-                    self.save_progress()
-                elif self.final_time < self.best_time:
-                    self.best_time = self.final_time
-                    self.save_progress()
-
+            if self.world:
+                self.screen.set_offset(self.world.slice_offset(self.current_level))
             self.screen.blit(self.flag_image, self.flag_position)
+            self.screen.set_offset(0)
 
         if self.flag_raised:
             font = self.get_font(40)
             victory_text = font.render("The kingdom is restored. The flag waves high!", True, BLACK)
             self.screen.blit(victory_text, (SCREEN_WIDTH // 2 - victory_text.get_width() // 2, SCREEN_HEIGHT // 2))
-            keys = pygame.key.get_pressed()
-            if keys[pygame.K_SPACE]:
-                self.start_time = time.time()
+            if self.input_state[pygame.K_SPACE] and not self.practice:
+                self.start_time = self.tick_time
                 self.state = "ending"
 
-    def draw_ending_screen(self):
+    def finish_run(self):
         """
-        Render the ending screen with statistics and a congratulatory message when the game is completed.
+        Update the best time and close the replay once the flag is raised.
+
+        Runs played partly at another game speed are recorded as assisted and never become the best time.
 
         Args:
             None
@@ -825,13 +1498,29 @@ class Game:
         Returns:
             None
         """
-        self.screen.fill(BLACK)
-        font = self.get_font(50)
-        font_small = self.get_font(30)
+        replay_path = self.replay.path if self.replay else None
+        assisted = self.run_tracker.assisted
+        self.record_run("finished", self.final_time)
+        self.finish_replay(
+            "finished", final_time=self.final_time, jumps=self.player.jump_count, falls=self.player.fall_counter
+        )
+        if assisted:
+            return
+        if self.best_time is None or self.final_time < self.best_time:
+            self.best_time = self.final_time
+            self.best_replay = replay_path
+            self.save_progress()
 
-        title = font.render("Congratulations!", True, WHITE)
-        self.screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 150))
+    def draw_ending_screen(self):
+        """
+        Render the ending screen with statistics and a congratulatory message when the game is completed.
+
+        Args:
+            None
 
+        Returns:
+            None
+        """
         elapsed_time = self.final_time
         hours = int(elapsed_time // 3600)
         minutes = int((elapsed_time % 3600) // 60)
@@ -842,19 +1531,17 @@ class Game:
             f"Jumps: {self.player.jump_count}",
             f"Falls: {self.player.fall_counter}",
         ]
-        for i, stat in enumerate(stats):
-            stat_text = font_small.render(stat, True, WHITE)
-            self.screen.blit(stat_text, (SCREEN_WIDTH // 2 - stat_text.get_width() // 2, 250 + i * 50))
+        for label, stat in zip(self.ending_stats_ui, stats):
+            label.set_text(stat)
+        self.ending_ui.draw(self.screen)
 
-        instruction = font_small.render("Press SPACE to return to Main Menu", True, WHITE)
-        self.screen.blit(instruction, (SCREEN_WIDTH // 2 - instruction.get_width() // 2, 500))
-
-    def run_gameplay(self):
+    def run_gameplay(self, draw=True):
         """
         Handle the core gameplay logic, including rendering the level, updating the player, and handling interactions.
 
         Args:
-            None
+            draw (bool): Whether to draw the tick, False for the extra ticks of a turbo frame,
+                which only advance the animations.
 
         Returns:
             None
@@ -862,70 +1549,277 @@ class Game:
         if self.state == "death":
             self.draw_death_screen()
             return
+        keys = self.input_state
+        self.record_replay_tick(keys)
         if self.is_paused:
             self.draw_pause_screen()
             return
+        if self.game_clock.scale != 1:
+            self.run_tracker.mark_assisted()
+
+        if self.world:
+            self.world.follow(self.current_level, self.player)
+            self.world.update(self.current_level)
+        idle = self.is_gameplay_idle(keys)
+        if idle:
+            picture = self.get_gameplay_picture()
+            if not draw or picture is not None and picture == self.drawn_picture:
+                self.advance_idle_cycle()
+                if self.coin_sparkle_enabled:
+                    self.coins.advance(self.coin_animation_speed)
+                self.frame_skipped = draw
+                return
+            self.drawn_picture = picture
+        else:
+            self.drawn_picture = None
 
-        self.draw_level()
-        keys = pygame.key.get_pressed()
-        platforms = LEVEL_PLATFORMS[self.current_level]
-        trampoline_rects = self.trampoline_rects_level_12 if self.current_level == 11 else []
-        level_change = self.player.update(
-            platforms, self.current_level, self.developer_mode,
-            self.snow_rects_level_13, self.snow_rects_level_14,
-            trampoline_rects, self
-        )
-
-        if self.start_time <= 0 and self.player.jump_start_time > 0:
-            self.start_time = time.time()
-
-        current_time = pygame.time.get_ticks()
-        if current_time - self.bullet_timer >= self.bullet_spawn_interval and self.current_level == 8:
-            self.bullet_timer = current_time
-            bullet_rect = pygame.Rect(63, 664, 20, 7)
-            self.bullets.append(bullet_rect)
-        for bullet in self.bullets[:]:
-            bullet.x += 5
-            if bullet.x > SCREEN_WIDTH:
-                self.bullets.remove(bullet)
-
-            if bullet.colliderect(self.player.x, self.player.y, self.player.width, self.player.height):
-                print("Player hit by bullet!")
-                self.player.grounded = False
-                self.player.x_velocity = 10
-                self.player.y_velocity = -5
-                self.bullets.remove(bullet)
-
-        if level_change == 1 and self.current_level < len(LEVEL_BACKGROUNDS) - 1:
-            self.current_level += 1
-        elif level_change == -1 and self.current_level > 0:
-            self.current_level -= 1
-
-        if self.current_level == len(LEVEL_BACKGROUNDS) - 1:
-            pole_rect = pygame.Rect(769, 146, 10, 100)
-            player_rect = pygame.Rect(self.player.x, self.player.y, self.player.width, self.player.height)
-            if player_rect.colliderect(pole_rect) and not self.flag_raised:
-                self.flag_moving = True
+        self.ensure_level_loaded(self.current_level)
+        if draw:
+            self.draw_level()
+        else:
+            self.advance_level_animations()
+        if idle:
+            self.advance_idle_cycle()
+        else:
+            before = self.get_gameplay_state()
+            level = self.current_level
+            flag_finished = step_gameplay(self, keys)
+            if self.practice:
+                if self.practice.pending_reset:
+                    self.practice.reset(self)
+            else:
+                if self.current_level != level:
+                    self.run_tracker.enter_level(self.current_level, self.player, self.get_elapsed_time())
+                if flag_finished:
+                    self.finish_run()
+                self.telemetry.track(self.tick_time, self.current_level, self.player)
+            self.track_idle_cycle(keys, before)
+        if not draw:
+            return
+        if LEVEL_DATA[self.current_level].flag_pole:
             self.animate_flag()
 
-        self.player.handle_input(keys, self.current_level)
+        if self.race:
+            self.race.publish(self.current_level, self.player)
         self.draw_jump_bar()
-        self.draw_timer()
+        self.draw_hud()
 
-    def handle_events(self):
+    def advance_level_animations(self):
         """
-        Process player inputs and other events, such as quitting, pausing, and navigating menus.
+        Advance the snow and coin animations of a tick that is not drawn, as drawing the level would.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if LEVEL_DATA[self.current_level].weather == "snow" and self.snow_enabled:
+            self.snow.update()
+        if not self.is_skin_unlocked and self.coin_sparkle_enabled:
+            self.coins.advance(self.coin_animation_speed)
+
+    def run_extra_ticks(self, ticks):
+        """
+        Run every tick of a turbo frame but the last one without drawing.
+
+        The frame's events were handled at its first tick; the other ticks see the same held keys and no events.
+        The ticks stop early if one of them ends the gameplay, e.g. when the king dies.
+
+        Args:
+            ticks (list[float]): Game time of every tick of the frame, from the game clock.
+
+        Returns:
+            None
+        """
+        held = self.input_state.held
+        for index, tick_time in enumerate(ticks):
+            if self.state not in ("gameplay", "multi") or self.is_paused:
+                return
+            if index:
+                self.tick_time = tick_time
+                self.input_state = InputSnapshot(tick_time, held, [])
+            if index == len(ticks) - 1:
+                return
+            if self.state == "multi":
+                self.multi.step(self.tick_time, self.input_state, self.ensure_level_loaded)
+            else:
+                self.run_gameplay(draw=False)
+                self.check_coin_collection()
+
+    def get_gameplay_state(self):
+        """
+        Capture everything a gameplay tick can change, to detect ticks that repeat themselves.
+
+        Args:
+            None
+
+        Returns:
+            tuple: Level, timer start, flag state and player state.
+        """
+        player = self.player
+        return (
+            self.current_level, self.start_time, self.flag_position, self.flag_moving, self.flag_raised,
+            tuple(getattr(player, name) for name in player.STATE_ATTRIBUTES),
+        )
+
+    def can_idle(self, keys):
+        """
+        Check whether gameplay ticks currently depend on nothing but the gameplay state.
+
+        Args:
+            keys (Sequence[bool]): Keyboard state of the current frame.
+
+        Returns:
+            bool: True if no movement key is held, developer mode is off and the level has no hazards.
+        """
+        if self.state != "gameplay" or self.developer_mode:
+            return False
+        if keys[pygame.K_a] or keys[pygame.K_d] or keys[pygame.K_SPACE]:
+            return False
+        if self.practice and self.practice.pending_reset:
+            return False
+        return self.projectiles.is_idle(self.current_level)
+
+    def track_idle_cycle(self, keys, before):
+        """
+        Follow the states of consecutive quiet ticks and detect when they start repeating.
+
+        A king resting on a platform does not stand perfectly still: gravity pulls him into the
+        platform and the collision pushes him back, so his state alternates between two values.
+        Once a state repeats after one or two ticks, the following ticks are known in advance.
+
+        Args:
+            keys (Sequence[bool]): Keyboard state of the tick.
+            before (tuple): Gameplay state before the tick.
+
+        Returns:
+            None
+        """
+        after = self.get_gameplay_state()
+        # A running fall timer makes the next tick depend on the clock.
+        if not self.can_idle(keys) or self.player.fall_start_time is not None:
+            self.recent_states.clear()
+            return
+        if not self.recent_states or self.recent_states[-1] != before:
+            self.recent_states.clear()
+            self.recent_states.append(before)
+        self.recent_states.append(after)
+        if len(self.recent_states) == 3 and self.recent_states[0] == self.recent_states[2]:
+            self.idle_cycle = [self.recent_states[1], self.recent_states[2]]
+
+    def is_gameplay_idle(self, keys):
+        """
+        Check whether the next gameplay tick is known in advance, so its simulation can be skipped.
+
+        A tick is a function of the gameplay state and the keys, so the skipped ticks are
+        replayed identically by the replay verifier.
+
+        Args:
+            keys (Sequence[bool]): Keyboard state of the current frame.
+
+        Returns:
+            bool: True if the tick can be skipped.
+        """
+        if self.idle_cycle is None:
+            return False
+        if self.can_idle(keys) and self.get_gameplay_state() == self.idle_cycle[-1]:
+            return True
+        self.idle_cycle = None
+        self.recent_states.clear()
+        return False
+
+    def advance_idle_cycle(self):
+        """
+        Move the player to the next state of the idle cycle instead of simulating the tick.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.idle_cycle.append(self.idle_cycle.pop(0))
+        for name, value in zip(self.player.STATE_ATTRIBUTES, self.idle_cycle[-1][5]):
+            setattr(self.player, name, value)
+
+    def get_gameplay_picture(self):
+        """
+        Describe what an idle gameplay frame would show, to skip redrawing an unchanged picture.
+
+        Args:
+            None
+
+        Returns:
+            tuple: The visible state, or None if the picture animates every frame.
+        """
+        level = LEVEL_DATA[self.current_level]
+        if level.weather == "snow" and self.snow_enabled:
+            return None
+        coins_visible = not self.is_skin_unlocked
+        if coins_visible and self.coins.active_fx:
+            return None
+        if self.race and self.race.ghosts and self.ghosts_enabled:
+            return None
+        if self.timer_stopped:
+            elapsed = None
+        else:
+            elapsed = int(self.get_elapsed_time())
+        player = self.player
+        return (
+            self.current_level, self.screen.pixel_position((player.x, player.y)), player.facing_right,
+            player.playing_fall_impact, player.current_health, self.flag_position, self.flag_raised, elapsed,
+            int(self.coins.frame_index) if coins_visible else None,
+            self.practice.last_reset_ms if self.practice else None,
+            self.world.camera.top if self.world else None,
+        )
+
+    def get_static_screen(self):
+        """
+        Identify the current screen if it only changes in response to input.
 
         Args:
             None
 
+        Returns:
+            tuple: Key of the static screen, or None if the screen animates.
+        """
+        if self.state == "gameplay":
+            return ("pause", self.practice is not None) if self.is_paused else None
+        if self.state == "multi":
+            return None
+        return (self.state, self.in_skin_selection)
+
+    def handle_events(self, snapshot=None):
+        """
+        Process player inputs and other events, such as quitting, pausing, and navigating menus.
+
+        The snapshot becomes the input every key read of this tick sees.
+
+        Args:
+            snapshot (InputSnapshot): Input of the tick, defaults to a snapshot of the pending events.
+
         Returns:
             None
         """
-        for event in pygame.event.get():
+        if snapshot is None:
+            snapshot = self.input.snapshot(self.tick_time)
+        self.input_state = snapshot
+        for timestamp, event in snapshot.events:
             if event.type == pygame.QUIT:
                 self.save_and_exit()
 
+            if event.type == pygame.VIDEORESIZE:
+                self.display.handle_resize()
+                self.drawn_screen = None
+                self.drawn_picture = None
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F11:
+                self.display.toggle_fullscreen()
+                self.drawn_screen = None
+                self.drawn_picture = None
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+                self.toggle_capture()
+
             if self.state == "ending" and event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
                     self.state = "menu"
@@ -934,6 +1828,15 @@ class Game:
                     if os.path.exists(save_path):
                         os.remove(save_path)
 
+            if self.state == "practice_menu":
+                self.handle_practice_menu_input(event)
+
+            if self.state == "multi":
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    self.stop_multi()
+                else:
+                    self.multi.handle_event(event, timestamp)
+
             if self.state == "menu" and event.type == pygame.KEYDOWN:
                 self.handle_main_menu_input(event)
 
@@ -943,17 +1846,35 @@ class Game:
                 else:
                     if event.type == pygame.KEYDOWN:
                         if event.key == pygame.K_SPACE and not self.developer_mode:
-                            self.player.start_jump()
+                            self.player.start_jump(timestamp)
+                            self.replay_inputs |= INPUT_JUMP_PRESSED
+                            if self.replay:
+                                self.replay.record_jump(True, timestamp)
                         if event.key == pygame.K_ESCAPE:
                             self.toggle_pause()
+                        if self.practice and event.key == pygame.K_r:
+                            self.practice.reset(self)
+                        if self.practice and event.key == pygame.K_c:
+                            self.practice.set_checkpoint(self)
                         if event.key == pygame.K_u:
                             self.developer_mode = not self.developer_mode
+                            self.replay_inputs |= INPUT_DEVELOPER
                             print(f"Developer Mode: {'ON' if self.developer_mode else 'OFF'}")
+                        if self.developer_mode and event.key == pygame.K_m:
+                            print_memory_report(memory_report(self))
+                        if self.developer_mode and event.key in (pygame.K_LEFTBRACKET, pygame.K_RIGHTBRACKET):
+                            factor = 2 if event.key == pygame.K_RIGHTBRACKET else 0.5
+                            print(f"Time scale: {self.game_clock.set_scale(self.game_clock.scale * factor):g}x")
 
                 if event.type == pygame.KEYUP:
                     if event.key == pygame.K_SPACE:
-                        self.player.release_jump(self.current_level)
+                        self.player.release_jump(self.current_level, timestamp)
                         self.player.reset_jump()
+                        if self.replay:
+                            self.replay.record_jump(False, timestamp)
+                        if not self.replay_inputs & INPUT_JUMP_PRESSED:
+                            self.replay_inputs |= INPUT_RELEASE_FIRST
+                        self.replay_inputs |= INPUT_JUMP_RELEASED
 
     def update(self):
         """
@@ -970,13 +1891,41 @@ class Game:
         elif self.state == "gameplay":
             self.run_gameplay()
             self.check_coin_collection()
+        elif self.state == "practice_menu":
+            self.draw_practice_menu()
+        elif self.state == "multi":
+            self.multi.step(self.tick_time, self.input_state, self.ensure_level_loaded)
+            self.multi.draw(self.screen, self.get_font, self.flag_image)
         elif self.state == "ending":
             self.draw_ending_screen()
 
+    def apply_quality(self):
+        """
+        Apply the governor's current quality step to the effects and the internal resolution.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.snow_enabled = self.governor.snow
+        self.coin_sparkle_enabled = self.governor.coin_sparkle
+        self.ghosts_enabled = self.governor.ghosts
+        if not self.coin_sparkle_enabled:
+            self.coins.clear_fx()
+        self.display.set_render_scale(self.render_scale * self.governor.render_scale)
+
     def run(self):
         """
         Run the main game loop, which processes events, updates the game state, and renders the screen.
 
+        Static screens are drawn once and then sleep on the event queue until input arrives,
+        waking every IDLE_WAKE_INTERVAL for background work. Frames that draw nothing new are not presented.
+        Each frame runs the gameplay ticks the game clock gives it and draws only the last one.
+        While a video is captured, every frame is handed to the capture, whether it was redrawn or not.
+        The rest of each frame is spent waiting on the event queue, so key events are timestamped as they arrive.
+
         Args:
             None
 
@@ -984,11 +1933,45 @@ class Game:
             None
         """
         self.load_save()
+        if self.kings > 1:
+            self.start_multi()
         while self.running:
+            static_screen = self.get_static_screen()
+            # A capture needs a frame every 1 / FPS, even of a screen that does not change.
+            if static_screen is not None and static_screen == self.drawn_screen and self.loader.finished \
+                    and not self.capture:
+                self.input.wait(IDLE_WAKE_INTERVAL)
+            ticks = self.game_clock.advance()
+            self.tick_time = ticks[0] if ticks else self.game_clock.now
+            frame_start = time.perf_counter()
             self.handle_events()
-            if self.state == "death":
-                self.run_gameplay()
-            else:
-                self.update()
-            pygame.display.flip()
-            self.clock.tick(FPS)
+            self.sounds.update()
+            self.history.update()
+            self.telemetry.update()
+            if self.state in ("menu", "practice_menu") and not self.loader.finished:
+                self.loader.step()
+
+            static_screen = self.get_static_screen()
+            self.frame_skipped = static_screen is not None and static_screen == self.drawn_screen \
+                and not self.input_state.events
+            # In slow motion, some frames of the running game have no tick and nothing to draw.
+            if static_screen is None and self.state in ("gameplay", "multi") and not ticks:
+                self.frame_skipped = True
+            if not self.frame_skipped:
+                self.run_extra_ticks(ticks)
+                if self.state == "death":
+                    self.run_gameplay()
+                else:
+                    self.update()
+            if not self.frame_skipped:
+                self.display.present()
+                self.drawn_screen = static_screen if static_screen == self.get_static_screen() else None
+                if static_screen is not None:
+                    self.drawn_picture = None
+                if self.governor and self.state == "gameplay" and not self.is_paused and self.game_clock.scale <= 1:
+                    if self.governor.end_frame(self.display.frame_done_time - frame_start):
+                        self.apply_quality()
+            if self.capture:
+                self.capture.capture(self.display.frame)
+            self.input.wait_until(frame_start + 1 / FPS - PACING_MARGIN)
+            self.frame_clock.tick(FPS)
@@ -0,0 +1,126 @@
+import argparse
+import glob
+import numpy as np
+import os
+import pygame
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from levels import LEVEL_DATA, load_level_pack
+from telemetry import read_telemetry, EVENT_NAMES
+"""
+heatmap.py
+
+This module turns King's Trial telemetry files into per-level heatmaps.
+Event counts are accumulated on a coarse grid per level while the files are streamed in
+chunks, so any number of files of any size can be aggregated in constant memory.
+Each level's heatmap is drawn over its background and saved as a PNG.
+
+Features:
+- Streaming aggregation with numpy, one chunk of events at a time.
+- Selectable event types, e.g. only falls and deaths.
+- Logarithmic color scale, so a few hot spots do not wash out the rest of the level.
+- Command line interface: `python heatmap.py telemetry/*.ktt --events fall death --out heatmaps`.
+"""
+CELL_SIZE = 16
+MIN_ALPHA = 90
+MAX_ALPHA = 230
+
+def aggregate(paths, events, cell=CELL_SIZE):
+    """
+    Count the selected events per level and grid cell across telemetry files.
+
+    Args:
+        paths (list[str]): Paths of the telemetry files.
+        events (list[str]): Names of the event types to count, see EVENT_NAMES.
+        cell (int): Width and height of a grid cell in pixels.
+
+    Returns:
+        tuple: (counts, events read) where counts is an array of shape (levels, rows, columns).
+    """
+    rows, columns = SCREEN_HEIGHT // cell, SCREEN_WIDTH // cell
+    counts = np.zeros((len(LEVEL_DATA), rows, columns), dtype=np.int64)
+    selected = np.array([EVENT_NAMES.index(name) for name in events])
+    total = 0
+    for path in paths:
+        try:
+            for chunk in read_telemetry(path):
+                total += len(chunk)
+                chunk = chunk[np.isin(chunk["event"], selected) & (chunk["level"] < len(LEVEL_DATA))]
+                row = np.clip(chunk["y"] // cell, 0, rows - 1)
+                column = np.clip(chunk["x"] // cell, 0, columns - 1)
+                np.add.at(counts, (chunk["level"], row, column), 1)
+        except (OSError, ValueError) as e:
+            print(f"Failed to read {path}: {e}")
+    return counts, total
+
+def heat_colors(counts):
+    """
+    Map a grid of counts to RGBA colors, from transparent through yellow to red.
+
+    Args:
+        counts (ndarray): Event counts of shape (rows, columns).
+
+    Returns:
+        ndarray: uint8 array of shape (rows, columns, 4).
+    """
+    heat = np.log1p(counts) / np.log1p(counts.max())
+    colors = np.zeros(counts.shape + (4,), dtype=np.uint8)
+    colors[..., 0] = 255
+    colors[..., 1] = (255 * (1 - heat)).astype(np.uint8)
+    colors[..., 3] = np.where(counts > 0, MIN_ALPHA + (MAX_ALPHA - MIN_ALPHA) * heat, 0).astype(np.uint8)
+    return colors
+
+def render_heatmap(level, counts, path):
+    """
+    Draw a level's heatmap over its background and save it as a PNG.
+
+    Args:
+        level (int): Zero-based level index.
+        counts (ndarray): Event counts of the level, of shape (rows, columns).
+        path (str): Output PNG path.
+
+    Returns:
+        None
+    """
+    background = pygame.transform.scale(
+        pygame.image.load(LEVEL_DATA[level].background_path), (SCREEN_WIDTH, SCREEN_HEIGHT)
+    )
+    picture = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    picture.blit(background, (0, 0))
+    colors = heat_colors(counts)
+    heat = pygame.image.frombuffer(colors.tobytes(), (counts.shape[1], counts.shape[0]), "RGBA")
+    picture.blit(pygame.transform.smoothscale(heat, (SCREEN_WIDTH, SCREEN_HEIGHT)), (0, 0))
+    pygame.image.save(picture, path)
+
+def main():
+    """
+    Aggregate the telemetry files given on the command line and write one heatmap per level.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description="Draw King's Trial telemetry heatmaps")
+    parser.add_argument("files", nargs="*", help="telemetry files, defaults to telemetry/*.ktt")
+    parser.add_argument("--events", nargs="+", choices=EVENT_NAMES, default=["fall", "death"],
+                        help="event types to count")
+    parser.add_argument("--cell", type=int, default=CELL_SIZE, help="grid cell size in pixels")
+    parser.add_argument("--out", default="heatmaps", help="output directory")
+    args = parser.parse_args()
+
+    paths = [path for pattern in args.files or ["telemetry/*.ktt"] for path in glob.glob(pattern)]
+    load_level_pack()
+    counts, total = aggregate(paths, args.events, args.cell)
+    print(f"Read {total} events from {len(paths)} files")
+    os.makedirs(args.out, exist_ok=True)
+    for level, level_counts in enumerate(counts):
+        if not level_counts.any():
+            continue
+        path = os.path.join(args.out, f"level{level + 1:02}.png")
+        try:
+            render_heatmap(level, level_counts, path)
+        except (OSError, pygame.error) as e:
+            print(f"Failed to draw the heatmap of level {level + 1}: {e}")
+            continue
+        print(f"Level {level + 1:2}: {level_counts.sum()} events -> {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import numpy as np
+import pygame
+import time
+import zlib
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+"""
+layers.py
+
+This module bakes the per-level render layers of the King's Trial game.
+Level images are converted to the display's pixel format once, when the level loads,
+so drawing a frame is a plain copy instead of a per-pixel format conversion.
+
+Features:
+- Backgrounds baked without an alpha channel, since nothing is drawn beneath them.
+- Foreground overlays cropped to their non-transparent bounding box, with per-pixel alpha only if
+  they have translucent pixels and an RLE-accelerated color key if they are merely cut out.
+- Blit time report for every level, run with `python layers.py`.
+- Packed storage for layers that are not on screen: 8-bit palettized or zlib-compressed, expanded
+  back to the display format on demand.
+"""
+STORAGE_FULL = "full"
+STORAGE_PALETTE = "palette"
+STORAGE_COMPRESSED = "compressed"
+STORAGE_MODES = (STORAGE_FULL, STORAGE_PALETTE, STORAGE_COMPRESSED)
+
+def is_opaque(surface):
+    """
+    Check whether every pixel of a surface is fully opaque.
+
+    Args:
+        surface (Surface): The surface to check.
+
+    Returns:
+        bool: True if the surface has no transparent or translucent pixels.
+    """
+    if not surface.get_flags() & pygame.SRCALPHA:
+        return True
+    return pygame.mask.from_surface(surface, 254).count() == surface.get_width() * surface.get_height()
+
+def has_translucency(surface):
+    """
+    Check whether a surface has pixels that are neither fully transparent nor fully opaque.
+
+    Args:
+        surface (Surface): The surface to check.
+
+    Returns:
+        bool: True if blending is needed to draw the surface correctly.
+    """
+    if not surface.get_flags() & pygame.SRCALPHA:
+        return False
+    return pygame.mask.from_surface(surface, 254).count() != pygame.mask.from_surface(surface, 0).count()
+
+def bake_cutout(surface):
+    """
+    Convert a surface whose pixels are either transparent or opaque to an RLE color-keyed surface.
+
+    Args:
+        surface (Surface): Surface with per-pixel alpha but no translucent pixels.
+
+    Returns:
+        Surface: Opaque display-format surface with transparent pixels replaced by a color key.
+    """
+    colorkey = (255, 0, 255)
+    baked = pygame.Surface(surface.get_size()).convert()
+    baked.fill(colorkey)
+    baked.blit(surface, (0, 0))
+    baked.set_colorkey(colorkey, pygame.RLEACCEL)
+    return baked
+
+def bake_background(image):
+    """
+    Scale a background image to the screen and convert it to the opaque display format.
+
+    Backgrounds are the bottom layer, so stray transparent pixels are flattened onto black
+    instead of showing whatever the previous frame left on the screen.
+
+    Args:
+        image (Surface): The source image, as loaded from disk.
+
+    Returns:
+        Surface: Screen-sized opaque surface in display format.
+    """
+    surface = pygame.transform.scale(image, (SCREEN_WIDTH, SCREEN_HEIGHT))
+    if is_opaque(image):
+        return surface.convert()
+    flattened = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+    flattened.fill((0, 0, 0))
+    flattened.blit(surface, (0, 0))
+    return flattened
+
+def bake_foreground(image):
+    """
+    Crop a foreground overlay to its visible pixels, scale it and convert it to the display format.
+
+    Args:
+        image (Surface): The source overlay, as loaded from disk.
+
+    Returns:
+        tuple: (Surface, (x, y)) with the cropped layer and the screen position to draw it at,
+            or (None, None) if the overlay is fully transparent.
+    """
+    bounds = image.get_bounding_rect()
+    if bounds.width == 0 or bounds.height == 0:
+        return None, None
+    scale_x = SCREEN_WIDTH / image.get_width()
+    scale_y = SCREEN_HEIGHT / image.get_height()
+    cropped = image.subsurface(bounds)
+    size = (round(bounds.width * scale_x), round(bounds.height * scale_y))
+    surface = pygame.transform.scale(cropped, size)
+    if is_opaque(cropped):
+        surface = surface.convert()
+    elif has_translucency(cropped) or pygame.mask.from_threshold(cropped, (255, 0, 255, 255), (1, 1, 1, 255)).count():
+        surface = surface.convert_alpha()
+    else:
+        surface = bake_cutout(surface)
+    return surface, (round(bounds.x * scale_x), round(bounds.y * scale_y))
+
+def surface_bytes(surface):
+    """
+    Return the pixel memory of a surface.
+
+    Args:
+        surface (Surface): The surface to measure.
+
+    Returns:
+        int: Bytes taken by the pixel rows, and by the palette of an 8-bit surface.
+    """
+    size = surface.get_pitch() * surface.get_height()
+    if surface.get_bitsize() == 8:
+        size += 4 * 256
+    return size
+
+class PackedLayer:
+    def __init__(self, surface, mode):
+        """
+        Pack a baked layer into a smaller form that can be expanded back without loss.
+
+        Palettized storage keeps an 8-bit surface and falls back to compression for layers with more
+        than 256 colors or with translucent pixels, which an 8-bit surface cannot hold.
+
+        Args:
+            surface (Surface): A layer as returned by bake_background or bake_foreground.
+            mode (str): STORAGE_PALETTE or STORAGE_COMPRESSED.
+
+        Returns:
+            None
+        """
+        self.size = surface.get_size()
+        self.alpha = bool(surface.get_flags() & pygame.SRCALPHA)
+        self.colorkey = surface.get_colorkey()
+        self.indexed = None
+        self.data = None
+        if mode == STORAGE_PALETTE and not self.alpha:
+            pixels = pygame.surfarray.array2d(surface)
+            colors, indices = np.unique(pixels, return_inverse=True)
+            if len(colors) <= 256:
+                self.indexed = pygame.Surface(self.size, 0, 8)
+                self.indexed.set_palette([surface.unmap_rgb(int(color)) for color in colors])
+                pygame.surfarray.blit_array(self.indexed, indices.reshape(pixels.shape).astype(np.uint8))
+                return
+        self.data = zlib.compress(pygame.image.tobytes(surface, "RGBA" if self.alpha else "RGB"), 6)
+
+    @property
+    def nbytes(self):
+        """
+        Memory taken by the packed pixels.
+
+        Returns:
+            int: Size in bytes.
+        """
+        return surface_bytes(self.indexed) if self.indexed is not None else len(self.data)
+
+    def expand(self):
+        """
+        Rebuild the layer in the display format, ready to be drawn.
+
+        Requires an open display.
+
+        Returns:
+            Surface: A surface that draws exactly like the layer that was packed.
+        """
+        if self.indexed is not None:
+            surface = self.indexed.convert()
+        elif self.alpha:
+            surface = pygame.image.frombytes(zlib.decompress(self.data), self.size, "RGBA").convert_alpha()
+        else:
+            surface = pygame.image.frombytes(zlib.decompress(self.data), self.size, "RGB").convert()
+        if self.colorkey is not None:
+            surface.set_colorkey(self.colorkey, pygame.RLEACCEL)
+        return surface
+
+def pack_layer(layer, mode):
+    """
+    Store a baked layer in the given storage mode.
+
+    Args:
+        layer (Surface): A layer as returned by bake_background or bake_foreground, or None.
+        mode (str): One of STORAGE_MODES.
+
+    Returns:
+        Surface | PackedLayer: The layer itself for STORAGE_FULL or None, otherwise its packed form.
+    """
+    if layer is None or mode == STORAGE_FULL:
+        return layer
+    return PackedLayer(layer, mode)
+
+def measure_blit_time(screen, background, foreground=None, foreground_pos=None, repeats=200):
+    """
+    Measure the average time needed to draw the layers of a level.
+
+    Args:
+        screen (Surface): The display surface.
+        background (Surface): The baked background layer.
+        foreground (Surface): The baked foreground layer, if any.
+        foreground_pos (tuple): Position of the foreground layer.
+        repeats (int): Number of frames to average over.
+
+    Returns:
+        float: Average milliseconds per frame.
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        screen.blit(background, (0, 0))
+        if foreground:
+            screen.blit(foreground, foreground_pos)
+    return (time.perf_counter() - start) * 1000 / repeats
+
+def report_blit_times(screen):
+    """
+    Load every level of the level pack and print the time needed to draw its layers.
+
+    Args:
+        screen (Surface): The display surface.
+
+    Returns:
+        dict: Mapping of zero-based level index to average milliseconds per frame.
+    """
+    from levels import LEVEL_DATA, load_level_pack, load_level, level_background, level_foreground
+    load_level_pack()
+    times = {}
+    for index, level in enumerate(LEVEL_DATA):
+        load_level(index)
+        layer = level_foreground(index)
+        times[index] = measure_blit_time(screen, level_background(index), layer, level.foreground_pos)
+        foreground = ""
+        if layer:
+            if layer.get_flags() & pygame.SRCALPHA:
+                alpha = "alpha"
+            elif layer.get_colorkey():
+                alpha = "color-keyed"
+            else:
+                alpha = "opaque"
+            foreground = f" + {alpha} foreground {layer.get_width()}x{layer.get_height()}"
+        print(f"Level {index + 1:2}: {times[index]:.3f} ms (background{foreground})")
+    return times
+
+if __name__ == "__main__":
+    pygame.init()
+    report_blit_times(pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT)))
+    pygame.quit()
@@ -1,5 +1,9 @@
 import pygame
+import json
+import os
+from collections import OrderedDict
 from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from layers import bake_background, bake_foreground, pack_layer, STORAGE_FULL, STORAGE_MODES
 """
 levels.py
 
@@ -10,8 +14,262 @@ Features:
 - Predefined platform layouts for each level.
 - Background images for different levels.
 - Utility functions for extracting platform data from images.
+- On-demand level loading, so importing this module has no side effects.
+- Per-level metadata (physics zones, overlays, hazards, coins and exits) read from a JSON level pack.
+- Load-time classification of platforms as floor, wall, ceiling or slope.
+- Levels split into a thread-safe read step and a display-bound install step, and unloadable again,
+  so levels can be streamed in and out.
+- Level loading split into single decode, bake and extraction steps for time-budgeted loaders.
+- Optional packed storage of level backgrounds and overlays, with only the few layers on screen
+  expanded to the display format.
+- Platform extraction at the layout image's own resolution when it divides the screen evenly.
 """
-pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+LEVEL_PACK_PATH = "assets/levels/pack.json"
+DEFAULT_GRAVITY = 0.8
+DEFAULT_JUMP_SPEED = 7
+DEFAULT_GRAVITY_ROWS = (DEFAULT_GRAVITY,) * SCREEN_HEIGHT
+DEFAULT_JUMP_SPEED_ROWS = (DEFAULT_JUMP_SPEED,) * SCREEN_HEIGHT
+WALKABLE_COLUMNS = (None,) * SCREEN_WIDTH
+
+FLOOR = "floor"
+WALL = "wall"
+CEILING = "ceiling"
+SLOPE = "slope"
+SLOPE_MAX_WIDTH = 9
+
+# Levels on screen at once, one per viewport of the local multi-king mode
+EXPANDED_LAYER_LIMIT = 4
+
+LEVEL_DATA = []
+LEVEL_BACKGROUNDS = []
+LEVEL_PLATFORMS = []
+LEVEL_STORAGE = STORAGE_FULL
+EXPANDED_LAYERS = OrderedDict()
+
+class LevelData:
+    def __init__(self, data):
+        """
+        Build the lookup structures of a level from its metadata.
+
+        Physics zones are expanded into per-row tables, so the per-frame queries are a single list index,
+        and slides into a per-column table read once when the platforms are classified.
+        Levels without physics zones or slides share the default tables.
+
+        Args:
+            data (dict): Parsed level metadata.
+
+        Returns:
+            None
+        """
+        self.background_path = data["background"]
+        self.platforms_path = data["platforms"]
+
+        zones = data.get("physics_zones", [])
+        self.gravity_rows = list(DEFAULT_GRAVITY_ROWS) if zones else DEFAULT_GRAVITY_ROWS
+        self.jump_speed_rows = list(DEFAULT_JUMP_SPEED_ROWS) if zones else DEFAULT_JUMP_SPEED_ROWS
+        for zone in zones:
+            rows = range(max(0, zone["top"]), min(SCREEN_HEIGHT, zone["bottom"]))
+            for row in rows:
+                if "gravity" in zone:
+                    self.gravity_rows[row] = zone["gravity"]
+                if "jump_speed" in zone:
+                    self.jump_speed_rows[row] = zone["jump_speed"]
+
+        slides = data.get("slides", [])
+        self.slide_columns = list(WALKABLE_COLUMNS) if slides else WALKABLE_COLUMNS
+        for slide in slides:
+            for column in range(max(0, slide["left"]), min(SCREEN_WIDTH, slide["right"])):
+                self.slide_columns[column] = slide["direction"]
+
+        snow = data.get("snow")
+        self.snow_mask_path = snow["mask"] if snow else None
+        self.snow_rects = []
+
+        trampolines = data.get("trampolines")
+        self.trampoline_mask_path = trampolines["mask"] if trampolines else None
+        self.trampoline_bounce = trampolines.get("bounce", 17) if trampolines else 0
+        self.trampoline_rects = []
+
+        overlays = data.get("overlays", {})
+        self.weather = overlays.get("weather")
+        self.foreground_path = overlays.get("foreground")
+        self.foreground = None
+        self.foreground_pos = None
+
+        self.hazards = data.get("hazards", [])
+        self.coins = [tuple(pos) for pos in data.get("coins", [])]
+
+        exits = data.get("exits", {})
+        self.exit_top = exits.get("top", True)
+        self.exit_bottom = exits.get("bottom", True)
+        flag = exits.get("flag")
+        self.flag_pole = pygame.Rect(flag["pole"]) if flag else None
+        self.flag_position = tuple(flag["flag_position"]) if flag else None
+
+    def gravity_at(self, y):
+        """
+        Return the gravity acting on the player at a given height.
+
+        Args:
+            y (float): The player's y-coordinate.
+
+        Returns:
+            float: Gravity in pixels per frame squared.
+        """
+        return self.gravity_rows[min(SCREEN_HEIGHT - 1, max(0, int(y)))]
+
+    def jump_speed_at(self, y):
+        """
+        Return the horizontal jump speed available at a given height.
+
+        Args:
+            y (float): The player's y-coordinate.
+
+        Returns:
+            float: Horizontal jump speed in pixels per frame.
+        """
+        return self.jump_speed_rows[min(SCREEN_HEIGHT - 1, max(0, int(y)))]
+
+class Platform(pygame.Rect):
+    __slots__ = ("kind", "direction")
+
+    def __init__(self, rect, kind=FLOOR, direction=0):
+        """
+        Initialize a platform rectangle tagged with its collision role.
+
+        Args:
+            rect (Rect): Position and size of the platform.
+            kind (str): One of FLOOR, WALL, CEILING or SLOPE.
+            direction (int): For slopes, -1 or 1 for the direction the player slides, 0 for a ridge that
+                drops the player off the side they landed on.
+
+        Returns:
+            None
+        """
+        super().__init__(rect)
+        self.kind = kind
+        self.direction = direction
+
+def classify_platforms(rects, slide_columns=WALKABLE_COLUMNS):
+    """
+    Tag every platform rect with its collision role, once, when the level geometry is loaded.
+
+    Narrow columns are slopes where the level's slides cover their centre column, with the slide
+    direction given there, and walls elsewhere. Rects whose whole top is covered by another rect
+    are ceilings, and everything else is a floor.
+
+    Args:
+        rects (list[Rect]): Platform rects as returned by extract_platforms.
+        slide_columns (list): Slide direction of every screen column, None where columns are walkable.
+
+    Returns:
+        list[Platform]: The tagged platforms, in the same order.
+    """
+    by_bottom = {}
+    for rect in rects:
+        by_bottom.setdefault(rect.bottom, []).append(rect)
+
+    platforms = []
+    for rect in rects:
+        if rect.width < SLOPE_MAX_WIDTH:
+            direction = slide_columns[min(SCREEN_WIDTH - 1, max(0, rect.centerx))]
+            kind, direction = (WALL, 0) if direction is None else (SLOPE, direction)
+        elif any(n.left <= rect.left and n.right >= rect.right for n in by_bottom.get(rect.top, [])):
+            kind, direction = CEILING, 0
+        else:
+            kind, direction = FLOOR, 0
+        platforms.append(Platform(rect, kind, direction))
+    return platforms
+
+def load_level_pack(path=LEVEL_PACK_PATH):
+    """
+    Read the level pack manifest and the metadata of every level it lists.
+
+    Only the JSON metadata is read; images are decoded later by load_level.
+
+    Args:
+        path (str): Path to the level pack manifest.
+
+    Returns:
+        None
+    """
+    with open(path, 'r') as pack_file:
+        pack = json.load(pack_file)
+    level_data = []
+    for level_file in pack["levels"]:
+        with open(os.path.join(os.path.dirname(path), level_file), 'r') as data_file:
+            level_data.append(LevelData(json.load(data_file)))
+    LEVEL_DATA[:] = level_data
+    EXPANDED_LAYERS.clear()
+    LEVEL_BACKGROUNDS[:] = [None] * len(level_data)
+    LEVEL_PLATFORMS[:] = [None] * len(level_data)
+
+def set_level_storage(mode):
+    """
+    Choose how level backgrounds and overlays are kept in memory from now on.
+
+    Layers that are already loaded keep their current storage until their level is loaded again.
+
+    Args:
+        mode (str): One of layers.STORAGE_MODES: full display-format surfaces, 8-bit palettized
+            surfaces, or zlib-compressed pixels.
+
+    Returns:
+        None
+    """
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"unknown level storage: {mode}")
+    global LEVEL_STORAGE
+    LEVEL_STORAGE = mode
+
+def expanded_layer(key, layer):
+    """
+    Return a level layer in the display format, expanding it if it is stored packed.
+
+    The layers of the most recently drawn levels are cached, so a layer on screen is expanded only once.
+
+    Args:
+        key (tuple): Cache key of the layer.
+        layer (Surface | PackedLayer): The stored layer, or None.
+
+    Returns:
+        Surface: The layer ready to be drawn, or None.
+    """
+    if layer is None or isinstance(layer, pygame.Surface):
+        return layer
+    surface = EXPANDED_LAYERS.get(key)
+    if surface is None:
+        surface = layer.expand()
+        EXPANDED_LAYERS[key] = surface
+        same_kind = [cached for cached in EXPANDED_LAYERS if cached[0] == key[0]]
+        if len(same_kind) > EXPANDED_LAYER_LIMIT:
+            del EXPANDED_LAYERS[same_kind[0]]
+    EXPANDED_LAYERS.move_to_end(key)
+    return surface
+
+def level_background(index):
+    """
+    Return the background of a resident level, ready to be drawn.
+
+    Args:
+        index (int): Zero-based level index.
+
+    Returns:
+        Surface: Screen-sized display-format background.
+    """
+    return expanded_layer(("background", index), LEVEL_BACKGROUNDS[index])
+
+def level_foreground(index):
+    """
+    Return the foreground overlay of a resident level, ready to be drawn.
+
+    Args:
+        index (int): Zero-based level index.
+
+    Returns:
+        Surface: The cropped overlay to draw at the level's foreground_pos, or None if it has none.
+    """
+    return expanded_layer(("foreground", index), LEVEL_DATA[index].foreground)
 
 def extract_platforms(image_path):
     """
@@ -23,8 +281,40 @@ def extract_platforms(image_path):
     Returns:
         list[pygame.Rect]: A list of pygame.Rect objects representing platform positions and sizes.
     """
-    platform_image = pygame.transform.scale(pygame.image.load(image_path).convert_alpha(), (SCREEN_WIDTH, SCREEN_HEIGHT))
-    platform_mask = pygame.mask.from_surface(platform_image)
+    return image_platforms(pygame.image.load(image_path))
+
+def image_platforms(image):
+    """
+    Extract platform positions from a platform layout image that is already loaded.
+
+    Pixel-art layouts whose size divides the screen evenly are scanned at their own resolution and
+    the rects scaled up, which finds the same rects as scanning the scaled image without building it.
+
+    Args:
+        image (Surface): Platform layout of any size; it is scaled to the screen size.
+
+    Returns:
+        list[pygame.Rect]: A list of pygame.Rect objects representing platform positions and sizes.
+    """
+    width, height = image.get_size()
+    if SCREEN_WIDTH % width == 0 and SCREEN_HEIGHT % height == 0:
+        scale_x, scale_y = SCREEN_WIDTH // width, SCREEN_HEIGHT // height
+        return [
+            pygame.Rect(rect.x * scale_x, rect.y * scale_y, rect.width * scale_x, rect.height * scale_y)
+            for rect in mask_platforms(pygame.mask.from_surface(image))
+        ]
+    return mask_platforms(pygame.mask.from_surface(pygame.transform.scale(image, (SCREEN_WIDTH, SCREEN_HEIGHT))))
+
+def mask_platforms(platform_mask):
+    """
+    Cover the set pixels of a mask with rects, scanning row by row.
+
+    Args:
+        platform_mask (Mask): Mask of the platform pixels; it is cleared in the process.
+
+    Returns:
+        list[pygame.Rect]: Rects in mask pixels.
+    """
     platforms = []
 
     for y in range(platform_mask.get_size()[1]):
@@ -44,12 +334,158 @@ def extract_platforms(image_path):
                         platform_mask.set_at((px, py), 0)
     return platforms
 
-LEVEL_BACKGROUNDS = [
-    pygame.transform.scale(pygame.image.load(f"assets/background/mapa{i + 1}.png"), (SCREEN_WIDTH, SCREEN_HEIGHT)) for i in range(22)
-]
+def is_level_loaded(index):
+    """
+    Check whether the background and platforms of a level are resident.
+
+    Args:
+        index (int): Zero-based level index.
+
+    Returns:
+        bool: True if the level can be drawn and simulated without loading.
+    """
+    return LEVEL_BACKGROUNDS[index] is not None and LEVEL_PLATFORMS[index] is not None
+
+def read_level_geometry(index):
+    """
+    Extract and classify the platforms, snow and trampolines of a single level, without storing them.
+
+    Args:
+        index (int): Zero-based level index.
+
+    Returns:
+        tuple: (platforms, snow rects, trampoline rects).
+    """
+    level = LEVEL_DATA[index]
+    platforms = classify_platforms(extract_platforms(level.platforms_path), level.slide_columns)
+    snow_rects = extract_platforms(level.snow_mask_path) if level.snow_mask_path else []
+    trampoline_rects = extract_platforms(level.trampoline_mask_path) if level.trampoline_mask_path else []
+    return platforms, snow_rects, trampoline_rects
+
+def load_level_geometry(index):
+    """
+    Extract and classify the platforms, snow and trampolines of a single level.
+
+    Does not need a display, so headless simulations can load geometry without any images.
+
+    Args:
+        index (int): Zero-based level index.
+
+    Returns:
+        None
+    """
+    level = LEVEL_DATA[index]
+    if LEVEL_PLATFORMS[index] is None:
+        LEVEL_PLATFORMS[index], level.snow_rects, level.trampoline_rects = read_level_geometry(index)
+
+def load_level(index):
+    """
+    Decode the background, extract the platforms and bake the render layers of a single level.
+
+    Requires an open display, since the render layers are converted to the display format.
+    Levels that are already loaded are left untouched.
+
+    Args:
+        index (int): Zero-based level index.
+
+    Returns:
+        None
+    """
+    for _ in load_level_steps(index):
+        pass
+
+def load_level_steps(index):
+    """
+    Load a level like load_level, one image decode, bake or platform extraction at a time.
+
+    The level only becomes resident after the last step, so a half-loaded level is never simulated.
+
+    Args:
+        index (int): Zero-based level index.
+
+    Yields:
+        None: After every step, so a time-budgeted loader can stop between them.
+    """
+    level = LEVEL_DATA[index]
+    if LEVEL_BACKGROUNDS[index] is None:
+        background = pygame.image.load(level.background_path)
+        yield
+        background = bake_background(background)
+        yield
+        background = pack_layer(background, LEVEL_STORAGE)
+        yield
+        if LEVEL_BACKGROUNDS[index] is None:
+            LEVEL_BACKGROUNDS[index] = background
+    if LEVEL_PLATFORMS[index] is None:
+        platforms = classify_platforms(extract_platforms(level.platforms_path), level.slide_columns)
+        yield
+        snow_rects = extract_platforms(level.snow_mask_path) if level.snow_mask_path else []
+        trampoline_rects = extract_platforms(level.trampoline_mask_path) if level.trampoline_mask_path else []
+        if level.snow_mask_path or level.trampoline_mask_path:
+            yield
+        if LEVEL_PLATFORMS[index] is None:
+            LEVEL_PLATFORMS[index], level.snow_rects, level.trampoline_rects = platforms, snow_rects, trampoline_rects
+    if level.foreground_path and level.foreground is None:
+        foreground = pygame.image.load(level.foreground_path)
+        yield
+        foreground, foreground_pos = bake_foreground(foreground)
+        yield
+        level.foreground, level.foreground_pos = pack_layer(foreground, LEVEL_STORAGE), foreground_pos
+
+def read_level(index):
+    """
+    Decode the images and extract the geometry of a single level, without storing anything.
+
+    Needs no display and touches no shared state, so it can run on a worker thread.
+
+    Args:
+        index (int): Zero-based level index.
+
+    Returns:
+        tuple: (background image, foreground image or None, geometry) for install_level.
+    """
+    level = LEVEL_DATA[index]
+    background = pygame.image.load(level.background_path)
+    foreground = pygame.image.load(level.foreground_path) if level.foreground_path else None
+    return background, foreground, read_level_geometry(index)
+
+def install_level(index, data):
+    """
+    Bake the render layers of a level read by read_level and make the level resident.
+
+    Requires an open display, so it must run on the main thread.
 
-LEVEL_PLATFORMS = [
-    extract_platforms(f"assets/platforms/mapa{i + 1}sama.png") for i in range(22)
-]
+    Args:
+        index (int): Zero-based level index.
+        data (tuple): Result of read_level.
 
+    Returns:
+        None
+    """
+    background, foreground, geometry = data
+    level = LEVEL_DATA[index]
+    LEVEL_BACKGROUNDS[index] = pack_layer(bake_background(background), LEVEL_STORAGE)
+    if foreground is not None:
+        foreground, level.foreground_pos = bake_foreground(foreground)
+        level.foreground = pack_layer(foreground, LEVEL_STORAGE)
+    LEVEL_PLATFORMS[index], level.snow_rects, level.trampoline_rects = geometry
+
+def unload_level(index):
+    """
+    Drop the images and geometry of a level, keeping only its metadata.
 
+    Args:
+        index (int): Zero-based level index.
+
+    Returns:
+        None
+    """
+    level = LEVEL_DATA[index]
+    LEVEL_BACKGROUNDS[index] = None
+    LEVEL_PLATFORMS[index] = None
+    level.snow_rects = []
+    level.trampoline_rects = []
+    level.foreground = None
+    level.foreground_pos = None
+    EXPANDED_LAYERS.pop(("background", index), None)
+    EXPANDED_LAYERS.pop(("foreground", index), None)
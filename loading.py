@@ -0,0 +1,148 @@
+import time
+"""
+loading.py
+
+This module implements staged asset loading for the King's Trial game.
+Assets are registered as named stages and loaded one by one, so the window can show
+a progress bar instead of staying black while everything is decoded.
+
+Features:
+- Required stages that must finish before the player can interact.
+- Optional stages that are loaded incrementally between frames within a time budget.
+- Stages split into small units by generator functions, so a single stage never overruns the budget by much.
+- On-demand loading of a single stage when the game needs it earlier than scheduled.
+"""
+class AssetLoader:
+    def __init__(self):
+        """
+        Initialize an empty loader.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.stages = []
+        self.done = set()
+        self.running = {}
+
+    def add_stage(self, name, load_function, required=False):
+        """
+        Register a loading stage.
+
+        Args:
+            name (str): Unique stage name, also shown on the loading screen.
+            load_function (callable): Function without arguments that loads the assets, or a generator
+                function that yields after every unit of work, so step() can stop between units.
+            required (bool): Whether the stage must finish before the first interactive frame.
+
+        Returns:
+            None
+        """
+        self.stages.append((name, load_function, required))
+
+    @property
+    def progress(self):
+        """
+        Fraction of registered stages that have finished loading.
+
+        Returns:
+            float: Value between 0 and 1.
+        """
+        if not self.stages:
+            return 1.0
+        return len(self.done) / len(self.stages)
+
+    @property
+    def finished(self):
+        """
+        Whether every registered stage has been loaded.
+
+        Returns:
+            bool: True if nothing is left to load.
+        """
+        return len(self.done) == len(self.stages)
+
+    def load(self, name):
+        """
+        Run a single stage immediately if it has not been loaded yet.
+
+        Args:
+            name (str): Name of the stage to load.
+
+        Returns:
+            None
+        """
+        if name in self.done:
+            return
+        for _ in self.units(name):
+            pass
+
+    def units(self, name):
+        """
+        Iterate over the remaining units of work of a stage, marking it done after the last one.
+
+        A stage that a previous step() left half-loaded carries on where it stopped.
+
+        Args:
+            name (str): Name of the stage.
+
+        Returns:
+            Iterator: Yields after every unit of work.
+        """
+        units = self.running.get(name)
+        if units is None:
+            load_function = next((stage[1] for stage in self.stages if stage[0] == name), None)
+            if load_function is None:
+                return
+            units = load_function()
+            if not hasattr(units, "__next__"):
+                self.done.add(name)
+                return
+            self.running[name] = units
+        for _ in units:
+            yield
+        self.running.pop(name, None)
+        self.done.add(name)
+
+    def run_required(self, on_progress=None):
+        """
+        Load all required stages, reporting progress after each one.
+
+        Args:
+            on_progress (callable): Optional callback receiving the upcoming stage name and the progress fraction.
+
+        Returns:
+            None
+        """
+        for name, _, required in self.stages:
+            if required and name not in self.done:
+                if on_progress:
+                    on_progress(name, self.progress)
+                self.load(name)
+        if on_progress:
+            on_progress("", self.progress)
+
+    def step(self, budget_ms=4):
+        """
+        Load units of pending stages until the time budget for this frame is used up.
+
+        The budget is checked after every unit, and at least one unit is loaded per call, so
+        loading always makes progress.
+
+        Args:
+            budget_ms (float): Time budget in milliseconds.
+
+        Returns:
+            None
+        """
+        deadline = time.perf_counter() + budget_ms / 1000
+        for name, _, _ in self.stages:
+            if name in self.done:
+                continue
+            for _ in self.units(name):
+                if time.perf_counter() >= deadline:
+                    return
+            if time.perf_counter() >= deadline:
+                return
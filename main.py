@@ -1,7 +1,13 @@
+import argparse
+import os
 import pygame
 import sys
-from game_engine import *
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from game_engine import Game
+from layers import STORAGE_MODES
+from game_clock import MIN_TIME_SCALE, MAX_TIME_SCALE
+from capture import CAPTURE_FORMATS
+from levels import LEVEL_PACK_PATH
+from race import RaceClient, RACE_PORT
 """
 main.py
 
@@ -12,13 +18,74 @@ Features:
 - Game initialization and setup.
 - Main loop for event handling, state updates, and rendering.
 - Integration with the Game class for managing game logic.
+- Command line options for the internal resolution, window size, fullscreen mode, vsync, adaptive quality,
+  the continuous tower, joining a race, local multi-king games, the level storage mode, the time scale,
+  video capture and the level pack.
 """
-pygame.init()
-        
-pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+def parse_window_size(text):
+    """
+    Parse a window size given as WIDTHxHEIGHT.
+
+    Args:
+        text (str): Window size, e.g. "1600x1600".
+
+    Returns:
+        tuple: (width, height) in pixels.
+    """
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+def parse_server(text):
+    """
+    Parse a race server address given as HOST or HOST:PORT.
+
+    Args:
+        text (str): Server address, e.g. "localhost:7777".
+
+    Returns:
+        tuple: (host, port).
+    """
+    host, _, port = text.rpartition(":") if ":" in text else (text, "", "")
+    return host, int(port) if port else RACE_PORT
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="King's Trial")
+    parser.add_argument("--render-scale", type=float, default=1.0,
+                        help="internal resolution as a fraction of 800x800, e.g. 0.5 or 0.125 for native pixel art")
+    parser.add_argument("--window", type=parse_window_size, default=None, help="window size, e.g. 1600x1600")
+    parser.add_argument("--fullscreen", action="store_true", help="start in fullscreen mode (toggle with F11)")
+    parser.add_argument("--vsync", action="store_true", help="synchronize frames with the monitor refresh")
+    parser.add_argument("--fixed-quality", action="store_true",
+                        help="keep all effects and the resolution even when frames take too long")
+    parser.add_argument("--continuous", action="store_true",
+                        help="show the tower as one continuous world with a scrolling camera")
+    parser.add_argument("--race", type=parse_server, default=None, metavar="HOST[:PORT]",
+                        help="join a race on a server started with race.py")
+    parser.add_argument("--name", default="King", help="name shown to the other players of a race")
+    parser.add_argument("--kings", type=int, default=1, choices=range(1, 5),
+                        help="number of local players sharing the keyboard")
+    parser.add_argument("--level-storage", choices=STORAGE_MODES, default=STORAGE_MODES[0],
+                        help="keep off-screen level images palettized or compressed to save memory")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="game speed, e.g. 0.5 for slow motion or 8 for turbo (runs at other speeds cannot verify)")
+    parser.add_argument("--capture", choices=CAPTURE_FORMATS, default=None,
+                        help="capture video from the start as a PNG sequence or a raw stream (toggle with F9)")
+    parser.add_argument("--pack", default=LEVEL_PACK_PATH,
+                        help="level pack manifest to play, e.g. generated/tower-7/pack.json from tower_generator.py")
+    args = parser.parse_args()
+    if args.kings > 1 and args.continuous:
+        parser.error("--kings cannot be combined with --continuous")
+    if not MIN_TIME_SCALE <= args.time_scale <= MAX_TIME_SCALE:
+        parser.error(f"--time-scale must be between {MIN_TIME_SCALE:g} and {MAX_TIME_SCALE:g}")
+
+    # Render at the monitor's real resolution instead of letting Windows stretch the window on HiDPI screens.
+    os.environ.setdefault("SDL_WINDOWS_DPI_AWARENESS", "permonitorv2")
+    pygame.init()
+    race = RaceClient(*args.race, args.name) if args.race else None
+    game = Game(
+        args.render_scale, args.window, args.fullscreen, args.vsync, not args.fixed_quality, args.continuous, race,
+        args.kings, args.level_storage, args.time_scale, args.capture, args.pack
+    )
     game.run()
     pygame.quit()
-    sys.exit()
\ No newline at end of file
+    sys.exit()
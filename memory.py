@@ -0,0 +1,239 @@
+import argparse
+import sys
+import pygame
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from layers import PackedLayer, surface_bytes, STORAGE_MODES
+from levels import (
+    LEVEL_DATA, LEVEL_BACKGROUNDS, LEVEL_PLATFORMS, EXPANDED_LAYERS, load_level_pack, load_level, unload_level,
+    set_level_storage,
+)
+"""
+memory.py
+
+This module reports the resident memory of the King's Trial game, broken down by category, so the
+footprint can be checked against the small RAM of kiosk and handheld targets.
+
+Features:
+- Surface memory of level backgrounds and overlays in their storage mode, of the layers expanded for
+  drawing, and of the menu images, UI caches, player sprites, practice previews and framebuffers.
+- Geometry memory of the platform, snow and trampoline rects, the per-row physics tables and the grid
+  of the continuous tower.
+- Array memory of the snowflake and projectile pools, and of the frame buffers of a running video capture.
+- Report of a running game from developer mode (M), or of every level resident in each storage mode,
+  run with `python memory.py`.
+"""
+SURFACES = "surfaces"
+GEOMETRY = "geometry"
+ARRAYS = "arrays"
+
+def layer_bytes(layer):
+    """
+    Return the memory of a level layer in whatever form it is stored.
+
+    Args:
+        layer (Surface | PackedLayer): The layer, or None.
+
+    Returns:
+        int: Size in bytes.
+    """
+    if layer is None:
+        return 0
+    if isinstance(layer, PackedLayer):
+        return layer.nbytes
+    return surface_bytes(layer)
+
+def find_surfaces(value, found):
+    """
+    Collect the surfaces held by a value directly or in nested lists, tuples and dicts.
+
+    Args:
+        value: The value to search.
+        found (dict): Surfaces found so far, keyed by id so shared surfaces count once.
+
+    Returns:
+        dict: The found surfaces.
+    """
+    if isinstance(value, pygame.Surface):
+        found[id(value)] = value
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            find_surfaces(item, found)
+    elif isinstance(value, dict):
+        for item in value.values():
+            find_surfaces(item, found)
+    return found
+
+def object_surfaces(obj, exclude=()):
+    """
+    Return the surfaces an object holds in its attributes, without descending into other objects.
+
+    Args:
+        obj: The object to search.
+        exclude (tuple[str]): Attribute names to skip, because they are reported separately.
+
+    Returns:
+        list[Surface]: The surfaces, each once.
+    """
+    found = {}
+    for name, value in vars(obj).items():
+        if name not in exclude:
+            find_surfaces(value, found)
+    return list(found.values())
+
+def ui_surfaces(screens):
+    """
+    Collect the cached surfaces of UI screens: their compositions and the rendered images of their widgets.
+
+    Args:
+        screens (list[UIScreen]): The screens, None entries being skipped.
+
+    Returns:
+        dict: The surfaces, keyed by id so shared surfaces count once.
+    """
+    found = {}
+    for screen in screens:
+        if screen is None:
+            continue
+        if screen.composed is not None:
+            found[id(screen.composed)] = screen.composed
+        for widget in screen.widgets:
+            if widget.surface is not None:
+                found[id(widget.surface)] = widget.surface
+    return found
+
+def rect_bytes(rects):
+    """
+    Return the memory of a list of rects, including the list itself.
+
+    Args:
+        rects (list[Rect]): The rects.
+
+    Returns:
+        int: Size in bytes.
+    """
+    return sys.getsizeof(rects) + sum(sys.getsizeof(rect) for rect in rects)
+
+def level_report():
+    """
+    Measure the memory of the level pack: stored layers, expanded layers and geometry.
+
+    Returns:
+        dict: Mapping of category name to (kind, item count, bytes), kind being SURFACES or GEOMETRY.
+    """
+    backgrounds = [layer for layer in LEVEL_BACKGROUNDS if layer is not None]
+    foregrounds = [level.foreground for level in LEVEL_DATA if level.foreground is not None]
+    platforms = [platforms for platforms in LEVEL_PLATFORMS if platforms is not None]
+    zones = [level.snow_rects for level in LEVEL_DATA] + [level.trampoline_rects for level in LEVEL_DATA]
+    tables = {id(rows): rows for level in LEVEL_DATA for rows in (level.gravity_rows, level.jump_speed_rows)}
+    return {
+        "level backgrounds": (SURFACES, len(backgrounds), sum(layer_bytes(layer) for layer in backgrounds)),
+        "level overlays": (SURFACES, len(foregrounds), sum(layer_bytes(layer) for layer in foregrounds)),
+        "expanded layers": (
+            SURFACES, len(EXPANDED_LAYERS), sum(surface_bytes(surface) for surface in EXPANDED_LAYERS.values())
+        ),
+        "platform rects": (GEOMETRY, sum(map(len, platforms)), sum(map(rect_bytes, platforms))),
+        "snow and trampoline rects": (GEOMETRY, sum(map(len, zones)), sum(map(rect_bytes, zones))),
+        "physics tables": (GEOMETRY, len(tables), sum(map(sys.getsizeof, tables.values()))),
+    }
+
+def memory_report(game=None):
+    """
+    Measure the resident memory by category.
+
+    Args:
+        game (Game): A running game, whose images, framebuffers and pools are included if given.
+
+    Returns:
+        dict: Mapping of category name to (kind, item count, bytes), kind being SURFACES, GEOMETRY or ARRAYS.
+    """
+    report = level_report()
+    if game is None:
+        return report
+
+    images = object_surfaces(game, exclude=("practice_previews",))
+    previews = list(game.practice_previews.values())
+    sprites = object_surfaces(game.player)
+    framebuffers = [game.display.frame] if game.display.frame is not None else []
+    framebuffers += list(game.screen.scaled_images.values())
+    screens = (game.menu_ui, game.pause_ui, game.death_ui, game.ending_ui, game.hud_ui)
+    # Image widgets show images the game already holds, which are counted above.
+    loaded = {id(image) for image in images}
+    caches = [surface for key, surface in ui_surfaces(screens).items() if key not in loaded]
+    report["menu and HUD images"] = (SURFACES, len(images), sum(map(surface_bytes, images)))
+    report["UI caches"] = (SURFACES, len(caches), sum(map(surface_bytes, caches)))
+    report["practice previews"] = (SURFACES, len(previews), sum(map(surface_bytes, previews)))
+    report["player sprites"] = (SURFACES, len(sprites), sum(map(surface_bytes, sprites)))
+    report["framebuffers"] = (SURFACES, len(framebuffers), sum(map(surface_bytes, framebuffers)))
+
+    snow = game.snow
+    flakes = snow.surfaces or []
+    snow_arrays = (snow.x, snow.y, snow.sway_phase, snow.fall_speed, snow.wind_factor)
+    report["snowflakes"] = (
+        ARRAYS, len(snow.x), sum(array.nbytes for array in snow_arrays) + sum(map(surface_bytes, flakes))
+    )
+    pool = game.projectiles.pool
+    bullets = game.projectiles.surfaces
+    report["projectiles"] = (
+        ARRAYS, pool.capacity, sum(array.nbytes for array in pool.arrays) + sum(map(surface_bytes, bullets))
+    )
+
+    if game.capture:
+        report["capture buffers"] = (ARRAYS, len(game.capture.buffers), game.capture.memory)
+
+    if game.world:
+        cells = game.world.index.cells
+        report["tower grid"] = (
+            GEOMETRY, len(cells), sys.getsizeof(cells) + sum(sys.getsizeof(cell) for cell in cells.values())
+        )
+    return report
+
+def print_memory_report(report):
+    """
+    Print a memory report as a table with a total per kind.
+
+    Args:
+        report (dict): Result of memory_report.
+
+    Returns:
+        None
+    """
+    for kind in (SURFACES, GEOMETRY, ARRAYS):
+        rows = [(name, count, size) for name, (row_kind, count, size) in report.items() if row_kind == kind]
+        if not rows:
+            continue
+        for name, count, size in rows:
+            print(f"{name:28} {count:7} {size / 1024:10.1f} KB")
+        print(f"{'total ' + kind:28} {'':7} {sum(size for _, _, size in rows) / 1024:10.1f} KB")
+
+def report_storage_modes(modes=STORAGE_MODES):
+    """
+    Load every level of the level pack in each storage mode and print the resulting memory report.
+
+    Args:
+        modes (tuple[str]): Storage modes to compare.
+
+    Returns:
+        dict: Mapping of storage mode to its memory report.
+    """
+    load_level_pack()
+    reports = {}
+    for mode in modes:
+        set_level_storage(mode)
+        for index in range(len(LEVEL_DATA)):
+            unload_level(index)
+            load_level(index)
+        reports[mode] = memory_report()
+        print(f"Storage '{mode}', {len(LEVEL_DATA)} levels resident:")
+        print_memory_report(reports[mode])
+        print()
+    return reports
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report the memory of King's Trial levels in each storage mode")
+    parser.add_argument("--storage", choices=STORAGE_MODES, action="append",
+                        help="storage mode to report, may be given more than once (default: all)")
+    args = parser.parse_args()
+    pygame.init()
+    pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    report_storage_modes(tuple(args.storage or STORAGE_MODES))
+    pygame.quit()
@@ -0,0 +1,337 @@
+import math
+import pygame
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, WHITE, BLACK
+from display import Canvas
+from levels import LEVEL_DATA, LEVEL_PLATFORMS, level_background, level_foreground
+from player import Player
+from projectiles import ProjectileSystem
+from simulation import step_gameplay, input_keys
+from world import GeometryIndex
+"""
+multi_king.py
+
+This module implements the local multi-king mode of the King's Trial game.
+Two to four players share one keyboard, each controlling a king in the same tower. Kings on
+the same level share a viewport; when they are spread over several levels the screen is split
+into one viewport per level.
+
+Features:
+- Per-king controls, gameplay state and finish times, advanced by the shared gameplay tick.
+- One hazard system per occupied level, advanced once per tick and hit-tested against every king on it.
+- One batched collision pass per tick: one geometry index query per occupied level, shared by every
+  king on it, instead of every king scanning the level's full platform list.
+- Level backgrounds and overlays drawn once per viewport, however many kings it shows.
+- Split-screen viewports drawn through their own canvases at half size, reusing the downscaled images.
+"""
+# (left, right, jump) keys per king
+KING_CONTROLS = [
+    (pygame.K_a, pygame.K_d, pygame.K_SPACE),
+    (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP),
+    (pygame.K_j, pygame.K_l, pygame.K_i),
+    (pygame.K_KP4, pygame.K_KP6, pygame.K_KP8),
+]
+KING_COLORS = [(235, 200, 60), (90, 170, 240), (230, 90, 90), (120, 210, 110)]
+KING_NAMES = ["P1", "P2", "P3", "P4"]
+
+class LevelHazards:
+    def __init__(self):
+        """
+        Initialize a king's view of the hazards of the level it is on.
+
+        The level's projectile system is shared by every king on the level and advanced once per tick
+        by LocalMultiplayer, so the gameplay tick of a king only tests the projectiles against it.
+
+        Returns:
+            None
+        """
+        self.system = None
+
+    def set_level(self, level, now):
+        """
+        Do nothing: the shared system of the level is switched by LocalMultiplayer before the tick.
+
+        Args:
+            level (int): Zero-based index of the king's level.
+            now (int): Current time in milliseconds.
+
+        Returns:
+            None
+        """
+
+    def update(self, now, player_rect):
+        """
+        Test the projectiles of the level, already advanced this tick, against the king.
+
+        Args:
+            now (int): Current time in milliseconds.
+            player_rect (Rect): The king's hitbox.
+
+        Returns:
+            tuple: Knockback (x_velocity, y_velocity) to apply to the king, or None if nothing hit.
+        """
+        return self.system.hit(player_rect)
+
+class King:
+    def __init__(self, index, sounds, tick_time):
+        """
+        Initialize a king at the bottom of the tower, with the state the gameplay tick advances.
+
+        Args:
+            index (int): Zero-based player number.
+            sounds (SoundBank): Sound bank for the king's sound effects.
+            tick_time (float): Timestamp the king's timer starts at.
+
+        Returns:
+            None
+        """
+        self.index = index
+        self.controls = KING_CONTROLS[index]
+        self.player = Player(SCREEN_WIDTH // 2 + (index - 1.5) * 60, SCREEN_HEIGHT - 60, sounds)
+        if index % 2:
+            self.player.update_skin(1)
+        self.player.time_source = self.get_tick_time
+        self.current_level = 0
+        self.developer_mode = False
+        self.world = None
+        self.projectiles = LevelHazards()
+        self.tick_time = tick_time
+        self.start_time = tick_time
+        self.flag_position = next((data.flag_position for data in LEVEL_DATA if data.flag_position), None)
+        self.flag_moving = False
+        self.flag_raised = False
+        self.flag_raised_time = None
+        self.timer_stopped = False
+        self.final_time = None
+
+    def get_tick_time(self):
+        """
+        Return the timestamp of the current tick. Used as the king's time source.
+
+        Returns:
+            float: Tick timestamp in seconds.
+        """
+        return self.tick_time
+
+    def trigger_death(self):
+        """
+        Send a king that ran out of health back to the bottom of the tower with full health.
+
+        Returns:
+            None
+        """
+        player = self.player
+        player.x, player.y = SCREEN_WIDTH // 2, SCREEN_HEIGHT - 60
+        player.x_velocity = player.y_velocity = 0
+        player.current_health = player.max_health
+        player.fall_start_time = None
+        self.current_level = 0
+
+    def keys(self, held):
+        """
+        Translate the held keys into the gameplay keys of this king.
+
+        Args:
+            held (Sequence[bool]): Keyboard state indexed by pygame key codes.
+
+        Returns:
+            dict: Gameplay key snapshot, as built by input_keys.
+        """
+        left, right, jump = self.controls
+        return input_keys(held[left], held[right], held[jump])
+
+class LocalMultiplayer:
+    def __init__(self, count, sounds, emitters, tick_time):
+        """
+        Initialize a game of several kings starting together at the bottom of the tower.
+
+        Args:
+            count (int): Number of kings, from 2 to 4.
+            sounds (SoundBank): Sound bank for the kings' sound effects.
+            emitters (list): Hazard emitters per level, as built by build_level_emitters.
+            tick_time (float): Timestamp the game starts at.
+
+        Returns:
+            None
+        """
+        self.kings = [King(index, sounds, tick_time) for index in range(count)]
+        self.emitters = emitters
+        self.hazards = {}
+        self.index = GeometryIndex()
+        self.winner = None
+        self.canvases = {}
+        self.canvas_target = None
+        self.labels = None
+        self.banner = None
+
+    def handle_event(self, event, timestamp):
+        """
+        Start or release the jump of the king whose jump key the event belongs to.
+
+        Args:
+            event (Event): A pygame event.
+            timestamp (float): When the event happened.
+
+        Returns:
+            None
+        """
+        if event.type not in (pygame.KEYDOWN, pygame.KEYUP):
+            return
+        for king in self.kings:
+            if event.key != king.controls[2]:
+                continue
+            if event.type == pygame.KEYDOWN:
+                king.player.start_jump(timestamp)
+            else:
+                king.player.release_jump(king.current_level, timestamp)
+                king.player.reset_jump()
+
+    def levels(self):
+        """
+        Return the occupied levels, in the order of the first king on each.
+
+        Returns:
+            list[int]: Zero-based level indices.
+        """
+        return list(dict.fromkeys(king.current_level for king in self.kings))
+
+    def step(self, tick_time, held, load_level):
+        """
+        Advance every king by one tick in a single batched pass.
+
+        The kings on a level share one index query covering all their columns; each king then keeps
+        the platforms within its own reach, which are exactly the ones it can touch this tick.
+        The level's projectiles are advanced once, then tested against each king on it. A level's
+        hazards start over when every king has left it, as they do for a single king.
+
+        Args:
+            tick_time (float): Timestamp of the tick.
+            held (Sequence[bool]): Keyboard state indexed by pygame key codes.
+            load_level (Callable[[int], None]): Makes a level resident.
+
+        Returns:
+            None
+        """
+        reaches = {}
+        for king in self.kings:
+            level = king.current_level
+            if level not in self.index.slices:
+                load_level(level)
+                self.index.add_slice(level, LEVEL_PLATFORMS[level])
+            player = king.player
+            reach = abs(player.x_velocity)
+            reaches.setdefault(level, []).append((king, player.x - reach, player.x + player.width + reach))
+
+        now = int(tick_time * 1000)
+        for level, group in reaches.items():
+            system = self.hazards.get(level)
+            if system is None:
+                system = self.hazards[level] = ProjectileSystem(self.emitters)
+                system.set_level(level, now)
+            system.advance(now)
+            candidates = self.index.column_platforms(
+                level, min(left for _, left, _ in group), max(right for _, _, right in group)
+            )
+            for king, left, right in group:
+                # Same bounds as GeometryIndex.column_platforms, so the result does not depend on the batch.
+                low, high = math.floor(left) - 1, math.ceil(right) + 1
+                platforms = [platform for platform in candidates if platform.right > low and platform.left < high]
+                king.tick_time = tick_time
+                king.projectiles.system = system
+                if step_gameplay(king, king.keys(held), platforms) and self.winner is None:
+                    self.winner = king
+                    self.banner = None
+        occupied = self.levels()
+        for level in list(self.hazards):
+            if level not in occupied:
+                del self.hazards[level]
+
+    def layout(self, count):
+        """
+        Return the viewport rectangles for a number of occupied levels, in gameplay coordinates.
+
+        Args:
+            count (int): Number of viewports.
+
+        Returns:
+            list[Rect]: One rectangle per viewport.
+        """
+        if count == 1:
+            return [pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)]
+        half_width, half_height = SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2
+        if count == 2:
+            return [pygame.Rect(0, half_height // 2, half_width, half_height),
+                    pygame.Rect(half_width, half_height // 2, half_width, half_height)]
+        return [pygame.Rect(column * half_width, row * half_height, half_width, half_height)
+                for row in range(2) for column in range(2)][:count]
+
+    def viewport_canvas(self, screen, rect):
+        """
+        Return the canvas that draws a full level into a viewport of the frame.
+
+        Args:
+            screen (Canvas): The game's full-frame canvas.
+            rect (Rect): Viewport in gameplay coordinates.
+
+        Returns:
+            Canvas: Canvas drawing in gameplay coordinates, scaled to fit the viewport.
+        """
+        if rect.size == (SCREEN_WIDTH, SCREEN_HEIGHT):
+            return screen
+        if self.canvas_target is not screen.target or self.canvases.get("scale") != screen.scale:
+            self.canvases = {"scale": screen.scale}
+            self.canvas_target = screen.target
+        canvas = self.canvases.get(tuple(rect))
+        if canvas is None:
+            area = pygame.Rect(screen.scale_rect(tuple(rect))).clip(screen.target.get_rect())
+            canvas = Canvas(screen.target.subsurface(area), screen.scale * rect.width / SCREEN_WIDTH)
+            self.canvases[tuple(rect)] = canvas
+        return canvas
+
+    def draw(self, screen, get_font, flag_image=None):
+        """
+        Draw one viewport per occupied level, each with its background and overlay drawn once.
+
+        Args:
+            screen (Canvas): The game's full-frame canvas.
+            get_font (Callable[[int], Font]): Returns the game font at a size.
+            flag_image (Surface): Image of the flag, if loaded.
+
+        Returns:
+            None
+        """
+        if self.labels is None:
+            font = get_font(20)
+            self.labels = [font.render(name, True, color) for name, color in zip(KING_NAMES, KING_COLORS)]
+        levels = self.levels()
+        rects = self.layout(len(levels))
+        if len(levels) > 1:
+            screen.fill(BLACK)
+        for level, rect in zip(levels, rects):
+            canvas = self.viewport_canvas(screen, rect)
+            kings = [king for king in self.kings if king.current_level == level]
+            canvas.blit(level_background(level), (0, 0))
+            if level in self.hazards:
+                self.hazards[level].draw(canvas)
+            if flag_image is not None and LEVEL_DATA[level].flag_pole:
+                for king in kings:
+                    if king.flag_moving:
+                        canvas.blit(flag_image, king.flag_position)
+            for king in kings:
+                king.player.draw(canvas)
+            data = LEVEL_DATA[level]
+            if data.foreground:
+                canvas.blit(level_foreground(level), data.foreground_pos)
+            for king in kings:
+                player = king.player
+                player.draw_health_bar(canvas)
+                label = self.labels[king.index]
+                canvas.blit(label, (player.x + player.width // 2 - label.get_width() // 2, player.y - 44))
+            if len(levels) > 1:
+                screen.draw_rect(WHITE, rect, 2)
+
+        if self.winner is not None:
+            if self.banner is None:
+                minutes, seconds = divmod(self.winner.final_time, 60)
+                text = f"{KING_NAMES[self.winner.index]} reached the flag in {int(minutes):02}:{seconds:05.2f}!"
+                self.banner = get_font(30).render(text, True, KING_COLORS[self.winner.index])
+            screen.blit(self.banner, (SCREEN_WIDTH // 2 - self.banner.get_width() // 2, 10))
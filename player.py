@@ -2,7 +2,6 @@ import pygame
 import time
 import os
 from constants import *
-from game_engine import *
 from levels import *
 """
 player.py
@@ -18,14 +17,22 @@ Features:
 - Developer mode for free movement and debugging.
 """
 class Player:
-    def __init__(self, x, y, sounds):
+    # Attributes that carry gameplay state from one tick to the next, stored in replays.
+    STATE_ATTRIBUTES = (
+        "x", "y", "x_velocity", "y_velocity", "grounded", "jump_force", "holding_jump", "jump_start_time",
+        "jump_allowed", "jump_direction", "playing_fall_impact", "fall_start_time", "fall_counter",
+        "jump_count", "has_landed", "current_health",
+    )
+
+    def __init__(self, x, y, sounds, headless=False):
         """
         Initialize the player with position, dimensions, velocities, and other attributes.
 
         Args:
             x (int): Initial x-coordinate of the player.
             y (int): Initial y-coordinate of the player.
-            sounds (dict): Dictionary containing sound effects for various player actions.
+            sounds (SoundBank): Sound bank used to play sound effects for player actions.
+            headless (bool): Skip loading images, for simulations without a display.
 
         Returns:
             None
@@ -39,6 +46,7 @@ class Player:
         self.y_velocity = 0
         self.grounded = False
         self.sounds = sounds
+        self.time_source = time.time
         self.jump_force = 10
         self.gravity = 0.8
         self.holding_jump = False
@@ -55,21 +63,47 @@ class Player:
         self.max_health = 100
         self.current_health = 100
         self.health_bar_width = 50
-        self.health_bar_image = pygame.transform.scale(
-            pygame.image.load("assets/other/health_bar.png").convert_alpha(), (self.health_bar_width, 12)
-        )
+        self.health_bar_image = None
 
         self.walk_frames = []
         self.jump_charge_frame = None
         self.fall_frame = None
+        self.image = None
 
         self.current_walk_frame = 0
         self.walk_animation_speed = 0.1
         self.walk_animation_counter = 0
 
-        self.update_skin(0)
+        if not headless:
+            self.health_bar_image = pygame.transform.scale(
+                pygame.image.load("assets/other/health_bar.png").convert_alpha(), (self.health_bar_width, 12)
+            )
+            self.update_skin(0)
         self.facing_right = True
 
+    def get_state(self):
+        """
+        Return the player's gameplay state.
+
+        Returns:
+            dict: Mapping of every attribute in STATE_ATTRIBUTES to its value.
+        """
+        return {name: getattr(self, name) for name in self.STATE_ATTRIBUTES}
+
+    def set_state(self, state):
+        """
+        Restore gameplay state returned by get_state().
+
+        Args:
+            state (dict): Mapping of attribute names to values. Unknown names are ignored.
+
+        Returns:
+            None
+        """
+        for name in self.STATE_ATTRIBUTES:
+            if name in state:
+                setattr(self, name, state[name])
+
     def handle_input(self, keys, current_level):
         """
         Handle user input for player movement and jumping.
@@ -83,7 +117,8 @@ class Player:
         if self.playing_fall_impact:
             if keys[pygame.K_a] or keys[pygame.K_d]:
                 self.playing_fall_impact = False
-                self.image = self.walk_frames[0]
+                if self.walk_frames:
+                    self.image = self.walk_frames[0]
             if keys[pygame.K_SPACE]:
                 self.playing_fall_impact = False
                 self.jump(current_level)
@@ -130,42 +165,50 @@ class Player:
 
         self.image = self.walk_frames[0]
 
-    def start_jump(self):
+    def start_jump(self, timestamp=None):
         """
         Start charging a jump when the jump key is pressed.
 
+        Args:
+            timestamp (float): When the key was pressed, defaults to the current time.
+
         Returns:
             None
         """
         if self.grounded and self.jump_allowed:
             self.holding_jump = True
-            self.jump_start_time = time.time()
+            self.jump_start_time = timestamp if timestamp is not None else self.time_source()
 
-    def release_jump(self, current_level):
+    def release_jump(self, current_level, timestamp=None):
         """
         Release the jump key and execute a jump based on the charged force.
 
         Args:
             current_level (int): The current level in the game to determine jump constraints.
+            timestamp (float): When the key was released, defaults to the current time.
 
         Returns:
             None
         """
         if self.holding_jump and self.jump_allowed:
-            self.calculate_jump_force()
-            self.jump(current_level)
+            self.calculate_jump_force(timestamp)
+            self.jump(current_level, timestamp)
             self.holding_jump = False
             self.jump_allowed = False
 
-    def calculate_jump_force(self):
+    def calculate_jump_force(self, timestamp=None):
         """
         Calculate the jump force based on the duration the jump key was held.
 
+        Args:
+            timestamp (float): When the charge ended, defaults to the current time.
+
         Returns:
             None
         """
         if self.jump_start_time:
-            held_time = min(0.8, time.time() - self.jump_start_time)
+            now = timestamp if timestamp is not None else self.time_source()
+            held_time = min(0.8, max(0, now - self.jump_start_time))
             self.jump_force = 5 + held_time * 20
 
     def auto_jump(self, current_level):
@@ -178,7 +221,7 @@ class Player:
         Returns:
             None
         """
-        if self.holding_jump and time.time() - self.jump_start_time >= 1.0:
+        if self.holding_jump and self.time_source() - self.jump_start_time >= 1.0:
             self.calculate_jump_force()
             self.jump(current_level)
             self.holding_jump = False
@@ -193,27 +236,27 @@ class Player:
         """
         self.jump_allowed = True
 
-    def jump(self, current_level):
+    def jump(self, current_level, timestamp=None):
         """
         Execute a jump with calculated velocity and apply jump direction.
 
         Args:
             current_level (int): The current level in the game to determine jump constraints.
+            timestamp (float): When the jump key was released, defaults to the current time.
 
         Returns:
             None
         """
         if self.grounded:
             self.jump_count += 1
-            held_time = min(1.0, time.time() - self.jump_start_time)
+            now = timestamp if timestamp is not None else self.time_source()
+            held_time = min(1.0, now - self.jump_start_time)
             self.y_velocity = -self.jump_force
-            max_speed = 7 if (
-                current_level not in [17, 18] and (current_level != 19 or self.y >= 530)
-            ) else 3
+            max_speed = LEVEL_DATA[current_level].jump_speed_at(self.y)
             min_speed = max_speed
             self.x_velocity = self.jump_direction * (max_speed - held_time * (max_speed - min_speed))
             self.grounded = False
-            self.sounds["jump"].play()
+            self.sounds.play("jump")
 
     def apply_fall_damage(self, fall_duration):
         """
@@ -235,7 +278,7 @@ class Player:
         Draw the health bar above the player.
 
         Args:
-            screen (Surface): The pygame screen where the health bar is drawn.
+            screen (Canvas): The canvas where the health bar is drawn.
 
         Returns:
             None
@@ -246,8 +289,8 @@ class Player:
         health_ratio = self.current_health / self.max_health
         top_rect = pygame.Rect(bar_x + 4, bar_y + 2, int(health_ratio * 44), 4)
         bottom_rect = pygame.Rect(bar_x + 4, bar_y + 6, int(health_ratio * 44), 4)
-        pygame.draw.rect(screen, (214, 48, 40), top_rect)
-        pygame.draw.rect(screen, (134, 25, 18), bottom_rect)
+        screen.draw_rect((214, 48, 40), top_rect)
+        screen.draw_rect((134, 25, 18), bottom_rect)
 
     def start_fall(self):
         """
@@ -256,21 +299,21 @@ class Player:
         Returns:
             None
         """
-        self.fall_start_time = time.time()
+        self.fall_start_time = self.time_source()
 
-    def developer_mode(self, developer_mode):
+    def developer_mode(self, developer_mode, keys):
         """
         Enable developer mode, allowing free movement without collision constraints.
 
         Args:
             developer_mode (bool): Whether developer mode is enabled.
+            keys (Sequence[bool]): Keyboard snapshot of the tick.
 
         Returns:
             int: Always returns 0 to prevent normal updates in developer mode.
         """
         if developer_mode:
             self.grounded = False
-            keys = pygame.key.get_pressed()
             self.y_velocity = 0
             self.x_velocity = 0
 
@@ -284,45 +327,27 @@ class Player:
                 self.x += 10
             return 0
 
-    def handle_slope(self, platform, current_level, dy):
+    def handle_slope(self, platform, dy):
         """
-        Handle slope interactions to modify velocity and position based on slope collision.
+        Handle landing on a platform, sliding down it if it is tagged as a slope.
 
         Args:
-            platform (Rect): The platform the player is interacting with.
-            current_level (int): The current level in the game to determine slope behavior.
+            platform (Platform): The platform the player is landing on.
             dy (float): Vertical movement delta.
 
         Returns:
             float: Adjusted vertical movement delta after handling slopes.
         """
-        if platform.width > 9:
-            self.x_velocity = 0
-        if platform.width < 9 and self.x > 561 and current_level == 16:
-            self.x_velocity = -8
-            self.y_velocity = 200
-            dy = platform.top - self.height - self.y
-        elif platform.width < 9 and self.x < 561 and current_level == 16:
-            self.x_velocity = 8
-            self.y_velocity = 200
-            dy = platform.top - self.height - self.y
-        elif platform.width < 9 and current_level == 14:
-            self.x_velocity = -8
-            self.y_velocity = 200
-            dy = platform.top - self.height - self.y
-        elif platform.width < 9 and current_level == 11 and self.x < 100:
-            self.x_velocity = 8
-            self.y_velocity = 200
-            dy = platform.top - self.height - self.y
-        elif platform.width < 9 and current_level == 11 and self.x > 100 and self.x < 388:
-            self.x_velocity = -8
-            self.y_velocity = 200
-            dy = platform.top - self.height - self.y
-        elif platform.width < 9 and current_level == 11 and self.x > 388:
-            self.x_velocity = 8
+        if platform.kind == SLOPE:
+            direction = platform.direction
+            if not direction:
+                direction = -1 if self.x < platform.centerx else 1
+            self.x_velocity = 8 * direction
             self.y_velocity = 200
             dy = platform.top - self.height - self.y
         else:
+            if platform.kind != WALL:
+                self.x_velocity = 0
             dy = platform.top - self.height - self.y
             self.y_velocity = 0
             self.grounded = True
@@ -333,7 +358,7 @@ class Player:
         Check for collisions with platforms and adjust the player's position and velocity accordingly.
 
         Args:
-            platforms (list): List of platform Rect objects.
+            platforms (list): List of Platform objects tagged with their collision role.
             dx (float): Horizontal movement delta.
             dy (float): Vertical movement delta.
             current_level (int): The current level in the game for special platform interactions.
@@ -344,7 +369,7 @@ class Player:
         for platform in platforms:
             if platform.colliderect(self.x + dx, self.y, self.width, self.height):
                 if not self.grounded:
-                    self.sounds["bump"].play()
+                    self.sounds.play("bump")
                 dx = 0
                 if self.facing_right:
                     self.x_velocity = -self.x_velocity + 3
@@ -354,14 +379,14 @@ class Player:
                 if self.y_velocity <= 0:
                     dy = platform.bottom - self.y
                     self.y_velocity = 0
-                    self.sounds["bump"].play()
+                    self.sounds.play("bump")
                 elif self.y_velocity >= 0:
-                    dy = self.handle_slope(platform, current_level, dy)
+                    dy = self.handle_slope(platform, dy)
                     if self.fall_start_time:
-                        fall_duration = time.time() - self.fall_start_time
+                        fall_duration = self.time_source() - self.fall_start_time
                         if fall_duration >= self.fall_duration_threshold:
                             self.apply_fall_damage(fall_duration)
-                            self.sounds["splat"].play()
+                            self.sounds.play("splat")
                             self.playing_fall_impact = True
                             self.image = self.fall_frame
                             self.fall_counter += 1
@@ -370,17 +395,17 @@ class Player:
                     
         return dx, dy
 
-    def update(self, platforms, current_level, developer_mode, snow_rects_12, snow_rects_13, trampoline_rects, game_instance):
+    def update(self, platforms, current_level, developer_mode, game_instance, keys=None):
         """
         Update the player's state, including position, collisions, and fall handling.
 
+        Snow, trampolines, gravity and exits are looked up in the level's metadata.
+
         Args:
             platforms (list): List of platform Rect objects.
             current_level (int): The current level in the game.
             developer_mode (bool): Whether developer mode is enabled.
-            snow_rects_12 (list): Snow Rect objects for level 12.
-            snow_rects_13 (list): Snow Rect objects for level 13.
-            trampoline_rects (list): Rects of trampolines for bounce interactions.
+            keys (Sequence[bool]): Keyboard snapshot of the tick, read in developer mode.
 
         Returns:
             int: Level transition indicator (1 for next level, -1 for previous level, 0 for no transition).
@@ -391,39 +416,36 @@ class Player:
         else:
             self.fall_start_time = None
 
-        if self.y < 0 and current_level < len(LEVEL_BACKGROUNDS) - 1:
+        level = LEVEL_DATA[current_level]
+        if self.y < 0 and level.exit_top:
             self.y = SCREEN_HEIGHT
             return 1
-        if self.y > SCREEN_HEIGHT and current_level > 0:
+        if self.y > SCREEN_HEIGHT and level.exit_bottom:
             self.y = 0
             return -1
 
-        if self.developer_mode(developer_mode) is not None:
+        if self.developer_mode(developer_mode, keys) is not None:
             return 0
 
         dx = self.x_velocity
         dy = 0
-        snow_rects = {12: snow_rects_12, 13: snow_rects_13}
-        on_snow = any(
-            current_level == level and any(snow.colliderect(self.x, self.y + dy, self.width, self.height) for snow in rects)
-            for level, rects in snow_rects.items()
-        )
-
-        if on_snow:
-            dx = 0
+        if level.snow_rects:
+            player_rect = pygame.Rect(self.x, self.y + dy, self.width, self.height)
+            if player_rect.collidelist(level.snow_rects) != -1:
+                dx = 0
 
-        self.gravity = 0.5 if (current_level == 17 or current_level == 18 or (current_level == 19 and self.y > 530)) else 0.8
+        self.gravity = level.gravity_at(self.y)
 
         self.y_velocity += self.gravity
         if self.y_velocity > 15:
             self.y_velocity = 15
         dy += self.y_velocity
 
-        for trampoline in trampoline_rects:
-            if trampoline.colliderect(self.x, self.y + dy, self.width, self.height) and self.y_velocity > 0:
-                self.y_velocity = -17
-                dy = trampoline.top - self.height - self.y
-                break
+        if level.trampoline_rects and self.y_velocity > 0:
+            hit = pygame.Rect(self.x, self.y + dy, self.width, self.height).collidelist(level.trampoline_rects)
+            if hit != -1:
+                self.y_velocity = -level.trampoline_bounce
+                dy = level.trampoline_rects[hit].top - self.height - self.y
 
         if self.x + dx < 0:
             dx = 0
@@ -436,7 +458,7 @@ class Player:
 
         if self.grounded and not was_grounded:
             if not self.has_landed:
-                self.sounds["land"].play()
+                self.sounds.play("land")
             self.has_landed = True
         elif not self.grounded:
             self.has_landed = False
@@ -0,0 +1,164 @@
+import time
+from levels import LEVEL_DATA, LEVEL_PLATFORMS, FLOOR
+"""
+practice.py
+
+This module implements practice sessions of the King's Trial game.
+A practice session drops the player onto any level with a chosen health and coin state,
+and puts everything back with a single key press. The state to restore is prepared when
+the session starts, so a reset is a handful of attribute assignments.
+
+Features:
+- Warp to any level, landing on its lowest floor platform.
+- Chosen starting health and coin state: as saved, none collected or all collected.
+- Checkpoints at the player's current position.
+- Resets that do not start a new game, reload the save or rebuild any assets.
+- The real game state is kept aside and restored when practice ends, so practice never
+  touches the save, the replays, the run history or the best time.
+"""
+HEALTH_OPTIONS = [100, 75, 50, 25, 1]
+COIN_OPTIONS = ["AS SAVED", "NONE", "ALL"]
+
+def default_spawn(level, width, height):
+    """
+    Find the practice spawn point of a level: the middle of its lowest floor platform wide enough for the player.
+
+    The level's platforms must be loaded.
+
+    Args:
+        level (int): Zero-based level index.
+        width (int): Player width.
+        height (int): Player height.
+
+    Returns:
+        tuple: (x, y) position of the player's top-left corner.
+    """
+    floors = [
+        platform for platform in LEVEL_PLATFORMS[level]
+        if platform.kind == FLOOR and platform.width >= width and platform.top >= height
+    ]
+    if not floors:
+        return 0, 0
+    floor = max(floors, key=lambda platform: (platform.top, platform.width))
+    return floor.centerx - width // 2, floor.top - height
+
+class PracticeSession:
+    def __init__(self, game, level, health, coins):
+        """
+        Start a practice session, keeping the game's current state aside.
+
+        The level must already be loaded.
+
+        Args:
+            game (Game): The game to practice in.
+            level (int): Zero-based level to warp to.
+            health (int): Starting health.
+            coins (str): Starting coin state, one of COIN_OPTIONS.
+
+        Returns:
+            None
+        """
+        self.saved_state = {
+            "player": game.player.get_state(),
+            "current_level": game.current_level,
+            "start_time": game.start_time,
+            "coins": game.coins.collected_flags(),
+            "total_coins_collected": game.total_coins_collected,
+            "flag_position": game.flag_position,
+        }
+        if coins == "ALL":
+            coin_flags = [True] * len(game.coins)
+        elif coins == "NONE":
+            coin_flags = [False] * len(game.coins)
+        else:
+            coin_flags = self.saved_state["coins"]
+        self.coin_flags = coin_flags
+        self.health = health
+        self.flag_position = next((data.flag_position for data in LEVEL_DATA if data.flag_position), None)
+        self.pending_reset = False
+        self.last_reset_ms = 0
+        x, y = default_spawn(level, game.player.width, game.player.height)
+        self.set_spawn(game, level, x, y)
+
+    def set_spawn(self, game, level, x, y):
+        """
+        Prepare the player state that resets restore.
+
+        Args:
+            game (Game): The game being practiced in.
+            level (int): Zero-based level of the spawn point.
+            x (float): Player x-coordinate.
+            y (float): Player y-coordinate.
+
+        Returns:
+            None
+        """
+        self.level = level
+        self.player_state = dict(game.fresh_player_state, x=x, y=y, current_health=self.health)
+
+    def set_checkpoint(self, game):
+        """
+        Make the player's current position the spawn point, if the player is standing on the ground.
+
+        Args:
+            game (Game): The game being practiced in.
+
+        Returns:
+            bool: True if the checkpoint was set.
+        """
+        if not game.player.grounded:
+            return False
+        self.set_spawn(game, game.current_level, game.player.x, game.player.y)
+        return True
+
+    def reset(self, game):
+        """
+        Put the player back on the spawn point with the chosen health and coins.
+
+        Args:
+            game (Game): The game being practiced in.
+
+        Returns:
+            None
+        """
+        start = time.perf_counter()
+        game.player.set_state(self.player_state)
+        game.current_level = self.level
+        game.coins.set_collected_flags(self.coin_flags)
+        game.total_coins_collected = sum(self.coin_flags)
+        game.projectiles.clear()
+        game.start_time = game.tick_time
+        game.is_paused = False
+        game.game_clock.resume()
+        game.flag_position = self.flag_position
+        game.flag_moving = False
+        game.flag_raised = False
+        game.timer_stopped = False
+        game.final_time = None
+        self.pending_reset = False
+        self.last_reset_ms = (time.perf_counter() - start) * 1000
+
+    def restore(self, game):
+        """
+        End the session and put back the game state from before it started.
+
+        Args:
+            game (Game): The game being practiced in.
+
+        Returns:
+            None
+        """
+        saved = self.saved_state
+        game.player.set_state(saved["player"])
+        game.current_level = saved["current_level"]
+        game.start_time = saved["start_time"]
+        game.coins.set_collected_flags(saved["coins"])
+        game.total_coins_collected = saved["total_coins_collected"]
+        game.flag_position = saved["flag_position"]
+        game.projectiles.clear()
+        game.is_paused = False
+        game.game_clock.resume()
+        game.flag_moving = False
+        game.flag_raised = False
+        game.timer_stopped = False
+        game.final_time = None
@@ -0,0 +1,379 @@
+import math
+import numpy as np
+import pygame
+from itertools import repeat
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+"""
+projectiles.py
+
+This module implements the projectile hazards of the King's Trial game.
+Projectiles live in a fixed-capacity pool stored as parallel numpy arrays, so moving,
+culling and hit-testing thousands of them is a handful of vectorized operations per frame.
+
+Features:
+- Fixed-capacity projectile pool with positions, velocities and sizes in parallel arrays.
+- Vectorized movement, off-screen culling and player hit detection.
+- Data-driven emitters per level, declared as hazards in the level pack, with optional bursts fanned out over an angle.
+- Batched drawing with one blits call per projectile kind.
+"""
+class Emitter:
+    __slots__ = ("position", "velocity", "size", "interval", "color", "knockback", "burst", "spread", "kind", "next_spawn")
+
+    def __init__(self, position, velocity, size, interval, color=(255, 0, 0), knockback=(10, -5), burst=1, spread=0):
+        """
+        Initialize an emitter that periodically spawns projectiles.
+
+        Args:
+            position (tuple): (x, y) spawn position of the projectiles' top-left corner.
+            velocity (tuple): (vx, vy) velocity in pixels per frame of the centre projectile.
+            size (tuple): (width, height) of each projectile.
+            interval (int): Milliseconds between spawns.
+            color (tuple): RGB color of the projectiles.
+            knockback (tuple): (x_velocity, y_velocity) applied to the player on hit.
+            burst (int): Number of projectiles spawned at once.
+            spread (float): Total angle in degrees the burst is fanned out over.
+
+        Returns:
+            None
+        """
+        self.position = position
+        self.velocity = velocity
+        self.size = size
+        self.interval = interval
+        self.color = color
+        self.knockback = knockback
+        self.burst = burst
+        self.spread = spread
+        self.kind = 0
+        self.next_spawn = 0
+
+def build_level_emitters(level_data):
+    """
+    Create the emitters of every level from the "emitter" hazards in the level metadata.
+
+    Args:
+        level_data (list[LevelData]): Metadata of every level, in level order.
+
+    Returns:
+        dict: Mapping of zero-based level index to a list of Emitter objects.
+    """
+    level_emitters = {}
+    for index, level in enumerate(level_data):
+        for hazard in level.hazards:
+            if hazard.get("type") != "emitter":
+                continue
+            level_emitters.setdefault(index, []).append(Emitter(
+                position=tuple(hazard["position"]),
+                velocity=tuple(hazard["velocity"]),
+                size=tuple(hazard["size"]),
+                interval=hazard["interval"],
+                color=tuple(hazard.get("color", (255, 0, 0))),
+                knockback=tuple(hazard.get("knockback", (10, -5))),
+                burst=hazard.get("burst", 1),
+                spread=hazard.get("spread", 0),
+            ))
+    return level_emitters
+
+class ProjectilePool:
+    def __init__(self, capacity=4096):
+        """
+        Preallocate the parallel arrays of the pool.
+
+        Args:
+            capacity (int): Maximum number of live projectiles.
+
+        Returns:
+            None
+        """
+        self.capacity = capacity
+        self.count = 0
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.vx = np.zeros(capacity, dtype=np.float32)
+        self.vy = np.zeros(capacity, dtype=np.float32)
+        self.width = np.zeros(capacity, dtype=np.float32)
+        self.height = np.zeros(capacity, dtype=np.float32)
+        self.kind = np.zeros(capacity, dtype=np.int16)
+        self.arrays = (self.x, self.y, self.vx, self.vy, self.width, self.height, self.kind)
+
+    def clear(self):
+        """
+        Remove every live projectile.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.count = 0
+
+    def spawn(self, x, y, vx, vy, width, height, kind):
+        """
+        Spawn projectiles. Position and velocity arguments may be scalars or equally sized arrays.
+
+        Projectiles that do not fit into the pool are dropped.
+
+        Args:
+            x, y (float | ndarray): Top-left position.
+            vx, vy (float | ndarray): Velocity in pixels per frame.
+            width, height (float): Projectile size.
+            kind (int): Index of the projectile kind used for drawing and hit response.
+
+        Returns:
+            int: Number of projectiles actually spawned.
+        """
+        amount = max(np.size(x), np.size(vx))
+        amount = min(amount, self.capacity - self.count)
+        if amount <= 0:
+            return 0
+        start, end = self.count, self.count + amount
+        self.x[start:end] = x if np.ndim(x) == 0 else x[:amount]
+        self.y[start:end] = y if np.ndim(y) == 0 else y[:amount]
+        self.vx[start:end] = vx if np.ndim(vx) == 0 else vx[:amount]
+        self.vy[start:end] = vy if np.ndim(vy) == 0 else vy[:amount]
+        self.width[start:end] = width
+        self.height[start:end] = height
+        self.kind[start:end] = kind
+        self.count = end
+        return amount
+
+    def compact(self, keep):
+        """
+        Drop the projectiles whose entry in keep is False, preserving the order of the rest.
+
+        Args:
+            keep (ndarray): Boolean mask over the live projectiles.
+
+        Returns:
+            None
+        """
+        remaining = int(np.count_nonzero(keep))
+        if remaining == self.count:
+            return
+        for array in self.arrays:
+            array[:remaining] = array[:self.count][keep]
+        self.count = remaining
+
+    def update(self):
+        """
+        Move every live projectile by its velocity and cull the ones that left the screen.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        n = self.count
+        if n == 0:
+            return
+        x, y = self.x[:n], self.y[:n]
+        x += self.vx[:n]
+        y += self.vy[:n]
+        keep = (x <= SCREEN_WIDTH) & (x + self.width[:n] >= 0) & (y <= SCREEN_HEIGHT) & (y + self.height[:n] >= 0)
+        self.compact(keep)
+
+    def collide(self, rect):
+        """
+        Remove every projectile overlapping a rectangle.
+
+        Args:
+            rect (Rect): The rectangle to test against, usually the player's hitbox.
+
+        Returns:
+            ndarray: Kinds of the projectiles that hit, empty if none did.
+        """
+        n = self.count
+        if n == 0:
+            return self.kind[:0]
+        x, y = self.x[:n], self.y[:n]
+        hit = (x < rect.right) & (x + self.width[:n] > rect.left) & (y < rect.bottom) & (y + self.height[:n] > rect.top)
+        if not hit.any():
+            return self.kind[:0]
+        kinds = self.kind[:n][hit]
+        self.compact(~hit)
+        return kinds
+
+    def draw(self, screen, surfaces):
+        """
+        Draw every live projectile, batching one blits call per kind.
+
+        Args:
+            screen (Surface): The surface to draw on.
+            surfaces (list[Surface]): Image per projectile kind.
+
+        Returns:
+            None
+        """
+        n = self.count
+        if n == 0:
+            return
+        xs, ys, kinds = self.x[:n], self.y[:n], self.kind[:n]
+        for kind, surface in enumerate(surfaces):
+            if len(surfaces) > 1:
+                mask = kinds == kind
+                kind_xs, kind_ys = xs[mask], ys[mask]
+            else:
+                kind_xs, kind_ys = xs, ys
+            screen.blits(zip(repeat(surface), zip(kind_xs.astype(np.int32).tolist(), kind_ys.astype(np.int32).tolist())), doreturn=False)
+
+class ProjectileSystem:
+    def __init__(self, level_emitters, capacity=4096):
+        """
+        Initialize the projectile system with the emitters of every level.
+
+        Args:
+            level_emitters (dict): Mapping of zero-based level index to a list of Emitter objects.
+            capacity (int): Maximum number of live projectiles.
+
+        Returns:
+            None
+        """
+        self.pool = ProjectilePool(capacity)
+        self.level_emitters = level_emitters
+        self.kinds = []
+        for emitters in level_emitters.values():
+            for emitter in emitters:
+                emitter.kind = len(self.kinds)
+                self.kinds.append(emitter)
+        self.surfaces = []
+        self.level = None
+        self.emitters = []
+
+    def get_surfaces(self):
+        """
+        Build the projectile image of every kind the first time they are drawn.
+
+        Returns:
+            list[Surface]: Image per projectile kind.
+        """
+        if not self.surfaces:
+            for emitter in self.kinds:
+                surface = pygame.Surface(emitter.size).convert()
+                surface.fill(emitter.color)
+                self.surfaces.append(surface)
+        return self.surfaces
+
+    def set_level(self, level, now):
+        """
+        Switch to the emitters of a level, clearing projectiles left over from the previous one.
+
+        Args:
+            level (int): Zero-based index of the current level.
+            now (int): Current time in milliseconds.
+
+        Returns:
+            None
+        """
+        if level == self.level:
+            return
+        self.level = level
+        self.pool.clear()
+        self.emitters = self.level_emitters.get(level, [])
+        for emitter in self.emitters:
+            emitter.next_spawn = now
+
+    def is_idle(self, level):
+        """
+        Check whether a level is free of hazards, so an update would change nothing.
+
+        Args:
+            level (int): Zero-based index of the current level.
+
+        Returns:
+            bool: True if the level is active and has no emitters and no live projectiles.
+        """
+        return level == self.level and not self.emitters and self.pool.count == 0
+
+    def clear(self):
+        """
+        Remove every live projectile and restart the emitters on the next set_level().
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.pool.clear()
+        self.level = None
+        self.emitters = []
+
+    def spawn(self, emitter):
+        """
+        Spawn one burst of projectiles from an emitter.
+
+        Args:
+            emitter (Emitter): The emitter to fire.
+
+        Returns:
+            None
+        """
+        vx, vy = emitter.velocity
+        if emitter.burst > 1:
+            speed = math.hypot(vx, vy)
+            base = math.atan2(vy, vx)
+            half_spread = math.radians(emitter.spread) / 2
+            angles = base + np.linspace(-half_spread, half_spread, emitter.burst, dtype=np.float32)
+            vx, vy = np.cos(angles) * speed, np.sin(angles) * speed
+        x, y = emitter.position
+        self.pool.spawn(x, y, vx, vy, emitter.size[0], emitter.size[1], emitter.kind)
+
+    def advance(self, now):
+        """
+        Fire due emitters and move the projectiles by one tick.
+
+        Args:
+            now (int): Current time in milliseconds.
+
+        Returns:
+            None
+        """
+        for emitter in self.emitters:
+            if now >= emitter.next_spawn:
+                emitter.next_spawn = now + emitter.interval
+                self.spawn(emitter)
+        self.pool.update()
+
+    def hit(self, player_rect):
+        """
+        Remove the projectiles that hit a player and return their knockback.
+
+        Args:
+            player_rect (Rect): The player's hitbox.
+
+        Returns:
+            tuple: Knockback (x_velocity, y_velocity) to apply to the player, or None if nothing hit.
+        """
+        hits = self.pool.collide(player_rect)
+        if len(hits) == 0:
+            return None
+        return self.kinds[int(hits[0])].knockback
+
+    def update(self, now, player_rect):
+        """
+        Fire due emitters, move projectiles and test them against the player.
+
+        Args:
+            now (int): Current time in milliseconds.
+            player_rect (Rect): The player's hitbox.
+
+        Returns:
+            tuple: Knockback (x_velocity, y_velocity) to apply to the player, or None if nothing hit.
+        """
+        self.advance(now)
+        return self.hit(player_rect)
+
+    def draw(self, screen):
+        """
+        Draw every live projectile.
+
+        Args:
+            screen (Surface): The surface to draw on.
+
+        Returns:
+            None
+        """
+        if self.pool.count:
+            self.pool.draw(screen, self.get_surfaces())
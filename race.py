@@ -0,0 +1,593 @@
+import argparse
+import asyncio
+import struct
+import threading
+import time
+"""
+race.py
+
+This module implements the networked race mode of the King's Trial game.
+Several players climb at the same time and see each other as ghosts. Every client sends its
+king's state to a race server, which batches the states of all other players into one frame
+per client and tick.
+
+Features:
+- asyncio server and client over TCP, with length-prefixed frames.
+- States quantized to half pixels and packed into a few bytes: two for the level, one for pose and facing.
+- Delta compression against the last state each side sent, with one-byte coordinate deltas for small moves.
+- The client runs its event loop on a background thread; the game only swaps in the latest state and
+  reads the latest ghosts, so network I/O never stalls a frame.
+- Bandwidth per player on the server, and bandwidth, round trip and added latency on the client.
+- Command line server: `python race.py --port 7777`.
+"""
+RACE_PORT = 7777
+SEND_INTERVAL = 1 / 60
+BATCH_INTERVAL = 1 / 60
+PING_INTERVAL = 1.0
+REPORT_INTERVAL = 5.0
+POSITION_SCALE = 2
+
+FRAME_HEADER = struct.Struct("<H")
+MESSAGE_HELLO = 0
+MESSAGE_WELCOME = 1
+MESSAGE_STATE = 2
+MESSAGE_BATCH = 3
+MESSAGE_JOIN = 4
+MESSAGE_LEAVE = 5
+MESSAGE_PING = 6
+MESSAGE_PONG = 7
+
+FIELD_X = 1
+FIELD_Y = 2
+FIELD_LEVEL = 4
+FIELD_POSE = 8
+FIELD_SMALL = 16
+
+POSE_STAND = 0
+POSE_WALK = 1
+POSE_CHARGE = 2
+POSE_IMPACT = 3
+
+def player_state(level, player):
+    """
+    Quantize a king's visible state for sending.
+
+    Args:
+        level (int): Zero-based level the king is on.
+        player (Player): The king.
+
+    Returns:
+        tuple: (x, y, level, pose) with x and y in half pixels and the facing in the pose's third bit.
+    """
+    if player.playing_fall_impact:
+        pose = POSE_IMPACT
+    elif player.holding_jump:
+        pose = POSE_CHARGE
+    elif player.grounded and player.x_velocity and player.current_walk_frame:
+        pose = POSE_WALK
+    else:
+        pose = POSE_STAND
+    if player.facing_right:
+        pose |= 4
+    return round(player.x * POSITION_SCALE), round(player.y * POSITION_SCALE), level, pose
+
+def encode_delta(previous, state):
+    """
+    Encode a state as the fields that changed since the previous one.
+
+    Args:
+        previous (tuple): The last state sent for the same king, or None for a full state.
+        state (tuple): The state to send.
+
+    Returns:
+        bytes: Field mask followed by the changed fields, or b"" if nothing changed.
+    """
+    x, y, level, pose = state
+    if previous is None:
+        return struct.pack("<BhhHB", FIELD_X | FIELD_Y | FIELD_LEVEL | FIELD_POSE, x, y, level, pose)
+    old_x, old_y, old_level, old_pose = previous
+    mask = (x != old_x) * FIELD_X | (y != old_y) * FIELD_Y | (level != old_level) * FIELD_LEVEL \
+        | (pose != old_pose) * FIELD_POSE
+    if not mask:
+        return b""
+    parts = []
+    dx, dy = x - old_x, y - old_y
+    if mask & (FIELD_X | FIELD_Y) and -128 <= dx <= 127 and -128 <= dy <= 127:
+        mask |= FIELD_SMALL
+        if mask & FIELD_X:
+            parts.append(struct.pack("<b", dx))
+        if mask & FIELD_Y:
+            parts.append(struct.pack("<b", dy))
+    else:
+        if mask & FIELD_X:
+            parts.append(struct.pack("<h", x))
+        if mask & FIELD_Y:
+            parts.append(struct.pack("<h", y))
+    if mask & FIELD_LEVEL:
+        parts.append(struct.pack("<H", level))
+    if mask & FIELD_POSE:
+        parts.append(bytes((pose,)))
+    return bytes((mask,)) + b"".join(parts)
+
+def decode_delta(previous, data, offset):
+    """
+    Apply an encoded delta to the previous state.
+
+    Args:
+        previous (tuple): The last state received for the same king, or None.
+        data (bytes): Buffer holding the delta.
+        offset (int): Position of the delta's field mask.
+
+    Returns:
+        tuple: (new state, offset after the delta).
+    """
+    x, y, level, pose = previous or (0, 0, 0, 0)
+    mask = data[offset]
+    offset += 1
+    coordinate = "<b" if mask & FIELD_SMALL else "<h"
+    size = struct.calcsize(coordinate)
+    if mask & FIELD_X:
+        value = struct.unpack_from(coordinate, data, offset)[0]
+        x = x + value if mask & FIELD_SMALL else value
+        offset += size
+    if mask & FIELD_Y:
+        value = struct.unpack_from(coordinate, data, offset)[0]
+        y = y + value if mask & FIELD_SMALL else value
+        offset += size
+    if mask & FIELD_LEVEL:
+        level = struct.unpack_from("<H", data, offset)[0]
+        offset += 2
+    if mask & FIELD_POSE:
+        pose = data[offset]
+        offset += 1
+    return (x, y, level, pose), offset
+
+def frame(message, payload=b""):
+    """
+    Wrap a message in a length-prefixed frame.
+
+    Args:
+        message (int): One of the MESSAGE_* types.
+        payload (bytes): Message body.
+
+    Returns:
+        bytes: The frame.
+    """
+    return FRAME_HEADER.pack(len(payload) + 1) + bytes((message,)) + payload
+
+async def read_frame(reader):
+    """
+    Read one frame.
+
+    Args:
+        reader (StreamReader): Connection to read from.
+
+    Returns:
+        tuple: (message type, payload, frame size in bytes).
+    """
+    header = await reader.readexactly(FRAME_HEADER.size)
+    body = await reader.readexactly(FRAME_HEADER.unpack(header)[0])
+    return body[0], body[1:], FRAME_HEADER.size + len(body)
+
+class RaceServer:
+    def __init__(self, batch_interval=BATCH_INTERVAL):
+        """
+        Initialize a server without players.
+
+        Args:
+            batch_interval (float): Seconds between the batched state frames sent to each player.
+
+        Returns:
+            None
+        """
+        self.batch_interval = batch_interval
+        self.players = {}
+        self.server = None
+        self.tasks = []
+
+    async def start(self, host="127.0.0.1", port=RACE_PORT, report=True):
+        """
+        Start accepting players and sending batches.
+
+        Args:
+            host (str): Address to listen on.
+            port (int): TCP port, 0 to pick a free one.
+            report (bool): Whether to print the bandwidth per player every REPORT_INTERVAL.
+
+        Returns:
+            int: The port the server listens on.
+        """
+        self.server = await asyncio.start_server(self.handle_player, host, port)
+        self.tasks.append(asyncio.create_task(self.broadcast()))
+        if report:
+            self.tasks.append(asyncio.create_task(self.report_loop()))
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """
+        Stop the server and disconnect every player.
+
+        Returns:
+            None
+        """
+        for task in self.tasks:
+            task.cancel()
+        self.server.close()
+        for player in list(self.players.values()):
+            player["writer"].close()
+        await self.server.wait_closed()
+
+    def send(self, player, data):
+        """
+        Queue a frame for a player and count it.
+
+        Args:
+            player (dict): The receiving player.
+            data (bytes): The frame.
+
+        Returns:
+            None
+        """
+        player["writer"].write(data)
+        player["bytes_out"] += len(data)
+
+    async def handle_player(self, reader, writer):
+        """
+        Serve one player: register it, apply its states and answer its pings until it leaves.
+
+        Args:
+            reader (StreamReader): The player's connection.
+            writer (StreamWriter): The player's connection.
+
+        Returns:
+            None
+        """
+        player_id = next((index for index in range(1, 256) if index not in self.players), None)
+        if player_id is None:
+            writer.close()
+            return
+        # The id is taken right away; the player only counts as joined once its name is known.
+        player = {
+            "name": None, "writer": writer, "state": None, "sent": {},
+            "bytes_in": 0, "bytes_out": 0, "joined": time.perf_counter(),
+        }
+        self.players[player_id] = player
+        try:
+            message, payload, size = await read_frame(reader)
+            if message != MESSAGE_HELLO:
+                return
+            player["name"] = payload.decode(errors="replace")[:32]
+            player["bytes_in"] += size
+            self.send(player, frame(MESSAGE_WELCOME, bytes((player_id,))))
+            for other_id, other in self.players.items():
+                if other_id != player_id and other["name"] is not None:
+                    self.send(player, frame(MESSAGE_JOIN, bytes((other_id,)) + other["name"].encode()))
+                    self.send(other, frame(MESSAGE_JOIN, bytes((player_id,)) + player["name"].encode()))
+            while True:
+                message, payload, size = await read_frame(reader)
+                player["bytes_in"] += size
+                if message == MESSAGE_STATE:
+                    player["state"] = decode_delta(player["state"], payload, 0)[0]
+                elif message == MESSAGE_PING:
+                    self.send(player, frame(MESSAGE_PONG, payload))
+        except (asyncio.IncompleteReadError, ConnectionError, IndexError, struct.error):
+            pass
+        finally:
+            self.players.pop(player_id, None)
+            if player["name"] is not None:
+                for other in self.players.values():
+                    other["sent"].pop(player_id, None)
+                    if other["name"] is not None:
+                        self.send(other, frame(MESSAGE_LEAVE, bytes((player_id,))))
+            writer.close()
+
+    async def broadcast(self):
+        """
+        Every batch interval, send each player one frame with the changes of all other players.
+
+        Returns:
+            None
+        """
+        while True:
+            await asyncio.sleep(self.batch_interval)
+            for player_id, player in list(self.players.items()):
+                if player["name"] is None:
+                    continue
+                entries = []
+                for other_id, other in self.players.items():
+                    if other_id == player_id or other["state"] is None:
+                        continue
+                    delta = encode_delta(player["sent"].get(other_id), other["state"])
+                    if delta:
+                        entries.append(bytes((other_id,)) + delta)
+                        player["sent"][other_id] = other["state"]
+                if entries:
+                    self.send(player, frame(MESSAGE_BATCH, bytes((len(entries),)) + b"".join(entries)))
+
+    def report(self):
+        """
+        Describe the bandwidth of every player.
+
+        Returns:
+            list[str]: One line per player.
+        """
+        now = time.perf_counter()
+        lines = []
+        for player_id, player in sorted(self.players.items()):
+            if player["name"] is None:
+                continue
+            seconds = max(now - player["joined"], 1e-9)
+            lines.append(
+                f"Player {player_id} ({player['name']}): {player['bytes_in'] / seconds / 1000:.2f} kB/s in, "
+                f"{player['bytes_out'] / seconds / 1000:.2f} kB/s out"
+            )
+        return lines
+
+    async def report_loop(self):
+        """
+        Print the bandwidth per player every REPORT_INTERVAL.
+
+        Returns:
+            None
+        """
+        while True:
+            await asyncio.sleep(REPORT_INTERVAL)
+            for line in self.report():
+                print(line)
+
+class RaceClient:
+    def __init__(self, host, port=RACE_PORT, name="King"):
+        """
+        Initialize a client. Call start() to connect on a background thread.
+
+        Args:
+            host (str): Race server address.
+            port (int): Race server port.
+            name (str): Name shown to the other players.
+
+        Returns:
+            None
+        """
+        self.host = host
+        self.port = port
+        self.name = name
+        self.player_id = None
+        self.latest = None
+        self.ghosts = {}
+        self.names = {}
+        self.connected = False
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.states_sent = 0
+        self.round_trip = None
+        self.send_delay = None
+        self.started = time.perf_counter()
+        self.loop = None
+        self.thread = None
+        self.main_task = None
+
+    def start(self):
+        """
+        Connect to the server on a background thread with its own event loop.
+
+        Returns:
+            RaceClient: This client.
+        """
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_until_complete, args=(self.run(),),
+                                       name="race-client", daemon=True)
+        self.thread.start()
+        return self
+
+    def publish(self, level, player):
+        """
+        Offer the king's state of this tick. Only the latest state is kept for the next send.
+
+        Args:
+            level (int): Zero-based level the king is on.
+            player (Player): The king.
+
+        Returns:
+            None
+        """
+        self.latest = (player_state(level, player), time.perf_counter())
+
+    async def run(self):
+        """
+        Connect, then send states and pings and apply batches until the connection closes.
+
+        A failure of any of the three tasks ends the race, so the client never stays connected
+        with a dead sender.
+
+        Returns:
+            None
+        """
+        self.main_task = asyncio.current_task()
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        except OSError as e:
+            print(f"Failed to join race: {e}")
+            return
+        self.connected = True
+        tasks = []
+        try:
+            self.write(writer, frame(MESSAGE_HELLO, self.name.encode()[:32]))
+            tasks = [
+                asyncio.create_task(self.send_states(writer)), asyncio.create_task(self.send_pings(writer)),
+                asyncio.create_task(self.receive(reader)),
+            ]
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        except (asyncio.IncompleteReadError, ConnectionError, IndexError):
+            print("Race server disconnected")
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"Failed to exchange race states: {e}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.connected = False
+            self.ghosts = {}
+            writer.close()
+
+    def write(self, writer, data):
+        """
+        Send a frame and count it.
+
+        Args:
+            writer (StreamWriter): The server connection.
+            data (bytes): The frame.
+
+        Returns:
+            None
+        """
+        writer.write(data)
+        self.bytes_sent += len(data)
+
+    async def send_states(self, writer):
+        """
+        Every send interval, send the latest state as a delta against the last one sent.
+
+        Args:
+            writer (StreamWriter): The server connection.
+
+        Returns:
+            None
+        """
+        sent = None
+        while True:
+            await asyncio.sleep(SEND_INTERVAL)
+            latest = self.latest
+            if latest is None:
+                continue
+            state, published = latest
+            delta = encode_delta(sent, state)
+            if delta:
+                self.write(writer, frame(MESSAGE_STATE, delta))
+                sent = state
+                self.states_sent += 1
+                delay = time.perf_counter() - published
+                self.send_delay = delay if self.send_delay is None else self.send_delay * 0.9 + delay * 0.1
+            await writer.drain()
+
+    async def send_pings(self, writer):
+        """
+        Measure the round trip to the server every PING_INTERVAL.
+
+        Args:
+            writer (StreamWriter): The server connection.
+
+        Returns:
+            None
+        """
+        while True:
+            self.write(writer, frame(MESSAGE_PING, struct.pack("<d", time.perf_counter())))
+            await asyncio.sleep(PING_INTERVAL)
+
+    async def receive(self, reader):
+        """
+        Apply the server's frames until the connection closes.
+
+        The ghosts are replaced as a whole, so the game thread always reads a consistent set.
+
+        Args:
+            reader (StreamReader): The server connection.
+
+        Returns:
+            None
+        """
+        while True:
+            message, payload, size = await read_frame(reader)
+            self.bytes_received += size
+            if message == MESSAGE_BATCH:
+                ghosts = dict(self.ghosts)
+                offset = 1
+                for _ in range(payload[0]):
+                    ghost_id = payload[offset]
+                    ghosts[ghost_id], offset = decode_delta(ghosts.get(ghost_id), payload, offset + 1)
+                self.ghosts = ghosts
+            elif message == MESSAGE_WELCOME:
+                self.player_id = payload[0]
+            elif message == MESSAGE_JOIN:
+                self.names[payload[0]] = payload[1:].decode(errors="replace")
+            elif message == MESSAGE_LEAVE:
+                self.ghosts = {key: value for key, value in self.ghosts.items() if key != payload[0]}
+                self.names.pop(payload[0], None)
+            elif message == MESSAGE_PONG:
+                round_trip = time.perf_counter() - struct.unpack("<d", payload)[0]
+                self.round_trip = round_trip if self.round_trip is None else self.round_trip * 0.8 + round_trip * 0.2
+
+    @property
+    def added_latency(self):
+        """
+        Estimated time from a published state to its ghost on another player's screen.
+
+        Returns:
+            float: Seconds, or None before the first round trip was measured.
+        """
+        if self.round_trip is None or self.send_delay is None:
+            return None
+        return self.send_delay + self.round_trip / 2 + BATCH_INTERVAL / 2
+
+    def report(self):
+        """
+        Describe the client's bandwidth and latency.
+
+        Returns:
+            str: Ghosts, bytes per second each way, round trip and added latency.
+        """
+        seconds = max(time.perf_counter() - self.started, 1e-9)
+        text = (
+            f"Race: {len(self.ghosts)} ghosts, {self.bytes_sent / seconds / 1000:.2f} kB/s up, "
+            f"{self.bytes_received / seconds / 1000:.2f} kB/s down"
+        )
+        if self.added_latency is not None:
+            text += f", {self.round_trip * 1000:.1f} ms round trip, {self.added_latency * 1000:.1f} ms added latency"
+        return text
+
+    def close(self):
+        """
+        Disconnect and stop the background thread.
+
+        Returns:
+            None
+        """
+        if self.thread is None:
+            return
+        report = self.report()
+        if self.main_task is not None:
+            self.loop.call_soon_threadsafe(self.main_task.cancel)
+        self.thread.join(timeout=1.0)
+        if not self.thread.is_alive():
+            self.loop.close()
+        self.thread = None
+        print(report)
+
+def main():
+    """
+    Run a race server until interrupted.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description="King's Trial race server")
+    parser.add_argument("--host", default="0.0.0.0", help="address to listen on")
+    parser.add_argument("--port", type=int, default=RACE_PORT, help="TCP port")
+    args = parser.parse_args()
+
+    async def serve():
+        server = RaceServer()
+        port = await server.start(args.host, args.port)
+        print(f"Race server listening on port {port}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
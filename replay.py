@@ -0,0 +1,187 @@
+import json
+import os
+import struct
+import time
+"""
+replay.py
+
+This module defines the replay format of the King's Trial game.
+A replay stores the input of every gameplay tick together with the tick's timestamp,
+which is enough to re-simulate a run exactly.
+
+Features:
+- Compact binary records: 10 bytes per gameplay tick.
+- JSON metadata records for run start, save, resume and finish.
+- Jump key press and release timestamps, recorded ahead of the tick that processes them.
+- Buffered recorder that appends to the replay file, surviving save & exit.
+- Streaming reader that never loads a whole replay into memory.
+"""
+REPLAY_DIR = "replays"
+REPLAY_MAGIC = b"KTREPLAY1\n"
+
+RECORD_TICK = 0
+RECORD_META = 1
+RECORD_JUMP = 2
+TICK_RECORD = struct.Struct("<BdB")
+META_RECORD = struct.Struct("<BI")
+JUMP_RECORD = struct.Struct("<B?d")
+
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_JUMP = 4
+INPUT_JUMP_PRESSED = 8
+INPUT_JUMP_RELEASED = 16
+INPUT_RELEASE_FIRST = 32
+INPUT_DEVELOPER = 64
+INPUT_PAUSED = 128
+
+class ReplayRecorder:
+    def __init__(self, path, flush_size=65536):
+        """
+        Open a replay file for appending, writing the file header if the file is new.
+
+        Args:
+            path (str): Path of the replay file.
+            flush_size (int): Number of buffered bytes that triggers a write to disk.
+
+        Returns:
+            None
+        """
+        self.path = path
+        self.flush_size = flush_size
+        self.buffer = bytearray()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        is_new = not os.path.exists(path)
+        self.file = open(path, 'ab')
+        if is_new:
+            self.buffer += REPLAY_MAGIC
+
+    @classmethod
+    def new_run(cls):
+        """
+        Create a recorder for a new run in the replay directory.
+
+        Returns:
+            ReplayRecorder: Recorder writing to a new, timestamped replay file.
+        """
+        name = time.strftime("run-%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03}.ktr"
+        return cls(os.path.join(REPLAY_DIR, name))
+
+    def record_tick(self, tick_time, inputs):
+        """
+        Append one gameplay tick.
+
+        Args:
+            tick_time (float): Timestamp the tick was simulated with.
+            inputs (int): Bitwise OR of the INPUT_* flags for this tick.
+
+        Returns:
+            None
+        """
+        self.buffer += TICK_RECORD.pack(RECORD_TICK, tick_time, inputs)
+        if len(self.buffer) >= self.flush_size:
+            self.flush()
+
+    def record_jump(self, pressed, timestamp):
+        """
+        Append a jump key press or release, ahead of the tick that processes it.
+
+        Args:
+            pressed (bool): True for a press, False for a release.
+            timestamp (float): When the key changed.
+
+        Returns:
+            None
+        """
+        self.buffer += JUMP_RECORD.pack(RECORD_JUMP, pressed, timestamp)
+
+    def record_meta(self, event, **data):
+        """
+        Append a metadata record, such as the start, save, resume or finish of a run.
+
+        Args:
+            event (str): Name of the event.
+            **data: JSON-serializable event data.
+
+        Returns:
+            None
+        """
+        payload = json.dumps(dict(data, event=event)).encode()
+        self.buffer += META_RECORD.pack(RECORD_META, len(payload))
+        self.buffer += payload
+
+    def flush(self):
+        """
+        Write buffered records to disk.
+
+        Returns:
+            None
+        """
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+
+    def close(self):
+        """
+        Flush and close the replay file.
+
+        Returns:
+            None
+        """
+        self.flush()
+        self.file.close()
+
+def read_replay(path, chunk_size=1 << 20):
+    """
+    Stream the records of a replay file.
+
+    Args:
+        path (str): Path of the replay file.
+        chunk_size (int): Number of bytes read from disk at a time.
+
+    Yields:
+        tuple: ("tick", tick_time, inputs), ("jump", pressed, timestamp) or ("meta", data) for every record, in order.
+
+    Raises:
+        ValueError: If the file is not a replay or is truncated.
+    """
+    with open(path, 'rb') as replay_file:
+        if replay_file.read(len(REPLAY_MAGIC)) != REPLAY_MAGIC:
+            raise ValueError("not a King's Trial replay")
+        data = b""
+        offset = 0
+        while True:
+            chunk = replay_file.read(chunk_size)
+            data = data[offset:] + chunk
+            offset = 0
+            while offset < len(data):
+                record_type = data[offset]
+                if record_type == RECORD_TICK:
+                    if offset + TICK_RECORD.size > len(data):
+                        break
+                    _, tick_time, inputs = TICK_RECORD.unpack_from(data, offset)
+                    offset += TICK_RECORD.size
+                    yield "tick", tick_time, inputs
+                elif record_type == RECORD_JUMP:
+                    if offset + JUMP_RECORD.size > len(data):
+                        break
+                    _, pressed, timestamp = JUMP_RECORD.unpack_from(data, offset)
+                    offset += JUMP_RECORD.size
+                    yield "jump", pressed, timestamp
+                elif record_type == RECORD_META:
+                    if offset + META_RECORD.size > len(data):
+                        break
+                    _, length = META_RECORD.unpack_from(data, offset)
+                    end = offset + META_RECORD.size + length
+                    if end > len(data):
+                        break
+                    yield "meta", json.loads(data[offset + META_RECORD.size:end])
+                    offset = end
+                else:
+                    raise ValueError(f"unknown replay record type {record_type}")
+            if not chunk:
+                if offset < len(data):
+                    raise ValueError("truncated replay")
+                return
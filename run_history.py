@@ -0,0 +1,492 @@
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from levels import LEVEL_PACK_PATH
+"""
+run_history.py
+
+This module keeps the history of every King's Trial run in a local SQLite database.
+Each run stores its outcome and totals, and one split per level visited with the time the
+level was entered, the time spent in it and the jumps, falls, health and coins of that visit.
+
+Features:
+- Run tracking that splits a run into level visits as the player climbs and falls.
+- Indexes by date and by level, and a personal-best table kept up to date on every write,
+  so the menu never scans the full history.
+- Batched writes on a background thread, so gameplay frames never wait for the disk.
+- Queries for the best segment per level, the sum of best splits and a falls heatmap.
+- Runs played partly at another game speed stored as "assisted", outside every personal best.
+- A separate database for every other level pack, so generated towers keep their own splits and bests.
+- History report, run with `python run_history.py`.
+"""
+HISTORY_PATH = "history.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    outcome TEXT NOT NULL,
+    final_time REAL,
+    jumps INTEGER NOT NULL,
+    falls INTEGER NOT NULL,
+    coins INTEGER NOT NULL,
+    replay TEXT
+);
+CREATE TABLE IF NOT EXISTS splits (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    level INTEGER NOT NULL,
+    entered_at REAL NOT NULL,
+    duration REAL NOT NULL,
+    jumps INTEGER NOT NULL,
+    falls INTEGER NOT NULL,
+    health_lost INTEGER NOT NULL,
+    coins INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS best_splits (
+    level INTEGER PRIMARY KEY,
+    duration REAL NOT NULL,
+    run_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_date ON runs(started_at);
+CREATE INDEX IF NOT EXISTS runs_by_time ON runs(outcome, final_time);
+CREATE INDEX IF NOT EXISTS splits_by_level ON splits(level, duration);
+CREATE INDEX IF NOT EXISTS splits_by_run ON splits(run_id);
+"""
+
+def history_path(level_pack):
+    """
+    Return the path of the history database of a level pack.
+
+    Args:
+        level_pack (str): Path of the level pack manifest.
+
+    Returns:
+        str: HISTORY_PATH for the game's own tower, or a database next to the manifest of any other pack.
+    """
+    if os.path.normpath(level_pack) == os.path.normpath(LEVEL_PACK_PATH):
+        return HISTORY_PATH
+    return os.path.splitext(level_pack)[0] + "-history.db"
+
+class RunTracker:
+    def __init__(self):
+        """
+        Initialize a tracker without a run in progress.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.started_at = None
+        self.splits = []
+        self.current = None
+        self.assisted = False
+
+    def start(self, level, player, elapsed=0):
+        """
+        Start tracking a new run.
+
+        Args:
+            level (int): Zero-based level the run starts on.
+            player (Player): The player, read for the jump, fall and health counters.
+            elapsed (float): Run time in seconds when tracking starts.
+
+        Returns:
+            None
+        """
+        self.started_at = time.time()
+        self.splits = []
+        self.current = None
+        self.assisted = False
+        self.enter_level(level, player, elapsed)
+
+    def mark_assisted(self):
+        """
+        Mark the run as played partly at another game speed, so it is recorded as "assisted".
+
+        Returns:
+            None
+        """
+        self.assisted = True
+
+    def enter_level(self, level, player, elapsed):
+        """
+        Close the current split and open one for the level the player just entered.
+
+        Args:
+            level (int): Zero-based index of the entered level.
+            player (Player): The player, read for the jump, fall and health counters.
+            elapsed (float): Run time in seconds, excluding pauses.
+
+        Returns:
+            None
+        """
+        if self.started_at is None:
+            return
+        self.close_split(player, elapsed)
+        self.current = {
+            "level": level,
+            "entered_at": elapsed,
+            "jumps": player.jump_count,
+            "falls": player.fall_counter,
+            "health": player.current_health,
+            "coins": 0,
+        }
+
+    def close_split(self, player, elapsed):
+        """
+        Turn the counters of the current level visit into a finished split.
+
+        Args:
+            player (Player): The player, read for the jump, fall and health counters.
+            elapsed (float): Run time in seconds, excluding pauses.
+
+        Returns:
+            None
+        """
+        if self.current is None:
+            return
+        current = self.current
+        self.splits.append((
+            current["level"],
+            current["entered_at"],
+            max(0, elapsed - current["entered_at"]),
+            player.jump_count - current["jumps"],
+            player.fall_counter - current["falls"],
+            max(0, current["health"] - player.current_health),
+            current["coins"],
+        ))
+        self.current = None
+
+    def collect_coins(self, count):
+        """
+        Count coins collected during the current level visit.
+
+        Args:
+            count (int): Number of coins collected.
+
+        Returns:
+            None
+        """
+        if self.current is not None:
+            self.current["coins"] += count
+
+    def finish(self, outcome, player, elapsed, final_time=None, coins=0, replay=None):
+        """
+        End the run and return it as a record for RunHistory.
+
+        An assisted run is recorded with the outcome "assisted", whatever its end.
+
+        Args:
+            outcome (str): "finished", "died" or "gave_up".
+            player (Player): The player, read for the jump, fall and health counters.
+            elapsed (float): Run time in seconds, excluding pauses.
+            final_time (float): Completion time of a finished run.
+            coins (int): Coins collected in the run.
+            replay (str): Path of the run's replay, if any.
+
+        Returns:
+            dict: The run record, or None if no run was being tracked.
+        """
+        if self.started_at is None:
+            return None
+        self.close_split(player, elapsed)
+        run = {
+            "started_at": self.started_at,
+            "outcome": "assisted" if self.assisted else outcome,
+            "final_time": final_time,
+            "jumps": player.jump_count,
+            "falls": player.fall_counter,
+            "coins": coins,
+            "replay": replay,
+            "splits": self.splits,
+        }
+        self.started_at = None
+        self.splits = []
+        return run
+
+    def to_dict(self):
+        """
+        Return the tracker state for a save file.
+
+        Returns:
+            dict: JSON-serializable tracker state, or None if no run is tracked.
+        """
+        if self.started_at is None:
+            return None
+        return {
+            "started_at": self.started_at, "splits": self.splits, "current": self.current, "assisted": self.assisted,
+        }
+
+    def load_dict(self, data):
+        """
+        Restore tracker state written by to_dict().
+
+        Args:
+            data (dict): Tracker state from a save file, or None.
+
+        Returns:
+            None
+        """
+        if not data:
+            return
+        self.started_at = data["started_at"]
+        self.splits = [tuple(split) for split in data["splits"]]
+        self.current = data["current"]
+        self.assisted = data.get("assisted", False)
+
+class RunHistory:
+    def __init__(self, path=HISTORY_PATH):
+        """
+        Open the history database and load the personal bests.
+
+        Args:
+            path (str): Path of the SQLite database file.
+
+        Returns:
+            None
+        """
+        self.path = path
+        self.pending = []
+        self.writing = None
+        self.executor = None
+        self.best_time = None
+        self.best_splits = {}
+        self.enabled = True
+        try:
+            connection = self.connect()
+            self.best_time = connection.execute(
+                "SELECT MIN(final_time) FROM runs WHERE outcome = 'finished'"
+            ).fetchone()[0]
+            self.best_splits = dict(connection.execute("SELECT level, duration FROM best_splits"))
+            connection.close()
+        except sqlite3.Error as e:
+            print(f"Failed to open run history: {e}")
+            self.enabled = False
+
+    def connect(self):
+        """
+        Open a connection to the database, creating the schema if needed.
+
+        Returns:
+            Connection: SQLite connection.
+        """
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    @property
+    def sum_of_best(self):
+        """
+        Sum of the best split of every level, the theoretical best time.
+
+        Returns:
+            float: Seconds, or None if no split has been recorded.
+        """
+        if not self.best_splits:
+            return None
+        return sum(self.best_splits.values())
+
+    def record_run(self, run):
+        """
+        Queue a finished run for writing and update the cached personal bests.
+
+        Args:
+            run (dict): Run record returned by RunTracker.finish().
+
+        Returns:
+            None
+        """
+        if run is None or not self.enabled:
+            return
+        if run["outcome"] == "finished" and run["final_time"] is not None:
+            if self.best_time is None or run["final_time"] < self.best_time:
+                self.best_time = run["final_time"]
+        for level, _, duration, *_ in climbed_splits(run):
+            if level not in self.best_splits or duration < self.best_splits[level]:
+                self.best_splits[level] = duration
+        self.pending.append(run)
+
+    def update(self):
+        """
+        Hand queued runs to the background writer if it is idle. Called once per frame.
+
+        Returns:
+            None
+        """
+        if not self.pending:
+            return
+        if self.writing is not None:
+            if not self.writing.done():
+                return
+            self._collect()
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-writer")
+        batch, self.pending = self.pending, []
+        self.writing = self.executor.submit(self._write, batch)
+
+    def _collect(self):
+        """
+        Report the result of the last background write.
+
+        Returns:
+            None
+        """
+        try:
+            self.writing.result()
+        except sqlite3.Error as e:
+            print(f"Failed to write run history: {e}")
+        self.writing = None
+
+    def _write(self, runs):
+        """
+        Write a batch of runs in a single transaction. Runs on the writer thread.
+
+        Args:
+            runs (list[dict]): Run records.
+
+        Returns:
+            None
+        """
+        connection = self.connect()
+        try:
+            with connection:
+                for run in runs:
+                    run_id = connection.execute(
+                        "INSERT INTO runs (started_at, outcome, final_time, jumps, falls, coins, replay) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (run["started_at"], run["outcome"], run["final_time"], run["jumps"], run["falls"],
+                         run["coins"], run["replay"])
+                    ).lastrowid
+                    connection.executemany(
+                        "INSERT INTO splits (run_id, level, entered_at, duration, jumps, falls, health_lost, coins) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        [(run_id, *split) for split in run["splits"]]
+                    )
+                    connection.executemany(
+                        "INSERT INTO best_splits (level, duration, run_id) VALUES (?, ?, ?) "
+                        "ON CONFLICT(level) DO UPDATE SET duration = excluded.duration, run_id = excluded.run_id "
+                        "WHERE excluded.duration < best_splits.duration",
+                        [(split[0], split[2], run_id) for split in climbed_splits(run)]
+                    )
+        finally:
+            connection.close()
+
+    def close(self):
+        """
+        Write every queued run and stop the writer thread. Called before the game exits.
+
+        Returns:
+            None
+        """
+        if self.writing is not None:
+            self._collect()
+        if self.pending:
+            batch, self.pending = self.pending, []
+            try:
+                self._write(batch)
+            except sqlite3.Error as e:
+                print(f"Failed to write run history: {e}")
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+def climbed_splits(run):
+    """
+    Return the splits of a run in which the player climbed the level, which count towards personal bests.
+
+    A level is climbed if the player left it through the top, or if the run finished on it.
+    Visits that ended with a fall to the level below, a death or giving up are not, and no visit
+    of an assisted run is.
+
+    Args:
+        run (dict): Run record returned by RunTracker.finish().
+
+    Returns:
+        list[tuple]: The climbed splits, in run order.
+    """
+    if run["outcome"] == "assisted":
+        return []
+    splits = run["splits"]
+    climbed = [split for split, following in zip(splits, splits[1:]) if following[0] == split[0] + 1]
+    if splits and run["outcome"] == "finished":
+        climbed.append(splits[-1])
+    return climbed
+
+def best_segments(connection):
+    """
+    Query the fastest visit of every level.
+
+    Args:
+        connection (Connection): Open history database connection.
+
+    Returns:
+        list[tuple]: (level, duration, run_id) per level, from the bottom up.
+    """
+    return connection.execute("SELECT level, duration, run_id FROM best_splits ORDER BY level").fetchall()
+
+def falls_heatmap(connection):
+    """
+    Query the total and average number of falls per level visit.
+
+    Args:
+        connection (Connection): Open history database connection.
+
+    Returns:
+        list[tuple]: (level, total falls, visits, average falls per visit), from the bottom up.
+    """
+    return connection.execute(
+        "SELECT level, SUM(falls), COUNT(*), AVG(falls) FROM splits GROUP BY level ORDER BY level"
+    ).fetchall()
+
+def runs_between(connection, start, end):
+    """
+    Query the runs started within a time range, using the date index.
+
+    Args:
+        connection (Connection): Open history database connection.
+        start (float): Range start as a Unix timestamp.
+        end (float): Range end as a Unix timestamp.
+
+    Returns:
+        list[tuple]: (id, started_at, outcome, final_time, jumps, falls, coins) per run, oldest first.
+    """
+    return connection.execute(
+        "SELECT id, started_at, outcome, final_time, jumps, falls, coins FROM runs "
+        "WHERE started_at BETWEEN ? AND ? ORDER BY started_at", (start, end)
+    ).fetchall()
+
+def report(path=HISTORY_PATH):
+    """
+    Print the best segment per level, the sum of best splits and the falls heatmap.
+
+    Args:
+        path (str): Path of the SQLite database file.
+
+    Returns:
+        None
+    """
+    history = RunHistory(path)
+    if not history.enabled:
+        return
+    connection = history.connect()
+    runs = connection.execute("SELECT COUNT(*), SUM(outcome = 'finished') FROM runs").fetchone()
+    print(f"Runs: {runs[0]}, finished: {runs[1] or 0}")
+    if history.best_time is not None:
+        print(f"Best time: {history.best_time:.2f}s")
+    if history.sum_of_best is not None:
+        print(f"Sum of best splits: {history.sum_of_best:.2f}s")
+    for level, duration, run_id in best_segments(connection):
+        print(f"Level {level + 1:2}: best {duration:7.2f}s (run {run_id})")
+    heatmap = falls_heatmap(connection)
+    most_falls = max((average for *_, average in heatmap), default=0) or 1
+    for level, falls, visits, average in heatmap:
+        bar = "#" * round(20 * average / most_falls)
+        print(f"Level {level + 1:2}: {bar:<20} {falls} falls in {visits} visits")
+    connection.close()
+
+if __name__ == "__main__":
+    report()
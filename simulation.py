@@ -0,0 +1,259 @@
+import pygame
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+import os
+from levels import LEVEL_DATA, LEVEL_PLATFORMS, LEVEL_PACK_PATH, load_level_pack, load_level_geometry
+from player import Player
+from projectiles import ProjectileSystem, build_level_emitters
+from audio import SilentSoundBank
+"""
+simulation.py
+
+This module contains the gameplay tick shared by the game and by headless simulations.
+The game renders around it, while headless simulations (replay verification, bots and
+level validation) run it without a display, mixer or images.
+
+Features:
+- A single gameplay tick function used by both the game and the simulations.
+- Input snapshots built from left/right/jump flags instead of pygame's keyboard state.
+- A headless Simulation class with the same state as the game.
+- Geometry-only level loading for headless processes, switching level packs on request.
+"""
+FLAG_TOP = 30
+FLAG_SPEED = 2
+
+SIMULATION_PACK = None
+
+def input_keys(left, right, jump):
+    """
+    Build a keyboard snapshot that Player.handle_input can read like pygame.key.get_pressed().
+
+    Args:
+        left (bool): Whether the move-left key is held.
+        right (bool): Whether the move-right key is held.
+        jump (bool): Whether the jump key is held.
+
+    Returns:
+        dict: Mapping of the gameplay key codes to their held state.
+    """
+    return _INPUT_KEYS[bool(left) | bool(right) << 1 | bool(jump) << 2]
+
+_INPUT_KEYS = [
+    {pygame.K_a: bool(bits & 1), pygame.K_d: bool(bits & 2), pygame.K_SPACE: bool(bits & 4)}
+    for bits in range(8)
+]
+
+def step_gameplay(game, keys, platforms=None):
+    """
+    Advance the gameplay by one tick: player physics, hazards, level transitions, the flag and input.
+
+    Works on any object with the game's gameplay state: player, current_level, developer_mode,
+    projectiles, start_time, tick_time, flag_position, flag_moving, flag_raised, flag_raised_time,
+    timer_stopped, final_time, world and a trigger_death() method. If world is set, the player
+    collides with the platforms its geometry index returns for the player's columns, which are
+    exactly the ones the full platform list could collide with.
+
+    Args:
+        game (Game | Simulation): The state to advance.
+        keys (Sequence[bool]): Keyboard snapshot indexed by pygame key codes.
+        platforms (list[Platform]): Platforms already gathered for the player's columns by a batched query,
+            which must include every platform the player can touch this tick.
+
+    Returns:
+        bool: True if the flag finished rising during this tick.
+    """
+    player = game.player
+    if platforms is None and game.world:
+        reach = abs(player.x_velocity)
+        platforms = game.world.column_platforms(game.current_level, player.x - reach, player.x + player.width + reach)
+    elif platforms is None:
+        platforms = LEVEL_PLATFORMS[game.current_level]
+    level_change = player.update(platforms, game.current_level, game.developer_mode, game, keys)
+
+    if game.start_time <= 0 and player.jump_start_time > 0:
+        game.start_time = game.tick_time
+
+    now = int(game.tick_time * 1000)
+    game.projectiles.set_level(game.current_level, now)
+    player_rect = pygame.Rect(player.x, player.y, player.width, player.height)
+    knockback = game.projectiles.update(now, player_rect)
+    if knockback:
+        player.grounded = False
+        player.x_velocity, player.y_velocity = knockback
+
+    if level_change == 1 and game.current_level < len(LEVEL_DATA) - 1:
+        game.current_level += 1
+    elif level_change == -1 and game.current_level > 0:
+        game.current_level -= 1
+
+    flag_finished = False
+    pole_rect = LEVEL_DATA[game.current_level].flag_pole
+    if pole_rect:
+        player_rect = pygame.Rect(player.x, player.y, player.width, player.height)
+        if player_rect.colliderect(pole_rect) and not game.flag_raised:
+            game.flag_moving = True
+        if game.flag_moving:
+            current_x, current_y = game.flag_position
+            if current_y > FLAG_TOP:
+                game.flag_position = (current_x, current_y - FLAG_SPEED)
+            else:
+                game.flag_moving = False
+                game.flag_raised = True
+                game.flag_raised_time = game.tick_time
+                game.timer_stopped = True
+                game.final_time = game.flag_raised_time - game.start_time
+                flag_finished = True
+
+    player.handle_input(keys, game.current_level)
+    return flag_finished
+
+def load_simulation_levels(path=None):
+    """
+    Load the level pack and the geometry of every level, without images.
+
+    Args:
+        path (str): Path of the level pack manifest to simulate, or None to keep the levels already
+            loaded, the game's own tower if there are none.
+
+    Returns:
+        None
+    """
+    global SIMULATION_PACK
+    if path is not None and (SIMULATION_PACK is None or os.path.normpath(path) != os.path.normpath(SIMULATION_PACK)):
+        load_level_pack(path)
+        SIMULATION_PACK = path
+    elif not LEVEL_DATA:
+        load_level_pack()
+        SIMULATION_PACK = LEVEL_PACK_PATH
+    for index in range(len(LEVEL_DATA)):
+        load_level_geometry(index)
+
+class Simulation:
+    def __init__(self):
+        """
+        Initialize a headless simulation in the state of a freshly launched game.
+
+        The levels must have been loaded with load_simulation_levels().
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.sounds = SilentSoundBank()
+        self.developer_mode = False
+        self.world = None
+        self.emitters = build_level_emitters(LEVEL_DATA)
+        self.tick_time = 0
+        self.restore(0, 0, 0, {})
+
+    def get_tick_time(self):
+        """
+        Return the timestamp of the tick being simulated. Used as the player's time source.
+
+        Returns:
+            float: Tick timestamp in seconds.
+        """
+        return self.tick_time
+
+    def restore(self, tick_time, level, start_time, player_state):
+        """
+        Reset the simulation to a given game state, as when a game is started or continued.
+
+        Args:
+            tick_time (float): Timestamp of the restored state.
+            level (int): Zero-based level index.
+            start_time (float): Timestamp the run's timer counts from.
+            player_state (dict): Player state as returned by Player.get_state(). Missing attributes
+                keep the values of a newly created player.
+
+        Returns:
+            None
+        """
+        self.tick_time = tick_time
+        self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 60, self.sounds, headless=True)
+        self.player.time_source = self.get_tick_time
+        self.player.set_state(player_state)
+        self.current_level = level
+        self.start_time = start_time
+        self.projectiles = ProjectileSystem(self.emitters)
+        self.is_paused = False
+        self.paused_time_start = 0
+        self.died = False
+        self.flag_position = next((data.flag_position for data in LEVEL_DATA if data.flag_position), None)
+        self.flag_moving = False
+        self.flag_raised = False
+        self.flag_raised_time = None
+        self.timer_stopped = False
+        self.final_time = None
+
+    def trigger_death(self):
+        """
+        Record the player's death.
+
+        Returns:
+            None
+        """
+        self.died = True
+        self.player.current_health = 0
+        self.start_time = 0
+
+    def set_paused(self, paused):
+        """
+        Pause or resume the simulation, shifting the start time by the paused duration like the game.
+
+        Args:
+            paused (bool): Whether the game is paused from this tick on.
+
+        Returns:
+            None
+        """
+        if paused == self.is_paused:
+            return
+        self.is_paused = paused
+        if paused:
+            self.paused_time_start = self.tick_time
+        elif self.paused_time_start > 0:
+            self.start_time += self.tick_time - self.paused_time_start
+            self.paused_time_start = 0
+
+    def press_jump(self, timestamp=None):
+        """
+        Apply a jump key press.
+
+        Args:
+            timestamp (float): When the key was pressed, defaults to the tick timestamp.
+
+        Returns:
+            None
+        """
+        self.player.start_jump(timestamp)
+
+    def release_jump(self, timestamp=None):
+        """
+        Apply a jump key release.
+
+        Args:
+            timestamp (float): When the key was released, defaults to the tick timestamp.
+
+        Returns:
+            None
+        """
+        self.player.release_jump(self.current_level, timestamp)
+        self.player.reset_jump()
+
+    def step(self, tick_time, left=False, right=False, jump=False):
+        """
+        Simulate one gameplay tick.
+
+        Args:
+            tick_time (float): Timestamp of the tick.
+            left (bool): Whether the move-left key is held.
+            right (bool): Whether the move-right key is held.
+            jump (bool): Whether the jump key is held.
+
+        Returns:
+            bool: True if the flag finished rising during this tick.
+        """
+        self.tick_time = tick_time
+        return step_gameplay(self, input_keys(left, right, jump))
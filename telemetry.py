@@ -0,0 +1,261 @@
+import numpy as np
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+"""
+telemetry.py
+
+This module records gameplay telemetry of the King's Trial game: where players jump from,
+where they land, where they fall and take damage, where they die and when they change levels.
+The heatmap tool (heatmap.py) aggregates the recorded files offline.
+
+Features:
+- Fixed 17-byte event records in a preallocated ring buffer, packed in place without allocating.
+- Change detection on a handful of player fields per tick, so resting and walking cost almost nothing.
+- Flushes to a compact append-only file on a background thread; the game never waits for the disk.
+- Events are dropped and counted, never blocking a frame, if the writer falls behind.
+- Streaming reader that decodes a telemetry file in fixed-size numpy chunks, however large the file is.
+- Levels stored in 16 bits, so generated towers of any height can be recorded; files of the earlier
+  8-bit format are still read.
+"""
+TELEMETRY_DIR = "telemetry"
+TELEMETRY_MAGIC = b"KTTELEM2\n"
+TELEMETRY_MAGIC_V1 = b"KTTELEM1\n"
+
+# (timestamp, event, level, x, y, value), with x and y at the player's feet
+EVENT_RECORD = struct.Struct("<dBHhhh")
+EVENT_DTYPE = np.dtype([
+    ("timestamp", "<f8"), ("event", "u1"), ("level", "<u2"), ("x", "<i2"), ("y", "<i2"), ("value", "<i2"),
+])
+EVENT_DTYPE_V1 = np.dtype([
+    ("timestamp", "<f8"), ("event", "u1"), ("level", "u1"), ("x", "<i2"), ("y", "<i2"), ("value", "<i2"),
+])
+
+EVENT_JUMP = 0
+EVENT_LAND = 1
+EVENT_FALL = 2
+EVENT_DEATH = 3
+EVENT_LEVEL = 4
+EVENT_NAMES = ["jump", "land", "fall", "death", "level"]
+
+class TelemetryRecorder:
+    def __init__(self, path, capacity=4096, flush_interval=2.0):
+        """
+        Initialize a recorder with an empty ring buffer. The file is created on the first flush.
+
+        Args:
+            path (str): Path of the telemetry file.
+            capacity (int): Number of events the ring buffer holds.
+            flush_interval (float): Seconds between background flushes.
+
+        Returns:
+            None
+        """
+        self.path = path
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.buffer = bytearray(capacity * EVENT_RECORD.size)
+        self.written = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.last_flush = time.perf_counter()
+        self.writing = None
+        self.executor = None
+        self.enabled = True
+        self.last = None
+
+    @classmethod
+    def new_session(cls):
+        """
+        Create a recorder for this game session in the telemetry directory.
+
+        Returns:
+            TelemetryRecorder: Recorder writing to a new, timestamped telemetry file.
+        """
+        name = time.strftime("session-%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03}.ktt"
+        return cls(os.path.join(TELEMETRY_DIR, name))
+
+    def record(self, timestamp, event, level, x, y, value=0):
+        """
+        Pack one event into the ring buffer, or drop it if the buffer is full.
+
+        Args:
+            timestamp (float): When the event happened.
+            event (int): One of the EVENT_* types.
+            level (int): Zero-based level index.
+            x (float): x-coordinate of the player's feet in level coordinates.
+            y (float): y-coordinate of the player's feet in level coordinates.
+            value (int): Event detail: fall damage, or the previous level of a level change.
+
+        Returns:
+            None
+        """
+        if self.written - self.flushed >= self.capacity:
+            self.dropped += 1
+            return
+        offset = self.written % self.capacity * EVENT_RECORD.size
+        EVENT_RECORD.pack_into(self.buffer, offset, timestamp, event, level, int(x), int(y), value)
+        self.written += 1
+
+    def start(self, level, player):
+        """
+        Take the player's current state as the baseline, e.g. when a run starts or a save is loaded.
+
+        Args:
+            level (int): Zero-based level index.
+            player (Player): The player.
+
+        Returns:
+            None
+        """
+        self.last = (level, player.x + player.width / 2, player.y + player.height, player.grounded,
+                     player.jump_count, player.fall_counter, player.current_health)
+
+    def track(self, timestamp, level, player):
+        """
+        Record the events a gameplay tick caused, by comparing the player with the previous tick.
+
+        Args:
+            timestamp (float): Timestamp of the tick.
+            level (int): Zero-based level the player is on after the tick.
+            player (Player): The player.
+
+        Returns:
+            None
+        """
+        last = self.last
+        x, y = player.x + player.width / 2, player.y + player.height
+        self.last = (level, x, y, player.grounded, player.jump_count, player.fall_counter, player.current_health)
+        if last is None or not self.enabled:
+            return
+        last_level, last_x, last_y, grounded, jumps, falls, health = last
+        if player.jump_count > jumps:
+            self.record(timestamp, EVENT_JUMP, last_level, last_x, last_y)
+        if level != last_level:
+            self.record(timestamp, EVENT_LEVEL, level, x, y, last_level)
+        if player.grounded and not grounded:
+            self.record(timestamp, EVENT_LAND, level, x, y)
+        if player.fall_counter > falls:
+            self.record(timestamp, EVENT_FALL, level, x, y, max(0, health - player.current_health))
+        if player.current_health <= 0 < health:
+            self.record(timestamp, EVENT_DEATH, level, x, y)
+
+    def update(self):
+        """
+        Hand buffered events to the background writer every flush interval, or sooner if the buffer is half full.
+        Called once per frame.
+
+        Returns:
+            None
+        """
+        pending = self.written - self.flushed
+        if not pending or not self.enabled:
+            return
+        if self.writing is not None:
+            if not self.writing.done():
+                return
+            self._collect()
+        if pending < self.capacity // 2 and time.perf_counter() - self.last_flush < self.flush_interval:
+            return
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="telemetry-writer")
+        self.last_flush = time.perf_counter()
+        self.writing = self.executor.submit(self._write, self.written)
+
+    def _collect(self):
+        """
+        Report the result of the last background flush.
+
+        Returns:
+            None
+        """
+        try:
+            self.writing.result()
+        except OSError as e:
+            print(f"Failed to write telemetry: {e}")
+            self.enabled = False
+        self.writing = None
+
+    def _write(self, end):
+        """
+        Append the events up to a write count to the file. Runs on the writer thread.
+
+        The game only writes outside this range, so the bytes can be read without a lock.
+
+        Args:
+            end (int): Value of the written counter to flush up to.
+
+        Returns:
+            None
+        """
+        size = EVENT_RECORD.size
+        start = self.flushed % self.capacity * size
+        stop = end % self.capacity * size
+        if stop > start or end == self.flushed:
+            chunks = [self.buffer[start:stop]]
+        else:
+            chunks = [self.buffer[start:], self.buffer[:stop]]
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        is_new = not os.path.exists(self.path)
+        with open(self.path, 'ab') as telemetry_file:
+            if is_new:
+                telemetry_file.write(TELEMETRY_MAGIC)
+            for chunk in chunks:
+                telemetry_file.write(chunk)
+        self.flushed = end
+
+    def close(self):
+        """
+        Write every buffered event and stop the writer thread. Called before the game exits.
+
+        Returns:
+            None
+        """
+        if self.writing is not None:
+            self._collect()
+        if self.enabled and self.written > self.flushed:
+            try:
+                self._write(self.written)
+            except OSError as e:
+                print(f"Failed to write telemetry: {e}")
+        if self.dropped:
+            print(f"Telemetry dropped {self.dropped} events")
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+def read_telemetry(path, chunk_events=65536):
+    """
+    Stream the events of a telemetry file in chunks.
+
+    Args:
+        path (str): Path of the telemetry file.
+        chunk_events (int): Number of events read from disk at a time.
+
+    Yields:
+        ndarray: Structured array of up to chunk_events events with the fields of EVENT_DTYPE, in order.
+
+    Raises:
+        ValueError: If the file is not a telemetry file.
+    """
+    with open(path, 'rb') as telemetry_file:
+        magic = telemetry_file.read(len(TELEMETRY_MAGIC))
+        if magic == TELEMETRY_MAGIC:
+            dtype = EVENT_DTYPE
+        elif magic == TELEMETRY_MAGIC_V1:
+            dtype = EVENT_DTYPE_V1
+        else:
+            raise ValueError("not a King's Trial telemetry file")
+        chunk_size = chunk_events * dtype.itemsize
+        while True:
+            chunk = telemetry_file.read(chunk_size)
+            # A file cut off mid-record by a crash loses only the partial record.
+            usable = len(chunk) - len(chunk) % dtype.itemsize
+            if usable:
+                events = np.frombuffer(chunk, dtype, usable // dtype.itemsize)
+                yield events if dtype is EVENT_DTYPE else events.astype(EVENT_DTYPE)
+            if len(chunk) < chunk_size:
+                return
@@ -0,0 +1,92 @@
+import os
+import sys
+import unittest
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, ROOT)
+import levels
+from levels import SLOPE, WALL, SLOPE_MAX_WIDTH
+"""
+test_slopes.py
+
+Checks that the platform classification of the sliding levels matches the slide rules the player
+used before platforms were classified at load time.
+"""
+SLIDING_LEVELS = (11, 14, 16)
+
+def baseline_slide_direction(level, x):
+    """
+    Return the slide direction of a narrow platform under the original rules of Player.handle_slope.
+
+    Args:
+        level (int): Zero-based level index.
+        x (int): x-coordinate the rules compared against.
+
+    Returns:
+        int: -1 for left, 1 for right, 0 if the player does not slide.
+    """
+    if level == 16:
+        return 1 if x < 561 else -1 if x > 561 else 0
+    if level == 14:
+        return -1
+    if level == 11:
+        if x < 100:
+            return 1
+        if 100 < x < 388:
+            return -1
+        if x > 388:
+            return 1
+    return 0
+
+class SlopeClassificationTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.cwd = os.getcwd()
+        os.chdir(ROOT)
+        levels.load_level_pack()
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.cwd)
+
+    def classify(self, level):
+        data = levels.LEVEL_DATA[level]
+        return levels.classify_platforms(levels.extract_platforms(data.platforms_path), data.slide_columns)
+
+    def test_sliding_levels_match_baseline(self):
+        for level in SLIDING_LEVELS:
+            for platform in self.classify(level):
+                if platform.width >= SLOPE_MAX_WIDTH:
+                    self.assertNotEqual(platform.kind, SLOPE, (level, tuple(platform)))
+                    continue
+                left = baseline_slide_direction(level, platform.left)
+                right = baseline_slide_direction(level, platform.right - 1)
+                if left == right:
+                    expected = (SLOPE, left) if left else (WALL, 0)
+                else:
+                    # The rules change direction over this column: a ridge split at its centre.
+                    self.assertEqual(baseline_slide_direction(level, platform.centerx - 1), -1)
+                    self.assertEqual(baseline_slide_direction(level, platform.centerx + 1), 1)
+                    expected = (SLOPE, 0)
+                self.assertEqual((platform.kind, platform.direction), expected, (level, tuple(platform)))
+
+    def test_reported_columns_slide(self):
+        reported = {
+            11: [(792, 136, 8, 592), (360, 568, 8, 8), (408, 568, 8, 8), (784, 648, 8, 32)],
+            14: [(32, 0, 8, 24), (48, 0, 8, 24), (64, 0, 8, 24), (32, 432, 8, 32), (48, 432, 8, 32),
+                 (64, 432, 8, 32), (32, 672, 8, 32)],
+            16: [(352, 664, 8, 8)],
+        }
+        for level, rects in reported.items():
+            kinds = {tuple(platform): platform.kind for platform in self.classify(level)}
+            for rect in rects:
+                self.assertEqual(kinds[rect], SLOPE, (level, rect))
+
+    def test_other_levels_have_no_slopes(self):
+        for level in range(len(levels.LEVEL_DATA)):
+            if level not in SLIDING_LEVELS:
+                kinds = {platform.kind for platform in self.classify(level)}
+                self.assertNotIn(SLOPE, kinds, level)
+
+if __name__ == "__main__":
+    unittest.main()
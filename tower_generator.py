@@ -0,0 +1,610 @@
+import argparse
+import heapq
+import json
+import os
+import pygame
+import random
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from constants import FPS, SCREEN_WIDTH, SCREEN_HEIGHT
+from levels import (
+    LEVEL_DATA, LEVEL_BACKGROUNDS, LEVEL_PLATFORMS, DEFAULT_GRAVITY, LevelData, classify_platforms, image_platforms,
+)
+from simulation import Simulation
+"""
+tower_generator.py
+
+This module generates new King's Trial towers: platform layouts and matching placeholder backgrounds,
+written as a level pack in the same format as the game's own levels.
+Every candidate level is climbed by a headless simulation with the game's real jump physics before it
+is accepted, starting from the states the player can leave the level below in.
+
+Features:
+- Seedable generation: the same seed always produces the same tower.
+- Streaming: levels are generated, checked and written one at a time, so towers can be endless.
+- Solvability checks in a process pool, one candidate level per worker at a time.
+- A best-first search over walks and jump charges, from the lowest reachable platforms to the exit.
+- Placeholder background art derived from the platform layout, with a palette that changes with height.
+- Command line interface: `python tower_generator.py --seed 7 --levels 100 --out generated/tower-7`.
+"""
+# Levels are designed on the 100x100 grid of the pixel art; one cell is 8x8 pixels on the screen.
+GRID_SIZE = 100
+CELL_SIZE = SCREEN_WIDTH // GRID_SIZE
+START_TIME = 1.0
+PLAYER_SIZE = 40
+MAX_FALL_SPEED = 15
+
+# Search over the jumps from every platform position.
+WALK_TICKS = (-24, -12, 0, 12, 24)
+CHARGE_TICKS = (1, 8, 16, 24, 32, 40, 48)
+FLIGHT_TICKS = 300
+MAX_POSITIONS = 80
+# Slowest upward speed an exit must have, so the player rises well into the level above.
+MIN_EXIT_SPEED = 15
+MAX_EXITS = 6
+MAX_ATTEMPTS = 64
+
+# (sky top, sky bottom, stone, moss) per band of ten levels
+PALETTES = [
+    ((40, 60, 110), (120, 160, 200), (96, 84, 72), (88, 150, 70)),
+    ((30, 30, 70), (90, 80, 140), (80, 80, 96), (120, 120, 170)),
+    ((70, 40, 60), (200, 120, 90), (110, 80, 60), (190, 140, 70)),
+    ((20, 50, 60), (70, 140, 140), (70, 90, 90), (110, 190, 170)),
+    ((10, 10, 30), (50, 40, 90), (60, 56, 70), (200, 200, 230)),
+]
+PLATFORM_COLOR = (255, 255, 255, 255)
+POLE_COLOR = (60, 40, 30)
+
+class GeneratedLevel:
+    def __init__(self, index, bars, pole, stats):
+        """
+        Initialize an accepted level.
+
+        Args:
+            index (int): Zero-based level index in the tower.
+            bars (list[tuple]): Platforms as (x, y, width, height) in grid cells.
+            pole (tuple): Flag pole rect (x, y, width, height) in pixels, or None if the level has no flag.
+            stats (dict): Result of the solvability check.
+
+        Returns:
+            None
+        """
+        self.index = index
+        self.bars = bars
+        self.pole = pole
+        self.stats = stats
+
+    def metadata(self, background_path, platforms_path):
+        """
+        Build the level's metadata in the level pack format.
+
+        Args:
+            background_path (str): Path of the background image.
+            platforms_path (str): Path of the platform layout image.
+
+        Returns:
+            dict: Level metadata as read by LevelData.
+        """
+        return level_metadata(self.index, self.pole, background_path, platforms_path)
+
+def level_metadata(index, pole, background_path="", platforms_path=""):
+    """
+    Build the metadata of a generated level.
+
+    Args:
+        index (int): Zero-based level index in the tower.
+        pole (tuple): Flag pole rect in pixels, or None.
+        background_path (str): Path of the background image.
+        platforms_path (str): Path of the platform layout image.
+
+    Returns:
+        dict: Level metadata as read by LevelData.
+    """
+    exits = {}
+    if index == 0:
+        exits["bottom"] = False
+    if pole:
+        x, y, _, _ = pole
+        exits["top"] = False
+        exits["flag"] = {"pole": list(pole), "flag_position": [x - 69, y - 16]}
+    return {"background": background_path, "platforms": platforms_path, "exits": exits}
+
+def flag_pole(bar):
+    """
+    Return the flag pole standing on the right end of a platform.
+
+    Args:
+        bar (tuple): Platform (x, y, width, height) in grid cells.
+
+    Returns:
+        tuple: Pole rect (x, y, width, height) in pixels.
+    """
+    x, y, width, _ = bar
+    return ((x + width - 2) * CELL_SIZE, y * CELL_SIZE - 100, 10, 100)
+
+def landing_spots(entries, gravity=DEFAULT_GRAVITY):
+    """
+    Find where a platform near the bottom of a level catches the player entering it from below.
+
+    The player rises into the level on the jump that left the level below and comes down further
+    along. A platform on the way down catches him if it is clear of the way up, where he would bump
+    his head on it instead. Only entries moving sideways can land this way.
+
+    Args:
+        entries (list[tuple]): (tick_time, player state) pairs the player enters the level in.
+        gravity (float): Gravity of the level.
+
+    Returns:
+        list[tuple]: (lowest column, highest column, row, direction) per spot: a platform with its top
+            at the row catches the player if its edge facing the way up is between the two columns.
+    """
+    spots = []
+    for _, state in entries:
+        velocity_x, velocity_y = state.get("x_velocity", 0), state.get("y_velocity", 0)
+        if not velocity_x:
+            continue
+        x, y = state["x"], SCREEN_HEIGHT
+        path = []
+        while y < SCREEN_HEIGHT + 1 and 0 <= x + velocity_x <= SCREEN_WIDTH - PLAYER_SIZE:
+            velocity_y = min(MAX_FALL_SPEED, velocity_y + gravity)
+            x += velocity_x
+            y += velocity_y
+            path.append((x, y, velocity_y))
+        for x, y, velocity_y in path:
+            row = int(y + PLAYER_SIZE) // CELL_SIZE
+            if velocity_y <= 0 or not 60 <= row <= GRID_SIZE - 4:
+                continue
+            # Where the player's head passes the platform's bottom on the way up.
+            rising = next((point[0] for point in path if point[1] < (row + 3) * CELL_SIZE), None)
+            if rising is None:
+                continue
+            if velocity_x > 0:
+                low, high = int(rising + PLAYER_SIZE) // CELL_SIZE + 1, int(x + PLAYER_SIZE) // CELL_SIZE - 1
+            else:
+                low, high = -int(-x // CELL_SIZE) + 1, int(rising) // CELL_SIZE - 1
+            if low <= high:
+                spots.append((low, high, row, 1 if velocity_x > 0 else -1))
+    return spots
+
+def design_level(rng, index, spots, final):
+    """
+    Lay out a candidate level: a climbable zigzag of platforms and a few ledges that may get in the way.
+
+    The zigzag starts on the floor of the first level, and above it on a platform at one of the
+    spots that catch the player entering from the level below.
+
+    Args:
+        rng (Random): Random number generator of the candidate.
+        index (int): Zero-based level index in the tower.
+        spots (list[tuple]): Landing spots as returned by landing_spots. Unused for the first level.
+        final (bool): Whether the level is the top of the tower and gets the flag.
+
+    Returns:
+        tuple: (bars, pole) with the platforms in grid cells, the last of which is the top of the zigzag,
+            and the flag pole in pixels or None.
+    """
+    if index == 0 or not spots:
+        bars = [(0, GRID_SIZE - 2, GRID_SIZE, 2)]
+    else:
+        low, high, row, direction = rng.choice(spots)
+        width = rng.randint(8, 14)
+        edge = rng.randint(low, high)
+        left = edge if direction > 0 else edge - width
+        left = min(GRID_SIZE - width, max(0, left))
+        bars = [(left, row, width, rng.randint(2, 3))]
+    top = bars[0][1]
+
+    while top > 20:
+        top -= rng.randint(12, 20)
+        width = rng.randint(6, 14)
+        # Step aside far enough that the platform above does not overhang the one below.
+        left, _, below_width, _ = bars[-1]
+        center = left + below_width // 2
+        least = (below_width + width) // 2 + 2
+        shift = rng.choice((-1, 1)) * rng.randint(least, least + 16)
+        if not width // 2 <= center + shift <= GRID_SIZE - width // 2:
+            shift = -shift
+        center = min(GRID_SIZE - width // 2, max(width // 2, center + shift))
+        bars.append((center - width // 2, max(8, top), width, rng.randint(2, 3)))
+
+    ledges = []
+    for _ in range(rng.randint(1, 4)):
+        ledge = (rng.randint(0, GRID_SIZE - 8), rng.randint(8, 84), rng.randint(3, 8), 2)
+        grown = pygame.Rect(ledge).inflate(4, 4)
+        if grown.collidelist([pygame.Rect(bar) for bar in bars + ledges]) == -1:
+            ledges.append(ledge)
+
+    return ledges + bars, flag_pole(bars[-1]) if final else None
+
+def platform_image(bars):
+    """
+    Draw a platform layout image, opaque where the platforms are.
+
+    Args:
+        bars (list[tuple]): Platforms as (x, y, width, height) in grid cells.
+
+    Returns:
+        Surface: GRID_SIZE x GRID_SIZE image with per-pixel alpha.
+    """
+    image = pygame.Surface((GRID_SIZE, GRID_SIZE), pygame.SRCALPHA)
+    for bar in bars:
+        image.fill(PLATFORM_COLOR, bar)
+    return image
+
+def background_image(index, bars, pole, rng):
+    """
+    Draw placeholder background art for a level: a sky gradient, specks and the platforms as stone with moss.
+
+    Args:
+        index (int): Zero-based level index, which selects the palette and the part of its gradient.
+        bars (list[tuple]): Platforms in grid cells.
+        pole (tuple): Flag pole rect in pixels, or None.
+        rng (Random): Random number generator for the specks.
+
+    Returns:
+        Surface: GRID_SIZE x GRID_SIZE opaque image.
+    """
+    sky_top, sky_bottom, stone, moss = PALETTES[index // 10 % len(PALETTES)]
+    image = pygame.Surface((GRID_SIZE, GRID_SIZE))
+    for row in range(GRID_SIZE):
+        # One gradient spans the ten levels of a band, so the screens join up when climbing.
+        height = (index % 10 * GRID_SIZE + GRID_SIZE - 1 - row) / (10 * GRID_SIZE - 1)
+        image.fill([round(bottom + (top - bottom) * height) for top, bottom in zip(sky_top, sky_bottom)],
+                   (0, row, GRID_SIZE, 1))
+    for _ in range(40):
+        x, y = rng.randrange(GRID_SIZE), rng.randrange(GRID_SIZE)
+        speck = image.get_at((x, y))
+        image.set_at((x, y), [min(255, channel + 40) for channel in speck[:3]])
+    for x, y, width, height in bars:
+        image.fill(stone, (x, y, width, height))
+        image.fill([channel * 3 // 4 for channel in stone], (x, y + height - 1, width, 1))
+        image.fill(moss, (x, y, width, 1))
+    if pole:
+        x, y, _, height = pole
+        image.fill(POLE_COLOR, (x // CELL_SIZE, y // CELL_SIZE, 1, height // CELL_SIZE))
+    return image
+
+def install_candidate(index, bars, pole):
+    """
+    Make a candidate level the only level of this process, as the game would load it.
+
+    The platforms are extracted from the same image the level pack stores, so the check sees
+    exactly the geometry the game will collide with.
+
+    Args:
+        index (int): Zero-based level index in the tower.
+        bars (list[tuple]): Platforms in grid cells.
+        pole (tuple): Flag pole rect in pixels, or None.
+
+    Returns:
+        None
+    """
+    LEVEL_DATA[:] = [LevelData(level_metadata(index, pole))]
+    LEVEL_BACKGROUNDS[:] = [None]
+    LEVEL_PLATFORMS[:] = [classify_platforms(image_platforms(platform_image(bars)))]
+
+def fly(sim, limit=FLIGHT_TICKS, goal=False):
+    """
+    Simulate without input until the player stands still, leaves the level or the flag is reached.
+
+    Args:
+        sim (Simulation): The simulation, mid-air or on the ground.
+        limit (int): Longest flight in ticks.
+        goal (bool): Whether touching the flag pole ends the climb.
+
+    Returns:
+        str: "landed", "exit", "goal", "fell", "died" or "stuck".
+    """
+    player = sim.player
+    for _ in range(limit):
+        sim.step(sim.tick_time + 1 / FPS)
+        if sim.died:
+            return "died"
+        if goal and (sim.flag_moving or sim.flag_raised):
+            return "goal"
+        if player.y < 0 and not goal:
+            return "exit"
+        if player.y > SCREEN_HEIGHT:
+            return "fell"
+        if player.grounded and player.x_velocity == 0 and player.y_velocity <= player.gravity:
+            return "landed"
+    return "stuck"
+
+def walk(sim, ticks, goal=False):
+    """
+    Walk along the ground for a number of ticks, then settle.
+
+    Args:
+        sim (Simulation): The simulation, with the player standing.
+        ticks (int): Ticks to walk, negative to the left.
+        goal (bool): Whether touching the flag pole ends the climb.
+
+    Returns:
+        str: Outcome as returned by fly().
+    """
+    for _ in range(abs(ticks)):
+        sim.step(sim.tick_time + 1 / FPS, ticks < 0, ticks > 0)
+        if goal and sim.flag_moving:
+            return "goal"
+        if not sim.player.grounded:
+            break
+    # One tick without input stops the walk before the player settles.
+    sim.step(sim.tick_time + 1 / FPS)
+    return fly(sim, goal=goal)
+
+def jump(sim, direction, charge, goal=False):
+    """
+    Charge a jump for a number of ticks, aimed left, up or right, release it and fly until settled.
+
+    Args:
+        sim (Simulation): The simulation, with the player standing.
+        direction (int): -1, 0 or 1.
+        charge (int): Ticks the jump key is held.
+        goal (bool): Whether touching the flag pole ends the climb.
+
+    Returns:
+        str: Outcome as returned by fly().
+    """
+    sim.press_jump(sim.tick_time + 1 / FPS)
+    for _ in range(charge):
+        sim.step(sim.tick_time + 1 / FPS, direction < 0, direction > 0, True)
+    sim.release_jump(sim.tick_time + 1 / FPS)
+    return fly(sim, goal=goal)
+
+def check_level(index, bars, pole, entries):
+    """
+    Search for a way up a candidate level. Runs in a worker process.
+
+    Starting from where the player lands when entering the level, standing positions are expanded
+    highest first: from each, the player walks a little and tries jumps of several charges in every
+    direction, with the game's own gameplay tick. Once the exit has been reached, only positions at
+    least as high as the one it was reached from are expanded, since they give the fastest exits.
+
+    Args:
+        index (int): Zero-based level index in the tower.
+        bars (list[tuple]): Platforms in grid cells.
+        pole (tuple): Flag pole rect in pixels, or None. With a pole, the climb must reach the flag.
+        entries (list[tuple]): (tick_time, player state) pairs the player enters the level in.
+
+    Returns:
+        dict: solvable, exits (the states the player leaves the level in sideways at MIN_EXIT_SPEED or
+            faster, for the level above), positions (standing positions searched) and seconds.
+    """
+    start = time.perf_counter()
+    install_candidate(index, bars, pole)
+    goal = pole is not None
+    sim = Simulation()
+    queue = []
+    seen = set()
+    exits = {}
+    positions = 0
+    solvable = False
+    exit_height = None
+
+    def settle(outcome):
+        nonlocal solvable
+        if outcome == "landed":
+            player = sim.player
+            key = (round(player.x / 16), round(player.y / 4))
+            if key not in seen:
+                seen.add(key)
+                heapq.heappush(queue, (player.y, len(seen), sim.tick_time, player.get_state()))
+        elif outcome == "exit" and sim.player.y_velocity <= -MIN_EXIT_SPEED and sim.player.x_velocity:
+            player = sim.player
+            exits.setdefault((round(player.x / 16), round(player.y_velocity)), (sim.tick_time, player.get_state()))
+            solvable = True
+        elif outcome == "goal":
+            solvable = True
+
+    for tick_time, state in entries:
+        sim.restore(tick_time, 0, 0, state)
+        settle(fly(sim, goal=goal))
+
+    while queue and positions < MAX_POSITIONS and not (goal and solvable):
+        height, _, tick_time, state = heapq.heappop(queue)
+        if exit_height is not None and height > exit_height:
+            break
+        positions += 1
+        for walk_ticks in WALK_TICKS:
+            sim.restore(tick_time, 0, 0, state)
+            if walk_ticks:
+                outcome = walk(sim, walk_ticks, goal)
+                if outcome != "landed" or not sim.player.grounded:
+                    settle(outcome)
+                    continue
+            base_time, base = sim.tick_time, sim.player.get_state()
+            for direction in (-1, 0, 1):
+                for charge in CHARGE_TICKS:
+                    sim.restore(base_time, 0, 0, base)
+                    settle(jump(sim, direction, charge, goal))
+            if goal and solvable:
+                break
+        if exits and exit_height is None:
+            exit_height = height
+
+    # Keep the fastest ways out to each side, which give the level above the most room.
+    best = []
+    for side in (-1, 1):
+        aimed = [(tick_time, state) for tick_time, state in exits.values()
+                 if (state["x_velocity"] > 0) - (state["x_velocity"] < 0) == side]
+        best += sorted(aimed, key=lambda entry: entry[1]["y_velocity"])[:MAX_EXITS // 2]
+    return {
+        "solvable": solvable,
+        "exits": best,
+        "positions": positions,
+        "seconds": time.perf_counter() - start,
+    }
+
+def ignore_interrupts():
+    """
+    Leave Ctrl+C to the main process, which stops the pool. Runs when a worker process starts.
+
+    Returns:
+        None
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+class TowerGenerator:
+    def __init__(self, seed=0, workers=None):
+        """
+        Start a pool of worker processes for the solvability checks.
+
+        Args:
+            seed (int): Seed of the tower. The same seed always produces the same levels.
+            workers (int): Number of worker processes, and candidates checked at a time.
+                Defaults to the number of CPU cores.
+
+        Returns:
+            None
+        """
+        self.seed = seed
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=ignore_interrupts)
+        self.candidates = 0
+
+    def candidate(self, index, attempt, spots, final):
+        """
+        Design one candidate for a level, determined by the seed, level and attempt.
+
+        Args:
+            index (int): Zero-based level index.
+            attempt (int): Candidate number for the level.
+            spots (list[tuple]): Landing spots of the player entering the level, see landing_spots.
+            final (bool): Whether the level is the top of the tower.
+
+        Returns:
+            tuple: (bars, pole) as returned by design_level.
+        """
+        return design_level(random.Random(f"{self.seed}:{index}:{attempt}"), index, spots, final)
+
+    def levels(self, count=None):
+        """
+        Generate the tower level by level, yielding each level as soon as it has been accepted.
+
+        Candidates for a level are checked in parallel, and the first solvable one in candidate order
+        is accepted, so the result does not depend on which worker finishes first.
+
+        Args:
+            count (int): Number of levels, the last of which gets the flag. None for an endless tower.
+
+        Yields:
+            GeneratedLevel: The accepted levels, in order.
+
+        Raises:
+            RuntimeError: If no candidate for a level can be climbed.
+        """
+        entries = [(START_TIME, {})]
+        index = 0
+        while count is None or index < count:
+            final = count is not None and index == count - 1
+            accepted = None
+            spots = landing_spots(entries)
+            for attempt in range(0, MAX_ATTEMPTS, self.workers):
+                designs = [self.candidate(index, attempt + k, spots, final) for k in range(self.workers)]
+                futures = [self.pool.submit(check_level, index, bars, pole, entries) for bars, pole in designs]
+                for number, ((bars, pole), future) in enumerate(zip(designs, futures), attempt + 1):
+                    result = future.result()
+                    self.candidates += 1
+                    if result["solvable"]:
+                        result["attempts"] = number
+                        accepted = GeneratedLevel(index, bars, pole, result)
+                        break
+                if accepted:
+                    for future in futures:
+                        future.cancel()
+                    break
+            if accepted is None:
+                raise RuntimeError(f"no climbable layout for level {index + 1} in {MAX_ATTEMPTS} candidates")
+            entries = accepted.stats["exits"]
+            yield accepted
+            index += 1
+
+    def close(self):
+        """
+        Stop the worker processes.
+
+        Returns:
+            None
+        """
+        self.pool.shutdown(cancel_futures=True)
+
+class PackWriter:
+    def __init__(self, directory, seed=0):
+        """
+        Initialize a writer of a level pack directory.
+
+        Args:
+            directory (str): Directory of the pack, created if needed.
+            seed (int): Seed for the background art.
+
+        Returns:
+            None
+        """
+        self.directory = directory
+        self.seed = seed
+        self.level_files = []
+        for subdirectory in ("platforms", "background"):
+            os.makedirs(os.path.join(directory, subdirectory), exist_ok=True)
+
+    def write(self, level):
+        """
+        Write a level's images and metadata, and update the manifest so the pack is always loadable.
+
+        Args:
+            level (GeneratedLevel): The level.
+
+        Returns:
+            None
+        """
+        name = f"level{level.index + 1:03}"
+        platforms_path = os.path.join(self.directory, "platforms", f"{name}.png")
+        background_path = os.path.join(self.directory, "background", f"{name}.png")
+        pygame.image.save(platform_image(level.bars), platforms_path)
+        rng = random.Random(f"{self.seed}:{level.index}:art")
+        pygame.image.save(background_image(level.index, level.bars, level.pole, rng), background_path)
+        with open(os.path.join(self.directory, f"{name}.json"), 'w') as level_file:
+            json.dump(level.metadata(background_path, platforms_path), level_file, indent=4)
+        self.level_files.append(f"{name}.json")
+        with open(os.path.join(self.directory, "pack.json"), 'w') as pack_file:
+            json.dump({"levels": self.level_files}, pack_file, indent=4)
+
+def main():
+    """
+    Generate a tower from the command line and write it as a level pack.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description="Generate a King's Trial tower")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the tower")
+    parser.add_argument("--levels", type=int, default=20, help="number of levels, 0 to generate until interrupted")
+    parser.add_argument("--out", default=None, help="output directory, defaults to generated/tower-SEED")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, defaults to the CPU cores")
+    args = parser.parse_args()
+
+    directory = args.out or os.path.join("generated", f"tower-{args.seed}")
+    generator = TowerGenerator(args.seed, args.workers)
+    writer = PackWriter(directory, args.seed)
+    start = time.perf_counter()
+    try:
+        for level in generator.levels(args.levels or None):
+            try:
+                writer.write(level)
+            except (OSError, pygame.error) as e:
+                print(f"Failed to write level {level.index + 1}: {e}")
+                break
+            stats = level.stats
+            print(f"Level {level.index + 1:3}: candidate {stats['attempts']}, "
+                  f"{stats['positions']} positions searched in {stats['seconds']:.1f}s")
+    except RuntimeError as e:
+        print(f"Failed to generate the tower: {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        generator.close()
+    print(f"Wrote {len(writer.level_files)} levels to {directory} in {time.perf_counter() - start:.1f}s "
+          f"({generator.candidates} candidates checked)")
+
+if __name__ == "__main__":
+    main()
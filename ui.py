@@ -0,0 +1,279 @@
+import pygame
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+"""
+ui.py
+
+This module implements the retained-mode interface layer of the King's Trial game.
+Menus and overlays are trees of widgets that keep their rendered image between frames,
+so a screen that did not change costs a few blits instead of loading and rendering everything again.
+
+Features:
+- Labels and images that render once and again only when their text, color or image changes.
+- Dirty flags for the rendered image of a widget and for the composed picture of its screen.
+- Static widgets of a screen composed into one cached surface, rebuilt only when one of them changes.
+- Live widgets, such as the selected option, the cursor or a running timer, drawn on top from their own cache.
+- Full screens composed onto a fill color, overlays onto a transparent layer the size of their widgets.
+"""
+class Widget:
+    def __init__(self, position=(0, 0), anchor="topleft", live=False):
+        """
+        Initialize a widget that has not been rendered yet.
+
+        Args:
+            position (tuple): Screen position of the anchor point.
+            anchor (str): Rect attribute the position refers to, e.g. "topleft" or "midtop".
+            live (bool): Whether the widget changes often and is drawn on its own instead of being composed.
+
+        Returns:
+            None
+        """
+        self.position = position
+        self.anchor = anchor
+        self.live = live
+        self.visible = True
+        self.surface = None
+        self.dirty = True
+        self.changed = True
+
+    def render(self):
+        """
+        Render the widget's image. Implemented by every widget type.
+
+        Returns:
+            Surface: The widget's image.
+        """
+        raise NotImplementedError
+
+    def invalidate(self):
+        """
+        Mark the widget's image as out of date, so it is rendered again before it is drawn next.
+
+        Returns:
+            None
+        """
+        self.dirty = True
+        self.changed = True
+
+    def image(self):
+        """
+        Return the widget's image, rendering it if it is out of date.
+
+        Returns:
+            Surface: The widget's image.
+        """
+        if self.dirty:
+            self.surface = self.render()
+            self.dirty = False
+        return self.surface
+
+    @property
+    def rect(self):
+        """
+        Screen area covered by the widget.
+
+        Returns:
+            Rect: The area, with the anchor point at the widget's position.
+        """
+        return self.image().get_rect(**{self.anchor: self.position})
+
+    def place(self, position):
+        """
+        Move the widget without rendering it again.
+
+        Args:
+            position (tuple): New screen position of the anchor point.
+
+        Returns:
+            None
+        """
+        if position != self.position:
+            self.position = position
+            self.changed = True
+
+    def show(self, visible):
+        """
+        Show or hide the widget.
+
+        Args:
+            visible (bool): Whether the widget is drawn.
+
+        Returns:
+            None
+        """
+        if visible != self.visible:
+            self.visible = visible
+            self.changed = True
+
+class Label(Widget):
+    def __init__(self, font, text="", color=(255, 255, 255), position=(0, 0), anchor="topleft", live=False):
+        """
+        Initialize a line of text.
+
+        Args:
+            font (Font): Font the text is rendered with.
+            text (str): The text.
+            color (tuple): RGB text color.
+            position (tuple): Screen position of the anchor point.
+            anchor (str): Rect attribute the position refers to.
+            live (bool): Whether the label is drawn on its own instead of being composed.
+
+        Returns:
+            None
+        """
+        super().__init__(position, anchor, live)
+        self.font = font
+        self.text = text
+        self.color = color
+
+    def set_text(self, text, color=None):
+        """
+        Change the text or its color, marking the label dirty only if either differs.
+
+        Args:
+            text (str): The new text.
+            color (tuple): The new RGB color, or None to keep the current one.
+
+        Returns:
+            None
+        """
+        color = self.color if color is None else color
+        if text != self.text or color != self.color:
+            self.text = text
+            self.color = color
+            self.invalidate()
+
+    def render(self):
+        """
+        Render the text in the label's font and color.
+
+        Returns:
+            Surface: The rendered text.
+        """
+        return self.font.render(self.text, True, self.color)
+
+class Image(Widget):
+    def __init__(self, surface, position=(0, 0), anchor="topleft", live=False):
+        """
+        Initialize a widget showing an image that is already loaded.
+
+        Args:
+            surface (Surface): The image.
+            position (tuple): Screen position of the anchor point.
+            anchor (str): Rect attribute the position refers to.
+            live (bool): Whether the image is drawn on its own instead of being composed.
+
+        Returns:
+            None
+        """
+        super().__init__(position, anchor, live)
+        self.source = surface
+
+    def set_image(self, surface):
+        """
+        Show a different image, marking the widget dirty only if it is not the current one.
+
+        Args:
+            surface (Surface): The new image.
+
+        Returns:
+            None
+        """
+        if surface is not self.source:
+            self.source = surface
+            self.invalidate()
+
+    def render(self):
+        """
+        Return the image as it is; it was rendered when it was loaded.
+
+        Returns:
+            Surface: The image.
+        """
+        return self.source
+
+class UIScreen:
+    def __init__(self, fill=None):
+        """
+        Initialize an empty screen.
+
+        Args:
+            fill (tuple): RGB color the screen is cleared to, or None for an overlay drawn over the game.
+
+        Returns:
+            None
+        """
+        self.fill = fill
+        self.widgets = []
+        self.composed = None
+        self.composed_pos = (0, 0)
+        self.stale = True
+        self.compositions = 0
+
+    def add(self, widget):
+        """
+        Add a widget on top of the widgets added before it.
+
+        Live widgets are always drawn above the composed ones.
+
+        Args:
+            widget (Widget): The widget.
+
+        Returns:
+            Widget: The same widget, for assignment.
+        """
+        self.widgets.append(widget)
+        self.stale = True
+        return widget
+
+    def compose(self):
+        """
+        Draw the visible static widgets into a new cached surface.
+
+        A new surface is created instead of redrawing the old one, so images cached per surface by
+        the canvas, such as downscaled copies, never go stale.
+
+        Returns:
+            None
+        """
+        static = [widget for widget in self.widgets if not widget.live]
+        shown = [widget for widget in static if widget.visible]
+        if self.fill is not None:
+            bounds = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+            composed = pygame.Surface(bounds.size).convert()
+            composed.fill(self.fill)
+        elif shown:
+            bounds = shown[0].rect.unionall([widget.rect for widget in shown[1:]])
+            composed = pygame.Surface(bounds.size, pygame.SRCALPHA).convert_alpha()
+            composed.fill((0, 0, 0, 0))
+        else:
+            bounds, composed = None, None
+        if composed is not None:
+            composed.blits(
+                [(widget.image(), widget.rect.move(-bounds.x, -bounds.y)) for widget in shown], doreturn=False
+            )
+        for widget in static:
+            widget.changed = False
+        self.composed = composed
+        self.composed_pos = bounds.topleft if bounds else (0, 0)
+        self.stale = False
+        self.compositions += 1
+
+    def draw(self, target):
+        """
+        Draw the screen: the composed static widgets, then every visible live widget.
+
+        The composition is rebuilt first if a static widget changed since it was made.
+
+        Args:
+            target (Surface | Canvas): The surface to draw on.
+
+        Returns:
+            None
+        """
+        if self.stale or any(widget.changed for widget in self.widgets if not widget.live):
+            self.compose()
+        if self.composed is not None:
+            target.blit(self.composed, self.composed_pos)
+        for widget in self.widgets:
+            if widget.live and widget.visible:
+                target.blit(widget.image(), widget.rect.topleft)
@@ -0,0 +1,342 @@
+import argparse
+import glob
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from constants import FPS
+from levels import LEVEL_PACK_PATH
+from replay import (
+    read_replay, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, INPUT_JUMP_PRESSED, INPUT_JUMP_RELEASED,
+    INPUT_RELEASE_FIRST, INPUT_DEVELOPER, INPUT_PAUSED,
+)
+from simulation import Simulation, load_simulation_levels
+"""
+verify_replays.py
+
+This module verifies King's Trial replays, so best times submitted to a leaderboard can be trusted.
+Every replay is re-simulated headless from its recorded input, and the simulated run must reach
+the flag pole with the same time, jumps and falls that the game reported.
+
+Features:
+- Tick-exact re-simulation with the game's own gameplay code.
+- Checks of saves, resumes, pauses, developer mode and the recorded tick rate.
+- Replays simulated on the level pack they were recorded on.
+- A process pool that verifies many replays in parallel on every core.
+- Throughput metrics in replays, ticks and simulated hours per second.
+- Command line interface: `python verify_replays.py replays/*.ktr --progress progress.json`.
+"""
+# Replays may run slightly faster than the frame cap, since the game's clock is not exact.
+MAX_TICK_RATE = FPS * 1.1
+TOLERANCE = 1e-6
+
+def same(a, b):
+    """
+    Compare two recorded values, allowing for float rounding.
+
+    Args:
+        a: First value.
+        b: Second value.
+
+    Returns:
+        bool: True if the values are equal.
+    """
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return math.isclose(a, b, abs_tol=TOLERANCE)
+    return a == b
+
+def mismatch(name, recorded, simulated):
+    """
+    Format a verdict reason for a recorded value that the simulation does not reproduce.
+
+    Args:
+        name (str): Name of the value.
+        recorded: Value recorded by the game.
+        simulated: Value reproduced by the simulation.
+
+    Returns:
+        str: Human-readable reason.
+    """
+    return f"{name} mismatch: recorded {recorded}, simulated {simulated}"
+
+def verify_replay(path):
+    """
+    Re-simulate a replay and check it against the results the game recorded.
+
+    The levels must have been loaded with load_simulation_levels(); replays recorded on another
+    level pack load theirs when their run starts.
+
+    Args:
+        path (str): Path of the replay file.
+
+    Returns:
+        dict: Verdict with the keys path, valid, reason, claimed_time, simulated_time, jumps, falls and ticks.
+    """
+    verdict = {
+        "path": path, "valid": False, "reason": None, "claimed_time": None,
+        "simulated_time": None, "jumps": None, "falls": None, "ticks": 0,
+    }
+    sim = Simulation()
+    spawn_state = sim.player.get_state()
+    running = False
+    saved = None
+    last_time = None
+    active_ticks = 0
+    jumps = []
+
+    try:
+        for record in read_replay(path):
+            if record[0] == "tick":
+                _, tick_time, inputs = record
+                verdict["ticks"] += 1
+                if not running:
+                    return dict(verdict, reason="input recorded outside a run")
+                if inputs & INPUT_DEVELOPER:
+                    return dict(verdict, reason="developer mode used")
+                if last_time is not None and tick_time < last_time:
+                    return dict(verdict, reason="tick timestamps go backwards")
+                if any(not last_time <= timestamp <= tick_time for _, timestamp in jumps):
+                    return dict(verdict, reason="jump key timestamp outside its tick")
+                last_time = tick_time
+
+                sim.tick_time = tick_time
+                if jumps:
+                    # Replays with key timestamps charge jumps from the exact press and release times.
+                    for pressed, timestamp in jumps:
+                        if pressed:
+                            sim.press_jump(timestamp)
+                        else:
+                            sim.release_jump(timestamp)
+                    jumps = []
+                else:
+                    released = inputs & INPUT_JUMP_RELEASED
+                    if released and inputs & INPUT_RELEASE_FIRST:
+                        sim.release_jump()
+                    if inputs & INPUT_JUMP_PRESSED:
+                        sim.press_jump()
+                    if released and not inputs & INPUT_RELEASE_FIRST:
+                        sim.release_jump()
+                sim.set_paused(bool(inputs & INPUT_PAUSED))
+                if sim.is_paused:
+                    continue
+                active_ticks += 1
+                sim.step(tick_time, inputs & INPUT_LEFT, inputs & INPUT_RIGHT, inputs & INPUT_JUMP)
+                if sim.died:
+                    running = False
+                continue
+
+            if record[0] == "jump":
+                if not running:
+                    return dict(verdict, reason="input recorded outside a run")
+                jumps.append(record[1:])
+                continue
+
+            meta = record[1]
+            event = meta.get("event")
+            if event == "start":
+                load_simulation_levels(meta.get("pack", LEVEL_PACK_PATH))
+                sim = Simulation()
+                spawn_state = sim.player.get_state()
+                player_state = meta["player"]
+                for name in ("x", "y", "current_health", "jump_count", "fall_counter"):
+                    if not same(player_state.get(name), spawn_state[name]):
+                        return dict(verdict, reason=mismatch(f"starting {name}", player_state.get(name), spawn_state[name]))
+                if meta["level"] != 0 or not same(meta["start_time"], meta["time"]):
+                    return dict(verdict, reason="run does not start on the first level with a zeroed timer")
+                sim.restore(meta["time"], 0, meta["time"], player_state)
+                running = True
+                saved = None
+                last_time = meta["time"]
+                active_ticks = 0
+
+            elif event == "save":
+                if not running:
+                    return dict(verdict, reason="save outside a run")
+                simulated = {
+                    "x": sim.player.x, "y": sim.player.y, "level": sim.current_level,
+                    "health": sim.player.current_health, "jumps": sim.player.jump_count,
+                    "falls": sim.player.fall_counter,
+                    "elapsed": meta["time"] - sim.start_time if sim.start_time > 0 else 0,
+                }
+                for name, value in simulated.items():
+                    if not same(meta[name], value):
+                        return dict(verdict, reason=mismatch(f"saved {name}", meta[name], value))
+                saved = simulated
+                running = False
+
+            elif event == "resume":
+                if saved is None:
+                    return dict(verdict, reason="resume without a matching save")
+                expected = dict(
+                    spawn_state, x=saved["x"], y=saved["y"], current_health=saved["health"],
+                    jump_count=saved["jumps"], fall_counter=saved["falls"],
+                )
+                for name, value in expected.items():
+                    if not same(meta["player"].get(name), value):
+                        return dict(verdict, reason=mismatch(f"resumed {name}", meta["player"].get(name), value))
+                if meta["level"] != saved["level"]:
+                    return dict(verdict, reason=mismatch("resumed level", meta["level"], saved["level"]))
+                if last_time is not None and meta["time"] < last_time:
+                    return dict(verdict, reason="run resumed before it was saved")
+                sim.restore(meta["time"], saved["level"], meta["time"] - saved["elapsed"], expected)
+                running = True
+                saved = None
+                last_time = meta["time"]
+
+            elif event == "finish":
+                verdict.update(
+                    claimed_time=meta.get("final_time"), jumps=sim.player.jump_count, falls=sim.player.fall_counter
+                )
+                if meta.get("outcome") != "finished":
+                    return dict(verdict, reason=f"run ended: {meta.get('outcome')}")
+                if not sim.flag_raised:
+                    return dict(verdict, reason="flag pole not reached in simulation")
+                verdict["simulated_time"] = sim.final_time
+                for name, recorded, simulated in (
+                    ("final time", meta["final_time"], sim.final_time),
+                    ("jumps", meta["jumps"], sim.player.jump_count),
+                    ("falls", meta["falls"], sim.player.fall_counter),
+                ):
+                    if not same(recorded, simulated):
+                        return dict(verdict, reason=mismatch(name, recorded, simulated))
+                if active_ticks > sim.final_time * MAX_TICK_RATE:
+                    return dict(verdict, reason=f"{active_ticks} ticks in {sim.final_time:.1f}s exceeds the frame cap")
+                return dict(verdict, valid=True)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        return dict(verdict, reason=f"unreadable replay: {e}")
+
+    if saved is not None:
+        return dict(verdict, reason="run saved and not finished")
+    return dict(verdict, reason="replay ends before the flag is reached")
+
+class VerificationService:
+    def __init__(self, workers=None):
+        """
+        Start a pool of worker processes, each with the level geometry loaded once.
+
+        Args:
+            workers (int): Number of worker processes. Defaults to the number of CPU cores.
+
+        Returns:
+            None
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=load_simulation_levels)
+        self.replays = 0
+        self.ticks = 0
+        self.simulated_seconds = 0
+        self.wall_seconds = 0
+
+    def verify(self, paths):
+        """
+        Verify replays in parallel, yielding each verdict as soon as it is ready.
+
+        Args:
+            paths (list[str]): Paths of the replay files.
+
+        Yields:
+            dict: Verdict per replay, in completion order. See verify_replay().
+        """
+        start = time.perf_counter()
+        # Largest files first, so a long replay does not start last and keep one core busy alone.
+        paths = sorted(paths, key=lambda path: os.path.getsize(path) if os.path.exists(path) else 0, reverse=True)
+        futures = [self.pool.submit(verify_replay, path) for path in paths]
+        try:
+            for future in as_completed(futures):
+                verdict = future.result()
+                self.replays += 1
+                self.ticks += verdict["ticks"]
+                self.simulated_seconds += verdict["ticks"] / FPS
+                yield verdict
+        finally:
+            self.wall_seconds += time.perf_counter() - start
+
+    def metrics(self):
+        """
+        Return the throughput of all verifications so far.
+
+        Returns:
+            dict: Replays, ticks, wall time and the rates per wall-clock second.
+        """
+        wall = self.wall_seconds or 1e-9
+        return {
+            "workers": self.workers,
+            "replays": self.replays,
+            "ticks": self.ticks,
+            "wall_seconds": self.wall_seconds,
+            "replays_per_second": self.replays / wall,
+            "ticks_per_second": self.ticks / wall,
+            "simulated_hours_per_second": self.simulated_seconds / 3600 / wall,
+        }
+
+    def close(self):
+        """
+        Shut down the worker processes.
+
+        Returns:
+            None
+        """
+        self.pool.shutdown()
+
+def check_best_time(progress_path, verdicts):
+    """
+    Check that the best time in a progress file is backed by a valid replay.
+
+    Args:
+        progress_path (str): Path of progress.json.
+        verdicts (list[dict]): Verdicts of the verified replays.
+
+    Returns:
+        bool: True if a valid replay reproduces the best time.
+    """
+    try:
+        with open(progress_path, 'r') as progress_file:
+            best_time = json.load(progress_file).get("best_time")
+    except Exception as e:
+        print(f"Failed to load progress: {e}")
+        return False
+    if best_time is None:
+        print("No best time to verify.")
+        return False
+    for verdict in verdicts:
+        if verdict["valid"] and same(verdict["simulated_time"], best_time):
+            print(f"Best time {best_time:.3f}s verified by {verdict['path']}")
+            return True
+    print(f"Best time {best_time:.3f}s is not backed by a valid replay")
+    return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify King's Trial replays by re-simulating them.")
+    parser.add_argument("replays", nargs="+", help="replay files or glob patterns")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--progress", help="progress.json whose best time must be backed by a valid replay")
+    parser.add_argument("--json", action="store_true", help="print verdicts as JSON lines")
+    args = parser.parse_args()
+
+    paths = [path for pattern in args.replays for path in (glob.glob(pattern) or [pattern])]
+    service = VerificationService(args.workers)
+    verdicts = []
+    try:
+        for verdict in service.verify(paths):
+            verdicts.append(verdict)
+            if args.json:
+                print(json.dumps(verdict))
+            elif verdict["valid"]:
+                print(f"VALID    {verdict['path']}: {verdict['simulated_time']:.3f}s, "
+                      f"{verdict['jumps']} jumps, {verdict['falls']} falls")
+            else:
+                print(f"INVALID  {verdict['path']}: {verdict['reason']}")
+    finally:
+        service.close()
+
+    metrics = service.metrics()
+    print(f"Verified {metrics['replays']} replays ({metrics['ticks']} ticks) in {metrics['wall_seconds']:.2f}s "
+          f"on {metrics['workers']} workers: {metrics['replays_per_second']:.2f} replays/s, "
+          f"{metrics['ticks_per_second']:.0f} ticks/s, "
+          f"{metrics['simulated_hours_per_second']:.2f} simulated hours/s")
+    if args.progress:
+        check_best_time(args.progress, verdicts)
+
+if __name__ == "__main__":
+    main()
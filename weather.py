@@ -0,0 +1,116 @@
+import math
+import numpy as np
+import pygame
+from itertools import repeat
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+"""
+weather.py
+
+This module implements the weather effects of the King's Trial game.
+Snow is simulated as a pool of small flakes in parallel numpy arrays instead of
+cycling full-screen animation frames, which keeps both memory use and fill rate low.
+
+Features:
+- A fixed pool of snowflakes with positions stored in numpy arrays.
+- Depth layers with their own flake size, opacity and fall speed.
+- Gusting wind and per-flake sway.
+- Flakes snapped to the pixel-art grid and drawn with one batched blit call per layer.
+"""
+PIXEL_SIZE = 8
+
+# (flake size, opacity, fall speed, wind factor) per depth layer, from far to near
+SNOW_LAYERS = [
+    (4, 30, 0.6, 0.4),
+    (8, 47, 1.0, 0.7),
+    (8, 80, 1.6, 1.0),
+]
+
+class SnowWeather:
+    def __init__(self, flake_count=300, layers=SNOW_LAYERS, wind_strength=1.2, seed=None):
+        """
+        Initialize the flake pool with random positions spread over the screen.
+
+        Args:
+            flake_count (int): Number of flakes in the pool.
+            layers (list[tuple]): (size, opacity, fall speed, wind factor) per depth layer.
+            wind_strength (float): Peak horizontal wind speed in pixels per frame.
+            seed (int): Optional random seed.
+
+        Returns:
+            None
+        """
+        self.rng = np.random.default_rng(seed)
+        self.layers = layers
+        self.wind_strength = wind_strength
+        self.frame = 0
+
+        self.x = self.rng.uniform(0, SCREEN_WIDTH, flake_count).astype(np.float32)
+        self.y = self.rng.uniform(0, SCREEN_HEIGHT, flake_count).astype(np.float32)
+        self.sway_phase = self.rng.uniform(0, 2 * math.pi, flake_count).astype(np.float32)
+
+        # Flakes are grouped by layer, so every layer is a contiguous slice of the arrays.
+        self.layer_slices = []
+        fall_speed = np.empty(flake_count, dtype=np.float32)
+        wind_factor = np.empty(flake_count, dtype=np.float32)
+        bounds = np.linspace(0, flake_count, len(layers) + 1).astype(int)
+        for (size, opacity, speed, wind), start, end in zip(layers, bounds[:-1], bounds[1:]):
+            self.layer_slices.append(slice(start, end))
+            fall_speed[start:end] = speed * self.rng.uniform(0.8, 1.2, end - start)
+            wind_factor[start:end] = wind
+        self.fall_speed = fall_speed
+        self.wind_factor = wind_factor
+        self.surfaces = None
+
+    def get_surfaces(self):
+        """
+        Build the flake image of every layer the first time the snow is drawn.
+
+        Returns:
+            list[Surface]: Flake image per depth layer.
+        """
+        if self.surfaces is None:
+            self.surfaces = []
+            for size, opacity, _, _ in self.layers:
+                flake = pygame.Surface((size, size)).convert()
+                flake.fill((255, 255, 255))
+                flake.set_alpha(opacity)
+                self.surfaces.append(flake)
+        return self.surfaces
+
+    def update(self):
+        """
+        Advance every flake by one frame, wrapping flakes that leave the screen.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.frame += 1
+        wind = self.wind_strength * math.sin(self.frame * 0.01) * (0.6 + 0.4 * math.sin(self.frame * 0.037))
+        sway = np.sin(self.sway_phase + self.frame * 0.05)
+        self.x += wind * self.wind_factor + 0.3 * sway
+        self.y += self.fall_speed
+        np.mod(self.x, SCREEN_WIDTH, out=self.x)
+        np.mod(self.y, SCREEN_HEIGHT, out=self.y)
+
+    def draw(self, screen):
+        """
+        Draw every flake, snapped to the pixel-art grid, with one batched call per layer.
+
+        Args:
+            screen (Surface): The surface to draw on.
+
+        Returns:
+            None
+        """
+        xs = (self.x // PIXEL_SIZE * PIXEL_SIZE).astype(np.int32).tolist()
+        ys = (self.y // PIXEL_SIZE * PIXEL_SIZE).astype(np.int32).tolist()
+        fblits = getattr(screen, "fblits", None)
+        for flake, layer in zip(self.get_surfaces(), self.layer_slices):
+            positions = zip(xs[layer], ys[layer])
+            if fblits:
+                fblits(zip(repeat(flake), positions))
+            else:
+                screen.blits(zip(repeat(flake), positions), doreturn=False)
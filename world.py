@@ -0,0 +1,376 @@
+import math
+import pygame
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from constants import SCREEN_HEIGHT
+from levels import LEVEL_PLATFORMS, read_level, install_level, unload_level
+"""
+world.py
+
+This module implements the continuous tower mode of the King's Trial game.
+The levels are stacked into one tall world: level 0 occupies world rows 0 to SCREEN_HEIGHT and
+every following level sits one screen above the previous one, so world y = local y - level * SCREEN_HEIGHT.
+Gameplay keeps its per-level coordinates and exits; only the camera, the streaming of level
+slices and the geometry queries work in world coordinates.
+
+Features:
+- A camera that follows the player smoothly across level boundaries and stops at the ends of the tower.
+- A uniform grid over world space indexing the platforms of every resident slice.
+- Exact collision broadphase: a column query returns the only platforms the player can touch in a tick.
+- Slices that overlap the viewport plus a margin are read on a worker thread and baked on the main thread.
+- A fixed number of resident slices, evicted least recently used first, however tall the tower is.
+"""
+GRID_CELL = 80
+CAMERA_SMOOTHING = 0.15
+SLICE_MARGIN = SCREEN_HEIGHT // 2
+MAX_RESIDENT_SLICES = 6
+
+def level_top(level):
+    """
+    Return the world y-coordinate of the top edge of a level.
+
+    Args:
+        level (int): Zero-based level index.
+
+    Returns:
+        int: World y-coordinate.
+    """
+    return -level * SCREEN_HEIGHT
+
+def level_at(world_y):
+    """
+    Return the level a world row belongs to.
+
+    Args:
+        world_y (float): World y-coordinate.
+
+    Returns:
+        int: Zero-based level index, which may lie outside the tower.
+    """
+    return int(-(world_y // SCREEN_HEIGHT))
+
+class Camera:
+    def __init__(self, level_count, smoothing=CAMERA_SMOOTHING):
+        """
+        Initialize a camera showing the bottom of the tower.
+
+        Args:
+            level_count (int): Number of levels in the tower.
+            smoothing (float): Fraction of the distance to the target covered per frame.
+
+        Returns:
+            None
+        """
+        self.smoothing = smoothing
+        self.min_top = level_top(level_count - 1)
+        self.max_top = 0
+        self.y = SCREEN_HEIGHT / 2
+
+    @property
+    def top(self):
+        """
+        World y-coordinate of the top edge of the viewport, in whole pixels.
+
+        Returns:
+            int: World y-coordinate.
+        """
+        return min(self.max_top, max(self.min_top, round(self.y - SCREEN_HEIGHT / 2)))
+
+    def follow(self, target_y):
+        """
+        Move the camera towards a world row, jumping there directly if it is more than a screen away.
+
+        Args:
+            target_y (float): World y-coordinate to center on.
+
+        Returns:
+            None
+        """
+        if abs(target_y - self.y) > SCREEN_HEIGHT:
+            self.y = target_y
+        else:
+            self.y += (target_y - self.y) * self.smoothing
+        self.y = min(self.max_top + SCREEN_HEIGHT / 2, max(self.min_top + SCREEN_HEIGHT / 2, self.y))
+
+class GeometryIndex:
+    def __init__(self, cell=GRID_CELL):
+        """
+        Initialize an empty world-space grid of platforms.
+
+        Args:
+            cell (int): Width and height of a grid cell in pixels.
+
+        Returns:
+            None
+        """
+        self.cell = cell
+        self.cells = {}
+        self.slices = {}
+
+    def cell_range(self, rect):
+        """
+        Return the grid columns and rows a world rectangle overlaps.
+
+        Args:
+            rect (Rect): Rectangle in world coordinates.
+
+        Returns:
+            tuple: (range of columns, range of rows).
+        """
+        cell = self.cell
+        return (
+            range(rect.left // cell, (rect.right - 1) // cell + 1),
+            range(rect.top // cell, (rect.bottom - 1) // cell + 1),
+        )
+
+    def add_slice(self, level, platforms):
+        """
+        Insert the platforms of a level, placed at the level's position in the world.
+
+        Args:
+            level (int): Zero-based level index.
+            platforms (list[Platform]): The level's platforms in level coordinates.
+
+        Returns:
+            None
+        """
+        self.remove_slice(level)
+        top = level_top(level)
+        keys = set()
+        for order, platform in enumerate(platforms):
+            world_rect = platform.move(0, top)
+            entry = ((level, order), world_rect, platform)
+            columns, rows = self.cell_range(world_rect)
+            for column in columns:
+                for row in rows:
+                    self.cells.setdefault((column, row), []).append(entry)
+                    keys.add((column, row))
+        self.slices[level] = keys
+
+    def remove_slice(self, level):
+        """
+        Remove the platforms of a level.
+
+        Args:
+            level (int): Zero-based level index.
+
+        Returns:
+            None
+        """
+        for key in self.slices.pop(level, []):
+            bucket = [entry for entry in self.cells[key] if entry[0][0] != level]
+            if bucket:
+                self.cells[key] = bucket
+            else:
+                del self.cells[key]
+
+    def query(self, rect):
+        """
+        Find the platforms overlapping a world rectangle.
+
+        Args:
+            rect (Rect): Rectangle in world coordinates.
+
+        Returns:
+            list[tuple]: (level, platform) pairs in level order and, within a level, in platform order.
+                The platforms are in level coordinates.
+        """
+        rect = pygame.Rect(rect)
+        found = {}
+        columns, rows = self.cell_range(rect)
+        for column in columns:
+            for row in rows:
+                for key, world_rect, platform in self.cells.get((column, row), ()):
+                    if key not in found and world_rect.colliderect(rect):
+                        found[key] = platform
+        return [(key[0], found[key]) for key in sorted(found)]
+
+    def column_platforms(self, level, left, right):
+        """
+        Find the platforms of a level that overlap a range of columns.
+
+        A tick only moves the player horizontally by its x velocity, so querying the player's
+        columns widened by that velocity returns every platform the collision checks can touch,
+        in the order the full platform list would test them.
+
+        Args:
+            level (int): Zero-based level index.
+            left (float): Left edge of the column range.
+            right (float): Right edge of the column range.
+
+        Returns:
+            list[Platform]: The platforms, in level coordinates and level order.
+        """
+        left = math.floor(left) - 1
+        rect = pygame.Rect(left, level_top(level), math.ceil(right) + 1 - left, SCREEN_HEIGHT)
+        return [platform for platform_level, platform in self.query(rect) if platform_level == level]
+
+class TowerWorld:
+    def __init__(self, level_count, max_resident=MAX_RESIDENT_SLICES, margin=SLICE_MARGIN):
+        """
+        Initialize the camera, the geometry index and the slice streamer of the continuous tower.
+
+        Args:
+            level_count (int): Number of levels in the tower.
+            max_resident (int): Maximum number of levels kept in memory.
+            margin (int): Distance above and below the viewport within which slices are streamed in.
+
+        Returns:
+            None
+        """
+        self.level_count = level_count
+        self.max_resident = max_resident
+        self.margin = margin
+        self.camera = Camera(level_count)
+        self.index = GeometryIndex()
+        self.resident = OrderedDict()
+        self.pending = {}
+        self.wanted = set()
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix="slice-loader")
+        self.loads = 0
+        self.evictions = 0
+
+    def slice_offset(self, level):
+        """
+        Return where the top edge of a level appears on screen.
+
+        Args:
+            level (int): Zero-based level index.
+
+        Returns:
+            int: Screen y-coordinate of the level's top edge.
+        """
+        return level_top(level) - self.camera.top
+
+    def follow(self, level, player):
+        """
+        Move the camera towards the player.
+
+        Args:
+            level (int): Zero-based level the player is on.
+            player (Player): The player to follow.
+
+        Returns:
+            None
+        """
+        self.camera.follow(level_top(level) + player.y + player.height / 2)
+
+    def visible_slices(self):
+        """
+        Return the levels overlapping the viewport, from the bottom of the tower up.
+
+        Returns:
+            list[tuple]: (level, screen y of the level's top edge) pairs.
+        """
+        top = self.camera.top
+        return [
+            (level, level_top(level) - top)
+            for level in range(level_at(top + SCREEN_HEIGHT - 1), level_at(top) + 1)
+            if 0 <= level < self.level_count
+        ]
+
+    def update(self, level):
+        """
+        Stream in the slices around the viewport and install the ones read since the last frame.
+
+        Args:
+            level (int): Zero-based level the player is on, which always stays resident.
+
+        Returns:
+            None
+        """
+        top = self.camera.top
+        first = max(0, level_at(top + SCREEN_HEIGHT + self.margin - 1))
+        last = min(self.level_count - 1, level_at(top - self.margin))
+        self.wanted = set(range(first, last + 1)) | {level}
+        for wanted in sorted(self.wanted, key=lambda index: abs(index - level)):
+            if wanted not in self.resident and wanted not in self.pending:
+                self.pending[wanted] = self.executor.submit(read_level, wanted)
+        for index, future in list(self.pending.items()):
+            if future.done():
+                self.install(index, future.result())
+        self.trim()
+
+    def ensure(self, level):
+        """
+        Make a level resident right away, waiting for its read if one is in progress.
+
+        Args:
+            level (int): Zero-based level index.
+
+        Returns:
+            None
+        """
+        if level in self.resident:
+            self.resident.move_to_end(level)
+            return
+        future = self.pending.get(level)
+        self.install(level, future.result() if future else read_level(level))
+        self.trim()
+
+    def install(self, level, data):
+        """
+        Bake a slice read on the worker thread and add its geometry to the index.
+
+        Args:
+            level (int): Zero-based level index.
+            data (tuple): Result of read_level.
+
+        Returns:
+            None
+        """
+        self.pending.pop(level, None)
+        install_level(level, data)
+        self.index.add_slice(level, LEVEL_PLATFORMS[level])
+        self.resident[level] = True
+        self.resident.move_to_end(level)
+        self.loads += 1
+
+    def trim(self):
+        """
+        Evict the least recently used slices outside the streaming window until at most max_resident remain.
+
+        Returns:
+            None
+        """
+        for level in list(self.resident):
+            if len(self.resident) <= self.max_resident:
+                return
+            if level not in self.wanted:
+                del self.resident[level]
+                self.index.remove_slice(level)
+                unload_level(level)
+                self.evictions += 1
+
+    def column_platforms(self, level, left, right):
+        """
+        Find the platforms of a level that overlap a range of columns, through the world geometry index.
+
+        Args:
+            level (int): Zero-based level index.
+            left (float): Left edge of the column range.
+            right (float): Right edge of the column range.
+
+        Returns:
+            list[Platform]: The platforms, in level coordinates and level order.
+        """
+        return self.index.column_platforms(level, left, right)
+
+    def close(self):
+        """
+        Stop the slice loader, dropping reads that have not started.
+
+        Returns:
+            None
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def report(self):
+        """
+        Describe the streaming state for logging.
+
+        Returns:
+            str: Resident slices, loads and evictions.
+        """
+        resident = ", ".join(str(level + 1) for level in sorted(self.resident))
+        return f"resident levels: {resident} ({self.loads} loads, {self.evictions} evictions)"